@@ -23,5 +23,10 @@ setup(
     author_email     = "clfo2014@gmail.com",
     version          = "0.0.1",
     packages         = find_packages(),
-    install_requires = get_requirements('requirements.txt')
+    install_requires = get_requirements('requirements.txt'),
+    entry_points     = {
+        'console_scripts': [
+            'mixcloud-pipeline = utilities.pipeline_stages:main',
+        ],
+    },
 )
\ No newline at end of file
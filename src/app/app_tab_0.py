@@ -8,10 +8,19 @@ import random
 import yaml
 import uuid
 import os
+import runpy
 import sys
+import time
 from pathlib import Path
-import pandas as pd
-from src.app.app_tab_1 import load_data, get_unique_values
+
+from utilities.startup_profiler import LOAD_TIMES, record_load_time
+
+# - the tabs (and their data / LangChain imports) are only loaded when opened
+APP_DIR = Path(__file__).resolve().parent
+TAB_SCRIPTS = {
+    'decide_preference': APP_DIR / 'app_tab_1.py',
+    'ai_recommend':      APP_DIR / 'app_tab_2.py',
+}
 
 
 # ------------------------------------------------------------------------------
@@ -19,12 +28,29 @@ from src.app.app_tab_1 import load_data, get_unique_values
 # ------------------------------------------------------------------------------
 
 # Set Page Config ----
-st.set_page_config(
-    page_title = "Zouk Music DJ Set Recommender",
-    page_icon = "🎧",
-    layout = "wide",
-    initial_sidebar_state = "collapsed"
-)
+# - set once here for the page being shown: streamlit only allows it as the first
+#   command, so the tab scripts run below must not call it themselves
+PAGE_CONFIGS = {
+    None: {
+        'page_title':            "Zouk Music DJ Set Recommender",
+        'page_icon':             "🎧",
+        'layout':                "wide",
+        'initial_sidebar_state': "collapsed",
+    },
+    'decide_preference': {
+        'page_title':            "Pick Your Preference",
+        'page_icon':             "🎧",
+        'layout':                "centered",
+        'initial_sidebar_state': "expanded",
+    },
+    'ai_recommend': {
+        'page_title':            "Your AI Zouk Music Assistant",
+        'page_icon':             "🎧🤖",
+        'layout':                "centered",
+    },
+}
+
+st.set_page_config(**PAGE_CONFIGS.get(st.session_state.get('active_tab'), PAGE_CONFIGS[None]))
 
 
 # Custom CSS
@@ -181,15 +207,7 @@ if 'active_tab' not in st.session_state:
     st.session_state.active_tab = None
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
-# Initialize djs and sets if not already present
-if 'djs' not in st.session_state or 'sets' not in st.session_state:
-    df_temp_sets = load_data()
-    if not df_temp_sets.empty:
-        st.session_state.sets = df_temp_sets
-        st.session_state.djs = get_unique_values(df_temp_sets, "name")
-    else:
-        st.session_state.sets = pd.DataFrame()
-        st.session_state.djs = []
+# (the sets and DJ list are loaded by the Pick Your Preference tab, on first use)
 
 # Apply custom CSS
 apply_custom_css()
@@ -276,3 +294,24 @@ def display_decide_preference():
     # Search button
     st.button("Find Sets", key="find_sets")
 
+
+# Run a tab script ----
+def run_tab(tab):
+    # Executed on every rerun like a page script; its imports are cached by
+    # Python after the first run, its data by st.cache_resource
+    start = time.perf_counter()
+    runpy.run_path(str(TAB_SCRIPTS[tab]), run_name = "__main__")
+    record_load_time(tab, start)
+
+
+# ------------------------------------------------------------------------------
+# PAGE ----
+# ------------------------------------------------------------------------------
+if st.session_state.active_tab in TAB_SCRIPTS:
+    run_tab(st.session_state.active_tab)
+else:
+    display_welcome()
+
+    if LOAD_TIMES:
+        with st.expander("⏱️ Tab load times"):
+            st.json(LOAD_TIMES)
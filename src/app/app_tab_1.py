@@ -10,20 +10,25 @@
 # Import Libraries ----
 import streamlit as st
 import pandas as pd
+import numpy as np
 import datetime
+import html
+import math
 import os
 
+from utilities.filter_engine import EXCLUDED_GENRES
+from utilities.dataset_cache import SharedDataset, get_file_mtime, get_session_memory_report
+from utilities.similar_sets import SimilarSetsIndex, SIMILAR_SETS_PATH, load_stored_embeddings
+from utilities.popularity_features import add_popularity_features, POPULARITY_FEATURES_PATH
+from utilities.artist_index import get_show_artists
+from utilities.energy_arc import add_energy_arc_features
+
 # ------------------------------------------------------------------------------
 # APP CONFIGURATION ----
 # ------------------------------------------------------------------------------
 
 # --- Page Configuration ---
-st.set_page_config(
-    page_title            = "Pick Your Preference",
-    page_icon             = "🎧",
-    layout                = "centered",
-    initial_sidebar_state = "expanded"
-)
+# Set by the home page (app_tab_0.PAGE_CONFIGS), which runs this script
 
 # --- Paths ---
 css_path = "src/app/style.css"
@@ -41,13 +46,16 @@ load_css(css_path) # Adjust path as necessary
 def initialize_session_state():
     if "filters_applied" not in st.session_state:
         st.session_state.filters_applied = False
-    if "filtered_sets" not in st.session_state:
-        st.session_state.filtered_sets = pd.DataFrame()
+    # Results are kept as row ids into the shared dataset, not as a DataFrame copy
+    if "filtered_rows" not in st.session_state:
+        st.session_state.filtered_rows = []
     # Initialize filter defaults
     if "selected_djs" not in st.session_state:
         st.session_state.selected_djs = []
     if "selected_genres" not in st.session_state:
         st.session_state.selected_genres = []
+    if "selected_artists" not in st.session_state:
+        st.session_state.selected_artists = []
     if "date_range" not in st.session_state:
         st.session_state.date_range = (datetime.date(2020, 1, 1), datetime.date.today()) # Default date range
     if "play_count_range" not in st.session_state:
@@ -58,11 +66,17 @@ def initialize_session_state():
         st.session_state.energy_range = (0, 10) # Placeholder, adjust based on data
     if "bpm_range" not in st.session_state:
         st.session_state.bpm_range = (60, 180) # Placeholder, adjust based on data
+    if "arc_builds" not in st.session_state:
+        st.session_state.arc_builds = False
+    # Result ordering / pagination
+    if "sort_by" not in st.session_state:
+        st.session_state.sort_by = "Default"
+    if "page_size" not in st.session_state:
+        st.session_state.page_size = 20
 
 initialize_session_state()
 
 # --- Data Loading and Preprocessing ---
-@st.cache_data
 def load_data(csv_path = os.path.join(data_path, "dj_shows_test.csv")): # Placeholder for dataset path
     try:
         df = pd.read_csv(csv_path)
@@ -76,6 +90,14 @@ def load_data(csv_path = os.path.join(data_path, "dj_shows_test.csv")): # Placeh
             st.warning("Column 'show_tags_cleaned' not found. Genre filtering might not work as expected.")
             df["show_tags_cleaned"] = [[] for _ in range(len(df))]
 
+        # Artists: from the formatting pipeline when present, else extracted here
+        if "artists" in df.columns:
+            df["artists"] = df["artists"].apply(
+                lambda x: [name.strip() for name in x.split(",") if name.strip()] if isinstance(x, str) else []
+            )
+        else:
+            df["artists"] = get_show_artists(df)[0]
+
 
         # Standardize date formats
         if "date_uploaded" in df.columns:
@@ -84,6 +106,11 @@ def load_data(csv_path = os.path.join(data_path, "dj_shows_test.csv")): # Placeh
             st.warning("Column 'date_uploaded' not found. Date filtering might not work as expected.")
             df["date_uploaded"] = pd.NaT
 
+        # Energy arcs (chapters, start / peak / end energy, builds), parsed before the
+        # missing energy / BPM values are filled with slider defaults below
+        if "arc_builds" not in df.columns:
+            df = add_energy_arc_features(df)
+
         # Fill missing numeric values for sliders to prevent errors
         numeric_cols_ranges = {
             "play_count": (0, 10000),
@@ -100,6 +127,9 @@ def load_data(csv_path = os.path.join(data_path, "dj_shows_test.csv")): # Placeh
                 st.warning(f"Column '{col}' not found. Related filters might not work as expected.")
                 df[col] = default_min # Add column with default if missing
 
+        # Trending / popularity scores from the feature pipeline (when it has run)
+        df = add_popularity_features(df)
+
         return df
     except FileNotFoundError:
         st.error(f"Error: The dataset file was not found at '{csv_path}'. Please ensure the file exists.")
@@ -108,8 +138,48 @@ def load_data(csv_path = os.path.join(data_path, "dj_shows_test.csv")): # Placeh
         st.error(f"An error occurred while loading or preprocessing the data: {e}")
         return pd.DataFrame()
 
+# One read-only copy of the data (and its filter index) per process, shared by every
+# session. Keyed on the mtimes of the data file and the popularity features, so it
+# reloads when either changes (a new scrape, or the popularity pipeline re-running).
+@st.cache_resource(max_entries = 2, show_spinner = "Loading sets...")
+def load_shared_dataset(csv_path, mtime):
+    # - interval trees only answer narrow range queries; the full-range sliders stay on masks
+    return SharedDataset(load_data(csv_path), csv_path, mtime, use_interval_index = True)
+
+def get_shared_dataset(csv_path = os.path.join(data_path, "dj_shows_test.csv")):
+    return load_shared_dataset(csv_path, (get_file_mtime(csv_path), get_file_mtime(POPULARITY_FEATURES_PATH)))
+
+def get_filter_index():
+    return get_shared_dataset().index
+
+# Nearest-neighbour graph for "More Like This": the prebuilt one (with the stored
+# embeddings), with sets added since it was built inserted incrementally; built here
+# from tags / artists / BPM / energy when there is none
+@st.cache_resource(max_entries = 2, show_spinner = "Indexing similar sets...")
+def load_similar_sets_index(csv_path, mtime):
+    df = load_shared_dataset(csv_path, mtime).catalog.to_frame()
+    if not os.path.exists(SIMILAR_SETS_PATH):
+        return SimilarSetsIndex.from_frame(df)
+
+    similar_index = SimilarSetsIndex.load()
+    df_new = df[~df["show_url"].isin(similar_index.row_ids.keys())].drop_duplicates("show_url")
+    if len(df_new):
+        embeddings = load_stored_embeddings(df_new["show_url"]) if similar_index.embedding_dim else None
+        similar_index.add_shows(df_new, embeddings = embeddings)
+    return similar_index
+
+def get_similar_sets_index():
+    shared = get_shared_dataset()
+    return load_similar_sets_index(shared.path, shared.mtime)
+
 # Load data
-df_sets = load_data() # Ensure you have a CSV file in 'data/dj_sets.csv' or update path
+df_sets = get_shared_dataset().data # Ensure you have a CSV file in 'data/dj_sets.csv' or update path
+
+# Result row ids are positions in the dataset they were computed on: drop them when it reloads
+if st.session_state.get("filtered_rows_mtime") != get_shared_dataset().mtime:
+    st.session_state.filtered_rows = []
+    st.session_state.filters_applied = False
+    st.session_state.filtered_rows_mtime = get_shared_dataset().mtime
 
 # --- Helper Functions ---
 def get_unique_values(data_frame, column_name):
@@ -118,13 +188,13 @@ def get_unique_values(data_frame, column_name):
     return []
 
 all_djs = get_unique_values(df_sets, "name")
-all_genres = get_unique_values(df_sets, "show_tags_cleaned")
 
-if "bachata" in all_genres:
-    all_genres.remove("bachata")
+# Genre options (minus bachata / salsa) and per-tag counts come from the tag index
+tag_index = get_filter_index().tags
+all_genres = tag_index.get_genre_options(excluded = EXCLUDED_GENRES)
 
-if "salsa" in all_genres:
-    all_genres.remove("salsa")
+# Featured artists and per-artist set counts come from the artist index
+artist_index = get_filter_index().artists
 
 
 def get_min_max_values(data_frame, column_name, default_min=0, default_max=100):
@@ -155,79 +225,48 @@ if not df_sets.empty:
             st.session_state.date_range = (min_date_data, max_date_data)
 
 
+# --- Sort Options (sorting is done by the filter index) ---
+SORT_OPTIONS = {
+    "Default":        None,
+    "Most played":    "play_count",
+    "Most favorited": "fav_count",
+    "Newest":         "date_uploaded",
+    "Trending":       "trending_score",
+    "Popular now":    "popularity_score",
+}
+SORT_OPTIONS = {label: column for label, column in SORT_OPTIONS.items() if column is None or column in df_sets.columns}
+
 # --- Filter Logic ---
 def apply_filters(df):
-    filtered_df = df.copy()
-
-    # DJ/Artist Filter
-    if st.session_state.selected_djs:
-        filtered_df = filtered_df[filtered_df["name"].isin(st.session_state.selected_djs)]
-
-    # Genre/Tag Filter (partial matching)
-    if st.session_state.selected_genres:
-        filtered_df = filtered_df[
-            filtered_df["show_tags_cleaned"].apply(
-                lambda tags: any(selected_genre.lower() in tag.lower() for tag in tags for selected_genre in st.session_state.selected_genres) if isinstance(tags, list) else False
-            )
-        ]
-
-    # Date Range Filter
-    start_date, end_date = st.session_state.date_range
-    if "date_uploaded" in filtered_df.columns:
-        filtered_df["date_uploaded_comp"] = pd.to_datetime(filtered_df["date_uploaded"], errors='coerce').dt.date
-        filtered_df = filtered_df[
-            (filtered_df["date_uploaded_comp"] >= start_date) &
-            (filtered_df["date_uploaded_comp"] <= end_date)
-        ]
-        filtered_df = filtered_df.drop(columns=["date_uploaded_comp"])
-
-
-    # Play Count Filter
-    min_plays, max_plays = st.session_state.play_count_range
-    if "play_count" in filtered_df.columns:
-        filtered_df = filtered_df[
-            (filtered_df["play_count"] >= min_plays) & (filtered_df["play_count"] <= max_plays)
-        ]
-
-    # Favorites Count Filter
-    min_favs, max_favs = st.session_state.fav_count_range
-    if "fav_count" in filtered_df.columns:
-        filtered_df = filtered_df[
-            (filtered_df["fav_count"] >= min_favs) & (filtered_df["fav_count"] <= max_favs)
-        ]
-
-    # Energy Level Filter (assumes 'energy_min' and 'energy_max' columns exist)
-    min_energy, max_energy = st.session_state.energy_range
-    if "energy_min" in filtered_df.columns and "energy_max" in filtered_df.columns:
-        filtered_df = filtered_df[
-            (filtered_df["energy_min"] <= max_energy) & (filtered_df["energy_max"] >= min_energy)
-        ]
-    elif "energy_min" in filtered_df.columns: # Fallback if only one energy column
-         filtered_df = filtered_df[(filtered_df["energy_min"] >= min_energy) & (filtered_df["energy_min"] <= max_energy)]
-
-
-    # BPM Filter (assumes 'bpm_min' and 'bpm_max' columns exist)
-    min_bpm, max_bpm = st.session_state.bpm_range
-    if "bpm_min" in filtered_df.columns and "bpm_max" in filtered_df.columns:
-        filtered_df = filtered_df[
-            (filtered_df["bpm_min"] <= max_bpm) & (filtered_df["bpm_max"] >= min_bpm)
-        ]
-    elif "bpm_min" in filtered_df.columns: # Fallback if only one BPM column
-        filtered_df = filtered_df[(filtered_df["bpm_min"] >= min_bpm) & (filtered_df["bpm_min"] <= max_bpm)]
-
-    # Tags Filter
-    if "show_tags_cleaned" in filtered_df.columns:
-        filtered_df = filtered_df[
-            filtered_df["show_tags_cleaned"].apply(
-                lambda tags: any(tag in all_genres for tag in tags)
-            )
-        ]
-
+    # All filters are evaluated as NumPy masks over the precomputed index and
+    # combined once; see SetFilterIndex for the per-filter semantics. Masks are
+    # cached per filter, so only the controls that changed are recomputed.
+    mask = get_shared_dataset().filter.get_mask(
+        selected_djs     = st.session_state.selected_djs,
+        selected_genres  = st.session_state.selected_genres,
+        selected_artists = st.session_state.selected_artists,
+        date_range       = st.session_state.date_range,
+        play_count_range = st.session_state.play_count_range,
+        fav_count_range  = st.session_state.fav_count_range,
+        energy_range     = st.session_state.energy_range,
+        bpm_range        = st.session_state.bpm_range,
+        arc_builds       = st.session_state.arc_builds,
+    )
+    rows = get_filter_index().get_rows(mask, sort_by = SORT_OPTIONS[st.session_state.sort_by])
 
+    # Back to the first page of the new results
+    reset_results_page()
 
-    st.session_state.filtered_sets = filtered_df
+    st.session_state.filtered_rows = rows
+    st.session_state.filtered_rows_mtime = get_shared_dataset().mtime
     st.session_state.filters_applied = True
-    return filtered_df
+    return rows
+
+# --- Results Page ---
+def reset_results_page():
+    # Dropping the page widget's state shows page 1 on the next render (new filters,
+    # sort order or page size all change what each page holds)
+    st.session_state.pop("your_picks_page", None)
 
 # --- Reset Filters ---
 def reset_filters():
@@ -243,43 +282,78 @@ def reset_filters():
     st.session_state.fav_count_range = fav_count_min_max
     st.session_state.energy_range = energy_min_max
     st.session_state.bpm_range = bpm_min_max
+    st.session_state.arc_builds = False
 
     st.session_state.filters_applied = False
-    st.session_state.filtered_sets = pd.DataFrame()
+    st.session_state.filtered_rows = []
+    reset_results_page()
     st.rerun()
 
-# --- Helper function to display sets ---
-def display_sets_section(title, sets_df, empty_message="No sets to display in this section.", success_message=None):
+# --- Helper functions to display sets ---
+def get_chapters_html(row):
+    chapters = row.get('chapters')
+    if not isinstance(chapters, str) or not chapters:
+        return ''
+    return f'<div class="chapters-section"><strong>Chapters:</strong> {html.escape(chapters)}</div>'
+
+def get_card_html(row):
+    tags_html = ''.join([f'<span class="tag">{html.escape(str(tag))}</span>' for tag in (row.get('show_tags_cleaned') or [])[:5]])
+    return f"""
+    <div class="set-card">
+        <div class="card-header">
+            <h4>{html.escape(str(row.get('name', 'N/A')))} - {html.escape(str(row.get('title', 'Untitled Set')))}</h4>
+        </div>
+        <div class="card-body">
+            <div class="tags-section">
+                {tags_html}
+            </div>
+            <div class="stats-section">
+                <span><strong>Plays:</strong> {row.get('play_count', 'N/A'):,}</span>
+                <span><strong>Favs:</strong> {row.get('fav_count', 'N/A'):,}</span>
+                <span><strong>Uploaded:</strong> {row.get('date_uploaded', 'N/A')}</span>
+            </div>
+            {get_chapters_html(row)}
+        </div>
+        <div class="card-footer">
+            <a href="{html.escape(str(row.get('show_url', '#')))}" target="_blank" class="listen-button">
+                Listen on Mixcloud
+            </a>
+        </div>
+    </div>
+    """
+
+def get_cards_html(sets_df):
+    # One HTML string (and one st.markdown call) per page instead of two widgets per card
+    return '<hr>'.join(get_card_html(row) for row in sets_df.to_dict(orient = 'records'))
+
+def display_sets_section(title, sets_df, empty_message="No sets to display in this section.", success_message=None, page_key=None, rows=None):
     st.subheader(title)
     if success_message:
         st.success(success_message)
 
-    if not sets_df.empty:
-        for index, row in sets_df.iterrows():
-            card_html = f"""
-            <div class="set-card">
-                <div class="card-header">
-                    <h4>{row.get('name', 'N/A')} - {row.get('title', 'Untitled Set')}</h4>
-                </div>
-                <div class="card-body">
-                    <div class="tags-section">
-                        {''.join([f'<span class="tag">{tag}</span>' for tag in row.get('show_tags_cleaned', [])[:5]])}
-                    </div>
-                    <div class="stats-section">
-                        <span><strong>Plays:</strong> {row.get('play_count', 'N/A'):,}</span>
-                        <span><strong>Favs:</strong> {row.get('fav_count', 'N/A'):,}</span>
-                        <span><strong>Uploaded:</strong> {row.get('date_uploaded', 'N/A')}</span>
-                    </div>
-                </div>
-                <div class="card-footer">
-                    <a href="{row.get('show_url', '#' )}" target="_blank" class="listen-button">
-                        Listen on Mixcloud
-                    </a>
-                </div>
-            </div>
-            """
-            st.markdown(card_html, unsafe_allow_html=True)
-            st.markdown("---") # Separator
+    # rows: positions into the shared catalog to show (only the current page is materialised)
+    n_sets = len(rows) if rows is not None else len(sets_df)
+
+    if n_sets > 0:
+        page_rows = rows if rows is not None else slice(None)
+
+        # Only the current page is rendered, so render time doesn't grow with the result count
+        if page_key is not None:
+            page_size = st.session_state.page_size
+            n_pages = max(1, math.ceil(n_sets / page_size))
+            if st.session_state.get(page_key, 1) > n_pages:
+                st.session_state[page_key] = 1
+
+            page = st.number_input(f"Page (of {n_pages})", min_value = 1, max_value = n_pages, step = 1, key = page_key)
+            start = (page - 1) * page_size
+            page_rows = rows[start:start + page_size] if rows is not None else slice(start, start + page_size)
+
+        # - the shared catalog is stored compactly; decode only the rows on this page
+        page_df = sets_df.iloc[page_rows] if rows is None else get_shared_dataset().get_rows(page_rows)
+        if page_key is not None:
+            st.caption(f"Showing {start + 1}-{start + len(page_df)} of {n_sets} sets")
+
+        st.markdown(get_cards_html(page_df), unsafe_allow_html=True)
     else:
         st.info(empty_message)
 
@@ -312,8 +386,18 @@ with st.sidebar:
             # default        = st.session_state.selected_genres,
             default        = all_genres[:5], # Default to first 5 genres
             max_selections = 5,
+            format_func    = tag_index.format_genre_option,
             key            = "genres_multiselect"
         )
+        # Artists featured in the sets (from the artist -> sets index)
+        if artist_index is not None:
+            st.session_state.selected_artists = st.multiselect(
+                "Featuring Artist (max 5)",
+                options        = artist_index.get_artist_options(),
+                max_selections = 5,
+                format_func    = artist_index.format_artist_option,
+                key            = "artists_multiselect"
+            )
 
     with st.expander("📅 Date & Popularity", expanded=True):
         # Date Range
@@ -384,6 +468,29 @@ with st.sidebar:
             key="bpm_slider",
             help = "Filtering on BPM will reduce the number of sets shown, as only few sets have BPM data."
         )
+        # Energy arc (from the set's chapters / description)
+        st.session_state.arc_builds = st.checkbox(
+            "Only sets that build up",
+            value = st.session_state.arc_builds,
+            key   = "arc_builds_checkbox",
+            help  = "Sets whose chapters (or description) build from a lower to a higher energy."
+        )
+
+    with st.expander("↕️ Sort & Page Size", expanded=False):
+        st.session_state.sort_by = st.selectbox(
+            "Sort results by",
+            options   = list(SORT_OPTIONS.keys()),
+            index     = list(SORT_OPTIONS.keys()).index(st.session_state.sort_by),
+            key       = "sort_by_select",
+            on_change = reset_results_page,
+        )
+        st.session_state.page_size = st.selectbox(
+            "Results per page",
+            options   = [10, 20, 50],
+            index     = [10, 20, 50].index(st.session_state.page_size),
+            key       = "page_size_select",
+            on_change = reset_results_page,
+        )
 
     col1, col2 = st.columns(2)
     with col1:
@@ -397,11 +504,13 @@ with st.sidebar:
 # --- Display User's Picks (Filtered Results) ---
 if st.session_state.filters_applied:
     if not df_sets.empty:
-        if not st.session_state.filtered_sets.empty:
+        if len(st.session_state.filtered_rows) > 0:
             display_sets_section(
                 title="⭐ Your Picks",
-                sets_df=st.session_state.filtered_sets,
-                success_message=f"Found {len(st.session_state.filtered_sets)} sets matching your criteria."
+                sets_df=df_sets,
+                rows=st.session_state.filtered_rows,
+                page_key="your_picks_page",
+                success_message=f"Found {len(st.session_state.filtered_rows)} sets matching your criteria."
             )
         else:
             st.subheader("⭐ Your Picks")
@@ -414,10 +523,29 @@ if st.session_state.filters_applied:
 
 # st.markdown("---") # Separator between sections if both are shown
 
+# --- More Like This (precomputed similar sets) ---
+if not df_sets.empty and "show_url" in df_sets.columns:
+    # Seeds: the user's picks if any, else the first sets in the catalog
+    seed_rows = st.session_state.filtered_rows if len(st.session_state.filtered_rows) > 0 else np.arange(len(df_sets))
+    seed_row = st.selectbox(
+        "🔁 Find sets similar to",
+        options     = list(seed_rows[:50]),
+        format_func = lambda row: f"{df_sets['name'].iloc[row]} - {df_sets['title'].iloc[row]}",
+        key         = "similar_seed",
+    )
+    if seed_row is not None:
+        similar = get_similar_sets_index().get_similar(df_sets['show_url'].iloc[seed_row], n = 3)
+        display_sets_section(
+            title         = "🔁 More Like This",
+            sets_df       = df_sets,
+            rows          = get_shared_dataset().get_url_rows(url for url, _ in similar),
+            empty_message = "No similar sets found for this one yet.",
+        )
+
 # --- Display Our Picks (Sample Sets) ---
 if not df_sets.empty:
     sample_size = min(3, len(df_sets))
-    our_picks_df = df_sets.sample(n=sample_size, random_state=1) if sample_size > 0 else pd.DataFrame()
+    our_picks_df = get_shared_dataset().get_rows(df_sets.sample(n=sample_size, random_state=1).index) if sample_size > 0 else pd.DataFrame()
     display_sets_section(
         title="🎶 Our Picks",
         success_message = "Here are a few sets we think you might enjoy. Your picks will appear above ☝️ once you apply filters.",
@@ -446,6 +574,16 @@ st.sidebar.markdown(
     """, unsafe_allow_html=True
 )
 
+# --- Memory Report (this session vs the shared dataset) ---
+with st.sidebar.expander("🧠 Memory"):
+    session_memory = get_session_memory_report(st.session_state)
+    st.markdown(f"- This session: **{sum(session_memory.values()) / 1024:,.1f} KB**")
+    st.markdown(f"- Shared dataset (all sessions): **{get_shared_dataset().get_nbytes() / 1024:,.1f} KB**")
+    st.json(session_memory)
+
+    st.markdown("- Filter mask cache (shared):")
+    st.json(get_shared_dataset().filter.get_stats())
+
 # --- Potential Future Enhancements ---
 with st.sidebar.expander("🚀 Future Ideas"):
     st.markdown("- Audio previews within the app")
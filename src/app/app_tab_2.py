@@ -7,19 +7,19 @@
 # ------------------------------------------------------------------------------
 
 # Import Libraries ----
-from langchain_community.vectorstores import Chroma
 from langchain_community.chat_message_histories import StreamlitChatMessageHistory
-from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.runnables.history import RunnableWithMessageHistory
-from langchain_openai import ChatOpenAI, OpenAIEmbeddings
-from langchain.chains import create_history_aware_retriever, create_retrieval_chain
-from langchain.chains.combine_documents import create_stuff_documents_chain
+from utilities.rag_utilities import get_rag_components, close_vectorstore, get_vectorstore_stats
+from utilities.reranker import get_rerank_stats
+from utilities.rag_serving import RagRequestServer
 
 import streamlit as st
+import asyncio
+import httpx
 import random
 import yaml
 import uuid
 import os
+import atexit
 import sys
 from pathlib import Path
 
@@ -27,6 +27,10 @@ from pathlib import Path
 if "example_prompt_value" not in st.session_state:
     st.session_state.example_prompt_value = None
 
+# Each browser session gets its own chat history id
+if "rag_session_id" not in st.session_state:
+    st.session_state.rag_session_id = str(uuid.uuid4())
+
 # Paths ----
 project_root = Path(__file__).resolve().parent
 sys.path.append(str(project_root))
@@ -36,15 +40,19 @@ sys.path.append(str(project_root))
 # Env Variables ----
 OPENAI_API_KEY = yaml.safe_load(open("credentials.yml"))['openai']
 RAG_DATABASE = os.path.join(project_root, 'data', 'dev', 'chroma_db')
+RAG_CHUNK_DATABASE = os.path.join(project_root, 'data', 'dev', 'chroma_db_chunks')
+RAG_DOCSTORE = os.path.join(project_root, 'data', 'dev', 'docstore')
+
+# - 'chroma' or 'numpy' (memory-mapped export, see rag_utilities.export_numpy_store); unset = chroma
+RAG_VECTORSTORE_BACKEND = os.environ.get('VECTORSTORE_BACKEND')
+
+# - when set, the tab is a thin client of the RAG query service (src/service/rag_api.py)
+RAG_SERVICE_URL = os.environ.get('RAG_SERVICE_URL')
 
 # ------------------------------------------------------------------------------
 # STREAMLIT APP
 # ------------------------------------------------------------------------------
-st.set_page_config(
-    page_title            = "Your AI Zouk Music Assistant",
-    page_icon             = "🎧🤖",
-    layout                = "centered"
-)
+# Page config is set by the home page (app_tab_0.PAGE_CONFIGS), which runs this script
 
 # Message History ----
 msgs = StreamlitChatMessageHistory(key = "langchain_messages")
@@ -54,205 +62,45 @@ if len(msgs.messages) == 0:
 view_messages = st.expander("View the message contents in session state")
 
 
-def get_rag_chain(
-    vectorstore_path = RAG_DATABASE,
-    model            = 'gpt-4o-mini',
-    temperature      = 0.7,
-    openai_api_key   = OPENAI_API_KEY,
-
-):
-
-    # - embedding ----
-    embedding_function = OpenAIEmbeddings(
-        model   = 'text-embedding-ada-002',
-        api_key = openai_api_key
+# Built once per process and shared by every session / rerun.
+@st.cache_resource(show_spinner = "Loading the AI assistant...")
+def get_rag_chain(**kwargs):
+    components = get_rag_components(
+        vectorstore_path       = RAG_DATABASE,
+        chunk_vectorstore_path = RAG_CHUNK_DATABASE,
+        docstore_path          = RAG_DOCSTORE,
+        vectorstore_backend    = RAG_VECTORSTORE_BACKEND,
+        **kwargs,
     )
+    atexit.register(close_vectorstore, components['vectorstore'])
 
-    #  - vectorestore ----
-    vectorstore = Chroma(
-        persist_directory  = vectorstore_path,
-        embedding_function = embedding_function,
-    )
+    return components['chain']
 
-    #  - retriever ----
-    retriever = vectorstore.as_retriever()
 
-    # - llm ----
-    llm = ChatOpenAI(
-        model       = model,
-        temperature = temperature,
-        api_key     = openai_api_key,
-    )
+# Async server shared by every session: bounded queue + concurrency limit,
+# with retrieval and the LLM call running on its own event loop.
+@st.cache_resource
+def get_rag_server(max_concurrency = 8, max_queue_size = 100, **kwargs):
+    return RagRequestServer(
+        get_rag_chain(**kwargs),
+        max_concurrency = max_concurrency,
+        max_queue_size  = max_queue_size,
+    ).start_in_background()
 
-    # - rag chain ----
-
-    # - contextualize question ----
-    contextualize_q_system_prompt = """Given a chat history and the latest user question \
-    which might reference context in the chat history, formulate a standalone question \
-    which can be understood without the chat history. Do NOT answer the question, \
-    just reformulate it if needed and otherwise return it as is."""
-
-    contextualize_q_prompt = ChatPromptTemplate.from_messages([
-        ("system", contextualize_q_system_prompt),
-        MessagesPlaceholder("chat_history"),
-        ("human", "{input}"),
-    ])
-
-    history_aware_retriever = create_history_aware_retriever(llm, retriever, contextualize_q_prompt)
-
-    # -- answer question based on chat history ----
-    qa_system_prompt = """
-
-        You are a music recommendation assistant helping users discover DJ sets based on their mood, energy, and genre preferences.
-
-        Zouk is a family of dance music genres originating in the Caribbean (notably Guadeloupe and Martinique) and popularized
-        globally through Brazilian and African interpretations.
-
-        There are multiple substyles and fusion genres within Zouk music:
+def stream_from_service(query, session_id, service_url = RAG_SERVICE_URL):
+    """ Stream an answer from the RAG query service (history is kept server-side). """
+    with httpx.stream(
+        "POST",
+        f"{service_url}/recommend",
+        json    = {"query": query, "session_id": session_id, "stream": True},
+        timeout = 120,
+    ) as response:
+        response.raise_for_status()
+        for chunk in response.iter_text():
+            yield chunk
 
-        - Traditional Zouk (Caribbean Zouk): Upbeat, percussion-driven, and rooted in Creole rhythms. Often features live
-        instruments and a carnival feel.
-        - Brazilian Zouk: A slower, smoother evolution adapted for partner dancing. Known for its sensual flow, deep bass, and melodic remixes.
-        - Zouk Lambada: A style blending Brazilian Zouk and Lambada rhythms. Often more dynamic and rhythmically complex.
-        - Ghetto Zouk: A minimal, electronic-influenced version with R&B, Kizomba, or Afrobeat elements. Often more sensual and groove-based.
-        - Zouk Remixes & DJ Edits: Many DJs remix R&B, Lo-fi, Afrobeat, or Pop tracks into Zouk rhythm structures to create fresh dance experiences
-        - Zouk sets can range from slow and intimate to high-energy and festival-style, and may feature crossover genres like Afrobeat,
-          Chillout, Deephouse, Groovy, R&B, EDM, and live blends. Vibe and energy arcs are often as important as genre when selecting a Zouk set.
-
-        Your goal is not just to recommend sets, but to help the user discover what they’re truly in the mood for, even if they aren’t sure yet.
-
-        Instructions:
-
-        - If the user’s query is vague or mood-based (e.g. “I want something chill”), start by asking a **clarifying question** before
-        making recommendations. For example:
-            - “Are you interested in chill Zouk specifically, or are you open to R&B or Lo-fi as well?”
-            - “Would you prefer something that builds energy or stays smooth throughout?”
-        - Be sure to give reasons why you are suggesting each set.
-        - Only make recommendations once you feel you have enough clarity on what they’re looking for.
-        - Use a friendly, conversational tone. Make the user feel like they’re chatting with a helpful DJ friend.
-        - Answer based only on the context provided below.
-        - If multiple sets match, suggest 1–3 and explain why.
-        - If no match is found, say so clearly and suggest trying different keywords.
-        - Use a friendly and concise tone.
-        - Provide the DJ name, title, and a link to the set.
-        - Provide information on the dj.
-        - Avoid using the word “I” to keep the tone professional yet warm.
-        - Include brief information about the DJ and the set
-        - When you see the word "Vibe", it's just another word for Genre.
-        - When you see the word "Tempo" is just another word for BPM.
-        - Feel free to summarize or reword descriptions for clarity, but do not invent details.
-        - Do not ask if the user questions like "are you in the mood for Zouk or something else?". All the sets are Zouk. Zouk is just
-          the name of the music and dance but the music incorporates many genres like R&B, Afrobeat, and more.
-
-        - If no matching sets are found:
-            - Say so clearly and suggest trying different keywords or moods.
-
-        See example responses below. Use this output format once you have enough context to make a recommendation:
-
-        Example 1:
-        It seems like you're looking for a DJ set with a "Chill" vibe. Just to clarify — are you interested
-        in chill Zouk sets specifically, or are you open to other genres like Lo-fi, R&B, or Downtempo EDM as well?
-
-        Here are some sets that match your query based on what's available:
-
-        🎧 Recommendations:
-        "Beaking with Tradition - DJ Sprenk"
-        Listen to the set here: [DJ Sprenk - Beaking with Tradition](https://www.mixcloud.com/djsprenk/beaking-with-tradition/)
-
-        Information on Set:
-        This set was played as the closing set on Friday night at Zouk Heat 2025. The set features chapters including.
-        Date Uploaded: 2 days ago.
-        Genres/Vibe: Feel Good R&B, Traditional, Trancey and lots more.
-        Artists Featured: N.E.D, Sabrina Claudio, Chris Brown, Davido, and lots more.
-        Play Count: 133.
-        Favorite Count: 7.
-
-        More on DJ Sprenk:
-        DJ Sprenk is a brazilian zouk dj based in Cambridge, MA. He's style incorporates, smooth transitions,
-        chill remixes, and a touch of afrobeats. You can find him djing on Wednesday nights at the Cambridge Zouk social.
-
-        Example 2:
-        It sounds like you're looking for something chill. Just to clarify — are you specifically in
-        the mood for Zouk with a laid-back groove, or are you also open to mixes that incorporate R&B and Afrobeat influences?
-
-        Here’s a set I think you’ll enjoy:
-
-        🎧 Recommendations:
-
-        "Icing the Fire" by DJ WarHoll
-        🎧 Listen on Mixcloud
-        Information on Set:
-
-        Where it was played: Friday night chill room at Zouk Heat 2025
-        Set vibe: Designed to create space for dancers to relax and move freely without pressure
-        Genres included: Zouk, Brazilian Zouk, R&B, Afrobeat
-        Artists featured: YDDE ADZ, Chris Brown, DJ LOV3, Ya Levis, Oxlade
-        Play count: 164
-        Favorite count: 18
-        More on DJ WarHoll:
-
-        DJ WarHoll is a Zouk and Kizomba DJ from Richmond, VA. Known for his groovy and emotionally expressive sets,
-        he brings immaculate vibes whether he's opening or closing a night.
-
-        It sounds like you're in the mood for something with groove and progression. Just to clarify — are you
-        looking for sets that start chill and gradually build energy, or something that stays consistently smooth throughout?
-
-        If you enjoy dynamic energy arcs within the same vibe family, DJ WarHoll has two standout sets worth exploring.
-
-        Example 3:
-        🎧 Recommendations:
-
-        "Grace Thru Fire" by DJ WarHoll
-        "In The Air Tonight" by DJ WarHoll
-        🎧 Listen here:
-
-        Grace Thru Fire (Sunday Day Party)
-        In The Air Tonight (Saturday Night Closer)
-        Information on Set – "Grace Thru Fire":
-
-        Where it was played: RVAZM Weekender Hybrid 2025, Sunday Day Party
-        Set vibe: Slow and intentional start with a powerful peak mid-set
-        Genres included: Zouk, Brazilian Zouk, Afrobeat, Moombahton, Kizomba
-        Artists featured: DJ Kakah, DJ Vini, Will Gittens, Max Blacksoul, Lana Del Rey (remix)
-        Play count: 124
-        Favorite count: 4
-        Information on Set – "In The Air Tonight":
-
-        Where it was played: Saturday night closer at the same event
-        Set vibe: A chill but engaging late-night session designed to keep dancers moving until 3am
-        Genres included: Zouk, Brazilian Zouk, Kizomba, Chillout, Acoustic
-        Artists featured: Nelson Freitas, Kim Tavares, Ana Mancebo, Drea Dury, Malcom Beatz
-        Play count: 88
-        Favorite count: 2
-
-        More on DJ WarHoll:
-        DJ WarHoll is a Zouk/Kizomba DJ based in Richmond, VA. His sets are known for their
-        emotional range, often moving between groove, softness, and surprise peaks. His mixes are particularly
-        great for dancers who appreciate intention behind musical storytelling — and yes, the vibes are indeed immaculate.
-
-        {context}
-    """
-
-    qa_prompt = ChatPromptTemplate.from_messages([
-        ("system", qa_system_prompt),
-        MessagesPlaceholder("chat_history"),
-        ("human", "{input}")
-    ])
-
-    question_answer_chain = create_stuff_documents_chain(llm, qa_prompt)
-
-    # - combine both RAG + chat message history
-    rag_chain = create_retrieval_chain(history_aware_retriever, question_answer_chain)
 
-    return RunnableWithMessageHistory(
-        rag_chain,
-        lambda session_id: msgs,
-        input_messages_key   = "input",
-        history_messages_key = "chat_history",
-        output_messages_key  = "answer",
-    )
-
-rag_chain = get_rag_chain(OPENAI_API_KEY)
+rag_server = None if RAG_SERVICE_URL else get_rag_server(openai_api_key = OPENAI_API_KEY)
 
 # Add Title
 # Add "back to welcome" button
@@ -325,17 +173,42 @@ if chat_input_val:
 # If there's a query from either source, process it
 if query_to_process:
     st.chat_message("human").write(query_to_process)
-    # Note: The RAG chain with RunnableWithMessageHistory is expected to handle
-    # adding the human message to the history (msgs).
-
-    with st.spinner("Thinking..."):
-        response = rag_chain.invoke(
-            {"input": query_to_process},
-            config={"configurable": {"session_id": "any"}}, # session_id="any" is from original code
-        )
-        # The AI response is also expected to be added to history by the chain.
-        # Explicitly writing it to the chat UI is consistent with original code.
-        st.chat_message("ai").write(response['answer'])
+
+    # History comes from this session's state and is passed in explicitly,
+    # since the shared server runs outside the streamlit script thread.
+    chat_history = list(msgs.messages)
+
+    with st.chat_message("ai"):
+        if RAG_SERVICE_URL:
+            answer_stream = stream_from_service(query_to_process, st.session_state.rag_session_id)
+        else:
+            answer_stream = rag_server.stream_threadsafe(
+                {"input": query_to_process, "chat_history": chat_history},
+                config     = {"metadata": {"session_id": st.session_state.rag_session_id}},
+                output_key = "answer",
+            )
+        # - every slot and queue place taken (or the service answered 503): ask to retry
+        try:
+            answer = st.write_stream(answer_stream)
+        except (asyncio.QueueFull, httpx.HTTPStatusError):
+            answer = None
+            st.warning("The assistant is busy right now, please retry in a moment.")
+
+    if answer is not None:
+        msgs.add_user_message(query_to_process)
+        msgs.add_ai_message(answer)
+
+# Vectorstore Stats ----
+# Opened should stay at 1 per process no matter how many reruns / sessions
+with st.expander("AI assistant resource stats"):
+    if RAG_SERVICE_URL:
+        st.json(httpx.get(f"{RAG_SERVICE_URL}/metrics").json())
+    else:
+        st.json({
+            'vectorstore': get_vectorstore_stats(),
+            'rerank':      get_rerank_stats(),
+            'serving':     rag_server.get_stats(),
+        })
 
 # View Messages for Debugging ----
 # Draw the messages at the end, so newly generated ones show up immediately
@@ -10,6 +10,7 @@
 
 # Import Libraries ----
 from utilities.mixcloud_scraper import scrape_mixcloud_main
+from utilities.popularity_features import append_counter_snapshot
 
 # ?scrape_mixcloud_main
 
@@ -23,4 +24,7 @@ result = scrape_mixcloud_main(
 )
 
 result[0]
-result[1]
\ No newline at end of file
+result[1]
+
+# Keep the Play / Favourite Counters of Every Scrape ----
+append_counter_snapshot(result[1])
\ No newline at end of file
@@ -7,13 +7,14 @@
 # ------------------------------------------------------------------------------
 
 # Import Libraries ----
-from langchain.docstore.document import Document
 from langchain_community.vectorstores import Chroma
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
 from langchain_core.prompts import ChatPromptTemplate
 
+from utilities.document_builder import iter_documents
+
 import pandas as pd
 import yaml
 from pprint import pprint
@@ -55,42 +56,10 @@ df_combined = pd.merge(
     .drop([col for col in df_sets.columns if 'show_info' in col and not col.endswith('combined')], axis=1)
 
 
-# Create Document ----
-def get_rage_document(data):
-    """
-    Create a Document object from a row of the DataFrame.
-    """
-    sets_dict = data.to_dict(orient = 'records')
-
-    documents = []
-
-    for item in sets_dict:
-        content = f"""
-        dj_name: {item.get('dj_name')},
-        dj_bio: {item.get('dj_info')},
-        df_followers: {item.get('dj_followers')},
-        df_following: {item.get('dj_following')},
-        title: {item.get('show_title')},
-        play_count: {item.get('play_count')},
-        favorited_count: {item.get('fav_count')},
-        date_uploaded: {item.get('date_uploaded')},
-        genre_tags: {item.get('show_tags_cleaned')},
-        energy_min: {item.get('energy_min')},
-        energy_max: {item.get('energy_max')},
-        bpm_min: {item.get('bpm_min')},
-        bpm_max: {item.get('bpm_max')},
-        artists_list: {item.get('artists_list')},
-        show_info_combined: {item.get('show_info_combined')},
-        show_url: {item.get('show_url')},
-        """
-
-        doc = Document(page_content = content, metadata = item)
-
-        documents.append(doc)
-
-    return documents
-
-documents = create_document(df_combined)
+# Create Documents ----
+# - only the metadata retrieval reads; rendered in this process, since a worker pool
+#   started at the top level of a script fails under spawn (macOS / Windows)
+documents = list(iter_documents(df_combined, processes = 0))
 
 len(documents)
 
@@ -121,6 +90,51 @@ retriever = vectorstore.as_retriever()
 retriever
 
 
+# ------------------------------------------------------------------------------
+# NUMPY VECTOR STORE (MEMORY-MAPPED) ---
+# ------------------------------------------------------------------------------
+from utilities.numpy_vectorstore import NumpyVectorStore
+from utilities.rag_utilities import get_vectorstore, get_numpy_store_path
+
+# Export ----
+# - same vectors as float16, loaded with mmap instead of a Chroma client
+NumpyVectorStore.from_chroma(vectorstore, dtype = 'float16') \
+    .save(get_numpy_store_path(os.path.join(DATA_DIR, 'chroma_db')))
+
+# Load & Query ----
+vectorstore_np = get_vectorstore(
+    os.path.join(DATA_DIR, 'chroma_db'),
+    embedding_function = embedding_function_ws,
+    backend            = 'numpy',
+)
+
+vectorstore_np.similarity_search("feel-good R&B > Traditional > trancey", k = 4, filter = {'bpm_min': {'$gte': 80}})
+
+retriever_np = vectorstore_np.as_retriever(search_kwargs = {'k': 4})
+
+
+# ------------------------------------------------------------------------------
+# CHUNKED VECTOR DATABASE (PARENT DOCUMENT RETRIEVAL) ---
+# ------------------------------------------------------------------------------
+from utilities.chunk_indexer import build_chunked_index, get_parent_document_retriever
+
+# Child Chunks -> Parent Shows ----
+vectorstore_chunks = build_chunked_index(
+    documents          = documents,
+    embedding_function = embedding_function_ws,
+    persist_directory  = os.path.join(DATA_DIR, 'chroma_db_chunks'),
+    docstore_path      = os.path.join(DATA_DIR, 'docstore'),
+)
+
+# Parent Retriever ----
+retriever_chunks = get_parent_document_retriever(
+    vectorstore_chunks,
+    docstore_path = os.path.join(DATA_DIR, 'docstore'),
+)
+
+retriever_chunks.invoke("feel-good R&B > Traditional > trancey")
+
+
 # ------------------------------------------------------------------------------
 # RAG LLM MODEL ----
 # ------------------------------------------------------------------------------
@@ -138,9 +152,9 @@ def get_rag_model(
         api_key = openai_api_key
     )
 
-    #  - vectorestore ----
-    vectorstore = Chroma(
-        persist_directory  = vectorstore_path,
+    #  - vectorestore (chroma, or the numpy export with VECTORSTORE_BACKEND=numpy) ----
+    vectorstore = get_vectorstore(
+        vectorstore_path   = vectorstore_path,
         embedding_function = embedding_function,
     )
 
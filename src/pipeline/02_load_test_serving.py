@@ -0,0 +1,87 @@
+# ==============================================================================
+# LOAD TEST - ASYNC RAG SERVING ----
+# Replays concurrent chat requests through RagRequestServer against a local
+# fake LLM and fake embeddings (no network / API cost).
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# SETUP ----
+# ------------------------------------------------------------------------------
+
+# Import Libraries ----
+import asyncio
+import time
+from pprint import pprint
+
+from utilities.fake_models import get_fake_rag_chain
+from utilities.rag_serving import RagRequestServer
+
+# Settings ----
+N_REQUESTS = 200
+MAX_CONCURRENCY = 16
+MAX_QUEUE_SIZE = 500
+LLM_LATENCY = 0.5
+EMBEDDING_LATENCY = 0.05
+
+QUERIES = [
+    "Find me some chill Zouk sets for a relaxed evening.",
+    "Recommend upbeat Zouk tracks with Afrobeat influences.",
+    "Find DJ sets with strong energy arcs, building from slow to high BPM.",
+]
+
+
+# ------------------------------------------------------------------------------
+# LOAD TEST ----
+# ------------------------------------------------------------------------------
+async def run_load_test(
+    n_requests      = N_REQUESTS,
+    max_concurrency = MAX_CONCURRENCY,
+    max_queue_size  = MAX_QUEUE_SIZE,
+):
+    fake = get_fake_rag_chain(llm_latency = LLM_LATENCY, embedding_latency = EMBEDDING_LATENCY)
+
+    server = await RagRequestServer(
+        fake['chain'],
+        max_concurrency = max_concurrency,
+        max_queue_size  = max_queue_size,
+    ).start()
+
+    gauges = []
+
+    async def sample_gauges():
+        while True:
+            stats = server.get_stats()
+            gauges.append((stats['queue_depth'], stats['in_flight']))
+            await asyncio.sleep(0.05)
+
+    sampler = asyncio.create_task(sample_gauges())
+
+    start = time.perf_counter()
+    results = await asyncio.gather(
+        *[
+            server.submit({"input": QUERIES[i % len(QUERIES)], "chat_history": []})
+            for i in range(n_requests)
+        ],
+        return_exceptions = True,
+    )
+    elapsed = time.perf_counter() - start
+
+    sampler.cancel()
+    await server.stop()
+
+    return {
+        'requests':        n_requests,
+        'errors':          sum(isinstance(r, Exception) for r in results),
+        'elapsed_s':       round(elapsed, 2),
+        'requests_per_s':  round(n_requests / elapsed, 2),
+        'max_queue_depth': max(q for q, _ in gauges),
+        'max_in_flight':   max(f for _, f in gauges),
+        **server.get_stats(),
+    }
+
+# Run ----
+# - each request makes 2 LLM calls (rewrite only with history, so 1 here) plus
+#   1 embedding call; throughput should scale with MAX_CONCURRENCY
+for concurrency in [1, 4, 16]:
+    print(f"=== max_concurrency = {concurrency} ===")
+    pprint(asyncio.run(run_load_test(n_requests = 4 * concurrency * 4, max_concurrency = concurrency)))
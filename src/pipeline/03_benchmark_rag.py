@@ -0,0 +1,56 @@
+# ==============================================================================
+# RAG BENCHMARK ----
+# Replays the labelled query set (data/dev/benchmark_queries.json) through the
+# RAG stages and reports per-stage latency, prompt tokens and recall@k.
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# SETUP ----
+# ------------------------------------------------------------------------------
+
+# Import Libraries ----
+from pprint import pprint
+
+from utilities.fake_models import get_fake_rag_chain, get_fake_embeddings
+from utilities.rag_benchmark import (
+    TimedEmbeddings,
+    run_rag_benchmark,
+    save_benchmark_results,
+    load_previous_benchmark_results,
+    compare_benchmark_results,
+)
+
+# Settings ----
+# - fake LLM / embeddings run offline; with fake embeddings recall@k is only a
+#   smoke test. To measure the served chain, pass the retriever and llm of
+#   get_rag_components(embedding_function = TimedEmbeddings(OpenAIEmbeddings(...)), ...)
+LABEL = 'rag_fake'
+K = 4
+REPEATS = 3
+
+
+# ------------------------------------------------------------------------------
+# BENCHMARK ----
+# ------------------------------------------------------------------------------
+
+# Components ----
+# - the retriever embeds through the timed wrapper, so its embed step is reported
+embeddings = TimedEmbeddings(get_fake_embeddings(latency = 0.02))
+fake = get_fake_rag_chain(llm_latency = 0.2, embeddings = embeddings, k = K)
+
+# Run ----
+results = run_rag_benchmark(
+    llm                = fake['llm'],
+    embedding_function = embeddings,
+    retriever          = fake['retriever'],
+    k                  = K,
+    repeats            = REPEATS,
+)
+
+pprint(results['summary'])
+
+# Save + Compare With Previous Run ----
+path = save_benchmark_results(results, label = LABEL)
+previous = load_previous_benchmark_results(label = LABEL, exclude = path)
+
+pprint(compare_benchmark_results(results, previous))
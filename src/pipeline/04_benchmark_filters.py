@@ -0,0 +1,136 @@
+# ==============================================================================
+# FILTER ENGINE BENCHMARK ----
+# Compares SetFilterIndex masks with the original row-by-row pandas filters
+# (results must be identical) at increasing catalog sizes.
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# SETUP ----
+# ------------------------------------------------------------------------------
+
+# Import Libraries ----
+import datetime
+import time
+
+import pandas as pd
+
+from utilities.filter_engine import SetFilterIndex, EXCLUDED_GENRES
+from utilities.incremental_filter import IncrementalFilter
+from utilities.synthetic_data import get_synthetic_sets
+
+# Filters ----
+FILTERS = {
+    'selected_djs':     ['DJ Sprenk', 'DJ WarHoll', 'DJ Eflosa'],
+    'selected_genres':  ['zouk', 'r&b'],
+    'date_range':       (datetime.date(2021, 1, 1), datetime.date(2025, 6, 1)),
+    'play_count_range': (10, 4000),
+    'fav_count_range':  (0, 150),
+    'energy_range':     (3, 8),
+    'bpm_range':        (70, 90),
+}
+
+
+# ------------------------------------------------------------------------------
+# REFERENCE (ORIGINAL apply_filters LOGIC) ----
+# ------------------------------------------------------------------------------
+def apply_filters_pandas(df, filters, all_genres):
+    filtered_df = df.copy()
+
+    if filters['selected_djs']:
+        filtered_df = filtered_df[filtered_df["name"].isin(filters['selected_djs'])]
+
+    if filters['selected_genres']:
+        filtered_df = filtered_df[
+            filtered_df["show_tags_cleaned"].apply(
+                lambda tags: any(g.lower() in tag.lower() for tag in tags for g in filters['selected_genres']) if isinstance(tags, list) else False
+            )
+        ]
+
+    start_date, end_date = filters['date_range']
+    filtered_df["date_uploaded_comp"] = pd.to_datetime(filtered_df["date_uploaded"], errors='coerce').dt.date
+    filtered_df = filtered_df[
+        (filtered_df["date_uploaded_comp"] >= start_date) & (filtered_df["date_uploaded_comp"] <= end_date)
+    ].drop(columns=["date_uploaded_comp"])
+
+    min_plays, max_plays = filters['play_count_range']
+    filtered_df = filtered_df[(filtered_df["play_count"] >= min_plays) & (filtered_df["play_count"] <= max_plays)]
+
+    min_favs, max_favs = filters['fav_count_range']
+    filtered_df = filtered_df[(filtered_df["fav_count"] >= min_favs) & (filtered_df["fav_count"] <= max_favs)]
+
+    min_energy, max_energy = filters['energy_range']
+    filtered_df = filtered_df[(filtered_df["energy_min"] <= max_energy) & (filtered_df["energy_max"] >= min_energy)]
+
+    min_bpm, max_bpm = filters['bpm_range']
+    filtered_df = filtered_df[(filtered_df["bpm_min"] <= max_bpm) & (filtered_df["bpm_max"] >= min_bpm)]
+
+    filtered_df = filtered_df[filtered_df["show_tags_cleaned"].apply(lambda tags: any(tag in all_genres for tag in tags))]
+
+    return filtered_df
+
+
+# ------------------------------------------------------------------------------
+# BENCHMARK ----
+# ------------------------------------------------------------------------------
+results = []
+
+for n_rows in [10_000, 100_000, 1_000_000]:
+    df = get_synthetic_sets(n_rows)
+    all_genres = set(df["show_tags_cleaned"].explode().astype(str).dropna().unique()) - set(EXCLUDED_GENRES)
+
+    start = time.perf_counter()
+    index = SetFilterIndex(df)
+    build_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    expected = apply_filters_pandas(df, FILTERS, all_genres)
+    pandas_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    mask = index.get_mask(**FILTERS)
+    mask_ms = (time.perf_counter() - start) * 1000
+
+    assert df.index[mask].equals(expected.index), "filter engine differs from the pandas filters"
+
+    results.append({
+        'rows':          n_rows,
+        'matches':       int(mask.sum()),
+        'index_build_s': round(build_s, 2),
+        'pandas_ms':     round(pandas_ms, 1),
+        'mask_ms':       round(mask_ms, 2),
+        'speedup':       round(pandas_ms / mask_ms, 1),
+    })
+
+print(pd.DataFrame(results))
+
+
+# ------------------------------------------------------------------------------
+# INCREMENTAL (ONE CONTROL CHANGED PER APPLY) ----
+# ------------------------------------------------------------------------------
+# - the last catalog above; each step narrows the play count slider only
+incremental = IncrementalFilter(index)
+incremental.get_mask(**FILTERS)
+
+results = []
+
+for max_plays in [3500, 3000, 2500, 2000]:
+    filters = {**FILTERS, 'play_count_range': (10, max_plays)}
+
+    start = time.perf_counter()
+    expected = index.get_mask(**filters)
+    full_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    mask = incremental.get_mask(**filters)
+    incremental_ms = (time.perf_counter() - start) * 1000
+
+    assert (mask == expected).all(), "incremental filter differs from the full evaluation"
+
+    results.append({
+        'play_count_range': filters['play_count_range'],
+        'full_ms':          round(full_ms, 2),
+        'incremental_ms':   round(incremental_ms, 2),
+    })
+
+print(pd.DataFrame(results))
+print(pd.DataFrame(incremental.get_stats()).drop(columns = 'nbytes').T)
@@ -0,0 +1,80 @@
+# ==============================================================================
+# INTERVAL INDEX BENCHMARK ----
+# BPM / energy / upload-date range queries: interval tree vs full column masks
+# at increasing catalog sizes (results must be identical), and the default
+# routing that only sends narrow queries to the tree.
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# SETUP ----
+# ------------------------------------------------------------------------------
+
+# Import Libraries ----
+import datetime
+import time
+
+import numpy as np
+import pandas as pd
+
+from utilities.filter_engine import SetFilterIndex
+from utilities.synthetic_data import get_synthetic_sets
+
+# Queries (narrow -> broad) ----
+QUERIES = {
+    'bpm_range': [(88, 89), (70, 79), (60, 120)],
+    'energy_range': [(9, 9), (3, 6), (0, 10)],
+    'date_range': [
+        (datetime.date(2025, 5, 1), datetime.date(2025, 5, 7)),
+        (datetime.date(2024, 1, 1), datetime.date(2024, 12, 31)),
+        (datetime.date(2018, 1, 1), datetime.date.today()),
+    ],
+}
+
+N_REPEATS = 20
+
+
+def time_ms(fn, n_repeats = N_REPEATS):
+    start = time.perf_counter()
+    for _ in range(n_repeats):
+        result = fn()
+    return (time.perf_counter() - start) * 1000 / n_repeats, result
+
+
+# ------------------------------------------------------------------------------
+# BENCHMARK ----
+# ------------------------------------------------------------------------------
+results = []
+
+for n_rows in [10_000, 100_000, 1_000_000]:
+    df = get_synthetic_sets(n_rows)
+
+    mask_index = SetFilterIndex(df)
+
+    start = time.perf_counter()
+    tree_index = SetFilterIndex(df, use_interval_index = True, interval_max_selectivity = 1.0)
+    build_s = time.perf_counter() - start
+
+    # - narrow queries (<= 5% of rows) from the tree, the rest from masks
+    routed_index = SetFilterIndex(df, use_interval_index = True)
+
+    for filter_name, ranges in QUERIES.items():
+        for value_range in ranges:
+            mask_ms, expected = time_ms(lambda: mask_index.get_mask(**{filter_name: value_range}))
+            tree_ms, actual = time_ms(lambda: tree_index.get_mask(**{filter_name: value_range}))
+            routed_ms, routed = time_ms(lambda: routed_index.get_mask(**{filter_name: value_range}))
+
+            assert np.array_equal(expected, actual), f"interval index differs for {filter_name}={value_range}"
+            assert np.array_equal(expected, routed), f"routed index differs for {filter_name}={value_range}"
+
+            results.append({
+                'rows':         n_rows,
+                'filter':       filter_name,
+                'range':        value_range,
+                'matches':      int(actual.sum()),
+                'mask_ms':      round(mask_ms, 3),
+                'tree_ms':      round(tree_ms, 3),
+                'routed_ms':    round(routed_ms, 3),
+                'tree_build_s': round(build_s, 2),
+            })
+
+print(pd.DataFrame(results).to_string())
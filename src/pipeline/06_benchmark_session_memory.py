@@ -0,0 +1,60 @@
+# ==============================================================================
+# SESSION MEMORY BENCHMARK ----
+# Memory per Streamlit session before (each session holds its own copy of the
+# catalog plus a filtered DataFrame) and after (one SharedDataset per process,
+# sessions hold only the row ids of their results).
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# SETUP ----
+# ------------------------------------------------------------------------------
+
+# Import Libraries ----
+import datetime
+import pickle
+
+import pandas as pd
+
+from utilities.dataset_cache import SharedDataset, get_object_nbytes
+from utilities.synthetic_data import get_synthetic_sets
+
+# Filters ----
+FILTERS = {
+    'selected_genres':  ['zouk'],
+    'date_range':       (datetime.date(2021, 1, 1), datetime.date(2025, 6, 1)),
+    'play_count_range': (10, 4000),
+}
+
+N_SESSIONS = 20
+
+
+# ------------------------------------------------------------------------------
+# BENCHMARK ----
+# ------------------------------------------------------------------------------
+results = []
+
+for n_rows in [10_000, 100_000]:
+    df = get_synthetic_sets(n_rows)
+    shared = SharedDataset(df, path = None, mtime = 0.0)
+    rows = shared.index.get_rows(shared.index.get_mask(**FILTERS))
+
+    # - before: st.cache_data hands each session an unpickled copy, and the
+    #   session keeps the filtered frame as well
+    session_copy = pickle.loads(pickle.dumps(df))
+    before_bytes = get_object_nbytes(session_copy) + get_object_nbytes(session_copy.iloc[rows])
+
+    # - after: the session only keeps the row ids
+    after_bytes = get_object_nbytes(rows)
+
+    results.append({
+        'rows':                  n_rows,
+        'matches':               len(rows),
+        'catalog_mb':            round(get_object_nbytes(df) / 1e6, 1),
+        'shared_mb':             round(shared.get_nbytes() / 1e6, 1),
+        'session_before_mb':     round(before_bytes / 1e6, 2),
+        'session_after_mb':      round(after_bytes / 1e6, 3),
+        f"{N_SESSIONS}_sessions_before_mb": round(N_SESSIONS * before_bytes / 1e6, 1),
+        f"{N_SESSIONS}_sessions_after_mb":  round((shared.get_nbytes() + N_SESSIONS * after_bytes) / 1e6, 1),
+    })
+
+print(pd.DataFrame(results).T)
@@ -0,0 +1,75 @@
+# ==============================================================================
+# CATALOG MEMORY BENCHMARK ----
+# Bytes per set of the load_data frame (tag lists, object names, float64
+# numerics, date objects) vs the CompactCatalog (categorical names, CSR tags,
+# int16 / int32 numerics, date32), and a check that filters give the same rows.
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# SETUP ----
+# ------------------------------------------------------------------------------
+
+# Import Libraries ----
+import datetime
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from utilities.compact_catalog import CompactCatalog
+from utilities.filter_engine import SetFilterIndex
+from utilities.synthetic_data import get_synthetic_sets
+
+# Filters ----
+FILTERS = {
+    'selected_djs':     ['DJ Sprenk', 'DJ WarHoll'],
+    'selected_genres':  ['zouk'],
+    'date_range':       (datetime.date(2021, 1, 1), datetime.date(2025, 6, 1)),
+    'play_count_range': (10, 4000),
+    'bpm_range':        (70, 90),
+}
+
+
+# ------------------------------------------------------------------------------
+# HELPERS ----
+# ------------------------------------------------------------------------------
+def get_frame_nbytes(df):
+    # - memory_usage(deep = True) counts list objects but not the strings inside them
+    nbytes = int(df.memory_usage(deep = True).sum())
+    if 'show_tags_cleaned' in df.columns:
+        nbytes += sum(sys.getsizeof(tag) for tags in df['show_tags_cleaned'] for tag in tags)
+    return nbytes
+
+
+# ------------------------------------------------------------------------------
+# BENCHMARK ----
+# ------------------------------------------------------------------------------
+results = []
+
+for n_rows in [100_000, 1_000_000]:
+    df = get_synthetic_sets(n_rows)
+
+    start = time.perf_counter()
+    catalog = CompactCatalog.from_frame(df)
+    build_s = time.perf_counter() - start
+
+    before_bytes = get_frame_nbytes(df)
+    after_bytes = catalog.get_nbytes()
+
+    # - same filter results from either representation
+    expected = SetFilterIndex(df).get_mask(**FILTERS)
+    assert np.array_equal(SetFilterIndex(catalog).get_mask(**FILTERS), expected), "compact catalog filters differ"
+
+    results.append({
+        'rows':             n_rows,
+        'build_s':          round(build_s, 2),
+        'before_mb':        round(before_bytes / 1e6, 1),
+        'after_mb':         round(after_bytes / 1e6, 1),
+        'before_bytes_set': round(before_bytes / n_rows, 1),
+        'after_bytes_set':  round(after_bytes / n_rows, 1),
+        'reduction':        round(before_bytes / after_bytes, 1),
+    })
+
+print(pd.DataFrame(results))
+print(catalog.frame.dtypes)
@@ -0,0 +1,49 @@
+# ==============================================================================
+# STARTUP TIME REPORT ----
+# Import time per module (python -X importtime, fresh interpreter each time)
+# for what the welcome page loads now vs what it used to load eagerly, and the
+# slowest modules behind each tab.
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# SETUP ----
+# ------------------------------------------------------------------------------
+
+# Import Libraries ----
+from pathlib import Path
+
+import pandas as pd
+
+from utilities.startup_profiler import get_import_times, get_total_import_ms
+
+# Paths ----
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+
+# Import Sets ----
+IMPORT_SETS = {
+    # - welcome page (app_tab_0) with lazily loaded tabs
+    'welcome_lazy':  ['streamlit', 'yaml', 'random', 'uuid', 'runpy', 'utilities.startup_profiler'],
+    # - baseline welcome page: its own imports plus those of app_tab_1 (load_data), imported up front
+    'welcome_eager': ['streamlit', 'yaml', 'pandas', 'datetime', 'random', 'uuid'],
+    # - what each tab adds when it is opened
+    'tab_1':         ['utilities.dataset_cache', 'utilities.filter_engine'],
+    'tab_2':         ['utilities.rag_utilities', 'utilities.rag_serving', 'langchain_community.chat_message_histories', 'httpx'],
+}
+
+TOP_N = 10
+
+
+# ------------------------------------------------------------------------------
+# REPORT ----
+# ------------------------------------------------------------------------------
+totals = []
+
+for name, modules in IMPORT_SETS.items():
+    import_times = get_import_times(modules, cwd = PROJECT_ROOT)
+    totals.append({'import_set': name, 'modules': len(import_times), 'total_ms': get_total_import_ms(import_times)})
+
+    print(f"\n{name} - slowest {TOP_N} modules")
+    print(pd.DataFrame(import_times).head(TOP_N))
+
+print("\nTotals")
+print(pd.DataFrame(totals))
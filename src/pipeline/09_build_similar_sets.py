@@ -0,0 +1,87 @@
+# ==============================================================================
+# SIMILAR SETS (K-NEAREST-NEIGHBOUR GRAPH) ----
+# Builds the "More Like This" graph from the stored Chroma embeddings, TF-IDF
+# of tags / DJ / artists and BPM / energy ranges, then checks lookup latency
+# and incremental updates on a synthetic catalog.
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# SETUP ----
+# ------------------------------------------------------------------------------
+
+# Import Libraries ----
+import os
+import time
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from utilities.rag_utilities import DATA_DIR, get_vectorstore, close_vectorstore
+from utilities.similar_sets import SimilarSetsIndex, get_stored_embeddings
+from utilities.synthetic_data import get_synthetic_sets
+
+# Keys ----
+OPENAI_API_KEY = yaml.safe_load(open("credentials.yml"))['openai']
+
+# Load Data ----
+df_sets = pd.read_csv(os.path.join(DATA_DIR, 'dj_shows_test.csv'))
+df_sets['show_tags_cleaned'] = df_sets['show_tags_cleaned'].apply(
+    lambda x: [tag.strip() for tag in x.strip("[]").replace("'", "").split(",")] if isinstance(x, str) else []
+)
+
+
+# ------------------------------------------------------------------------------
+# BUILD FROM THE CATALOG ----
+# ------------------------------------------------------------------------------
+
+# Stored Embeddings ----
+vectorstore = get_vectorstore(os.path.join(DATA_DIR, 'chroma_db'), openai_api_key = OPENAI_API_KEY)
+embeddings = get_stored_embeddings(vectorstore, df_sets['show_url'])
+close_vectorstore(vectorstore)
+
+# Graph ----
+similar_index = SimilarSetsIndex.from_frame(df_sets, embeddings = embeddings, n_neighbors = 10)
+similar_index.save()
+
+similar_index.get_similar(df_sets['show_url'].iloc[0], n = 3)
+
+
+# ------------------------------------------------------------------------------
+# SYNTHETIC CATALOG: BUILD, LOOKUP AND INCREMENTAL UPDATE ----
+# ------------------------------------------------------------------------------
+df = get_synthetic_sets(50_000)
+df_old, df_new = df.iloc[:-500], df.iloc[-500:]
+
+start = time.perf_counter()
+synthetic_index = SimilarSetsIndex.from_frame(df_old)
+build_s = time.perf_counter() - start
+
+# - lookups are a dict lookup plus one row of the graph
+urls = df_old['show_url'].sample(1_000, random_state = 1).tolist()
+start = time.perf_counter()
+for url in urls:
+    synthetic_index.get_similar(url, n = 5)
+lookup_us = (time.perf_counter() - start) / len(urls) * 1e6
+
+# - add the new shows incrementally, then compare with the exact neighbours
+start = time.perf_counter()
+synthetic_index.add_shows(df_new)
+add_s = time.perf_counter() - start
+
+sample = np.random.default_rng(1).choice(len(synthetic_index), 200, replace = False)
+exact = synthetic_index.vectors[sample] @ synthetic_index.vectors.T
+exact[np.arange(len(sample)), sample] = -np.inf
+exact_top = np.argsort(-exact, axis = 1)[:, :synthetic_index.n_neighbors]
+
+recall = np.mean([
+    len(set(synthetic_index.indices[row]) & set(top)) / len(top) for row, top in zip(sample, exact_top)
+])
+
+print(pd.Series({
+    'shows':              len(synthetic_index),
+    'build_s':            round(build_s, 2),
+    'lookup_us':          round(lookup_us, 1),
+    'add_500_s':          round(add_s, 2),
+    'recall_at_10':       round(float(recall), 3),
+}))
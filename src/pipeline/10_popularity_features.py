@@ -0,0 +1,72 @@
+# ==============================================================================
+# POPULARITY & TRENDING FEATURES ----
+# Batch feature pipeline over the play / favourite counter history kept by
+# the scraper (00_scrape_mixcloud.py): velocity, trending and decay-weighted
+# popularity per show, saved for the Explore sort and the retriever boost.
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# SETUP ----
+# ------------------------------------------------------------------------------
+
+# Import Libraries ----
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from utilities.popularity_features import (
+    DATA_DIR,
+    load_counter_history,
+    append_counter_snapshot,
+    get_popularity_features,
+    save_popularity_features,
+)
+
+# Load Data ----
+df_sets = pd.read_csv(os.path.join(DATA_DIR, 'dj_shows_test.csv'))
+
+
+# ------------------------------------------------------------------------------
+# FEATURES FOR THE CATALOG ----
+# ------------------------------------------------------------------------------
+
+# - seed the history with the current counters if no scrape has been recorded yet
+history = load_counter_history()
+if history.empty:
+    history = append_counter_snapshot(df_sets)
+
+features = get_popularity_features(
+    history,
+    upload_dates = df_sets.set_index('show_url')['date_uploaded'],
+)
+save_popularity_features(features)
+
+features.sort_values('trending_score', ascending = False).head(10)
+
+
+# ------------------------------------------------------------------------------
+# TIMING ON A SYNTHETIC HISTORY ----
+# ------------------------------------------------------------------------------
+# - 100k shows x 12 weekly scrapes
+rng = np.random.default_rng(42)
+n_shows, n_scrapes = 100_000, 12
+
+show_urls = np.repeat([f"https://www.mixcloud.com/synthetic/set-{i}/" for i in range(n_shows)], n_scrapes)
+scraped_at = np.tile(pd.date_range('2025-01-05', periods = n_scrapes, freq = 'W').to_numpy(), n_shows)
+plays_per_week = np.repeat(rng.gamma(1.0, 20.0, n_shows), n_scrapes)
+
+synthetic_history = pd.DataFrame({
+    'show_url':   show_urls,
+    'scraped_at': scraped_at,
+    'play_count': np.floor(plays_per_week * np.tile(np.arange(1, n_scrapes + 1), n_shows)),
+    'fav_count':  np.floor(plays_per_week * np.tile(np.arange(1, n_scrapes + 1), n_shows) / 25),
+})
+
+start = time.perf_counter()
+synthetic_features = get_popularity_features(synthetic_history)
+elapsed_s = time.perf_counter() - start
+
+print(f"{len(synthetic_history):,} snapshots of {n_shows:,} shows -> features in {elapsed_s:.2f}s")
+synthetic_features.describe()
@@ -0,0 +1,72 @@
+# ==============================================================================
+# ARTIST EXTRACTION & ARTIST -> SETS INDEX ----
+# Parses the artists (and track lists, where shows have them) into normalised
+# entities, builds the artist -> sets index and times lookups against the
+# equivalent substring scan of artists_list.
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# SETUP ----
+# ------------------------------------------------------------------------------
+
+# Import Libraries ----
+import os
+import time
+
+import pandas as pd
+
+from utilities.artist_index import ArtistIndex, get_show_artists, get_artist_lookup_tool
+from utilities.rag_utilities import DATA_DIR
+
+# Load Data ----
+df_sets = pd.read_csv(os.path.join(DATA_DIR, 'dj_shows_test.csv'))
+
+
+# ------------------------------------------------------------------------------
+# EXTRACTION ----
+# ------------------------------------------------------------------------------
+artists, track_lists = get_show_artists(df_sets)
+
+df_sets[['title', 'artists_list']].assign(artists = artists, tracks = [len(t) for t in track_lists])
+
+
+# ------------------------------------------------------------------------------
+# INDEX ----
+# ------------------------------------------------------------------------------
+artist_index = ArtistIndex(artists)
+
+pd.DataFrame(artist_index.get_top_artists(20), columns = ['artist', 'shows', 'mentions'])
+
+# - "sets featuring Chris Brown" ----
+df_sets.iloc[artist_index.get_rows('chris brown')][['name', 'title', 'show_url']]
+
+# - same lookup as a LangChain tool ----
+artist_tool = get_artist_lookup_tool(artist_index, df_sets)
+print(artist_tool.invoke('Chris Brown'))
+
+
+# ------------------------------------------------------------------------------
+# LOOKUP TIMING ----
+# ------------------------------------------------------------------------------
+# - 10k copies of the catalog, so the scan has something to do
+df_large = pd.concat([df_sets] * 10_000, ignore_index = True)
+large_index = ArtistIndex(artists * 10_000)
+
+n_lookups = 1_000
+
+start = time.perf_counter()
+for _ in range(n_lookups):
+    large_index.get_rows('Chris Brown')
+index_us = (time.perf_counter() - start) / n_lookups * 1e6
+
+start = time.perf_counter()
+scan_rows = df_large.index[df_large['artists_list'].str.contains('Chris Brown', case = False, na = False)]
+scan_us = (time.perf_counter() - start) * 1e6
+
+assert set(scan_rows) == set(large_index.get_rows('Chris Brown')), "index and scan disagree"
+
+print(pd.Series({
+    'shows':     len(df_large),
+    'index_us':  round(index_us, 2),
+    'scan_us':   round(scan_us, 1),
+}))
@@ -0,0 +1,84 @@
+# ==============================================================================
+# ENERGY ARCS & CHAPTERS ----
+# Parses the chapter sequences (show_info3: "Chapters: a > b > c") and the
+# energy / BPM notes (show_info1: "Energy 3-8 | 70-79 BPM") into structured
+# arc columns, and answers arc questions ("sets that build from slow to high
+# BPM") with the filter index instead of an LLM pass over the descriptions.
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# SETUP ----
+# ------------------------------------------------------------------------------
+
+# Import Libraries ----
+import os
+import time
+
+import pandas as pd
+
+from utilities.energy_arc import get_energy_arcs, add_energy_arc_features, get_chapter_levels
+from utilities.filter_engine import SetFilterIndex
+from utilities.rag_utilities import DATA_DIR
+
+# Load Data ----
+df_sets = pd.read_csv(os.path.join(DATA_DIR, 'dj_shows_test.csv'))
+
+
+# ------------------------------------------------------------------------------
+# PARSING ----
+# ------------------------------------------------------------------------------
+arcs = get_energy_arcs(df_sets)
+
+pd.concat([df_sets[['title', 'show_info1']], arcs], axis = 1)
+
+# - relative chapter energies behind the arc of the first set with chapters ----
+first_chapters = arcs.loc[arcs['n_chapters'] > 0, 'chapters'].iloc[0]
+pd.DataFrame({'chapter': first_chapters, 'level': get_chapter_levels(first_chapters)})
+
+
+# ------------------------------------------------------------------------------
+# STRUCTURED QUERIES ----
+# ------------------------------------------------------------------------------
+df_arcs = add_energy_arc_features(df_sets)
+filter_index = SetFilterIndex(df_arcs)
+
+# - "sets that build" (chapters, or a description of a build) ----
+df_arcs.iloc[filter_index.get_rows(filter_index.get_arc_mask(builds = True))][['name', 'title', 'chapters']]
+
+# - "sets that build from slow to high" (relative chapter levels, estimated from the chapter words) ----
+slow_to_fast = filter_index.get_arc_mask(builds = True, start_level_range = (0, 0.35), end_level_range = (0.65, 1))
+df_arcs.iloc[filter_index.get_rows(slow_to_fast)][['name', 'title', 'chapters', 'arc_start_level', 'arc_end_level']]
+
+# - ... from slow to high BPM: only sets whose chapters state a BPM ("slow (70 BPM) > ...").
+#   None in the dev catalog: its 3 building sets are described in prose, without chapters,
+#   so `builds = True` above is the only structured query that finds them
+slow_to_fast_bpm = filter_index.get_arc_mask(builds = True, start_bpm_range = (0, 72), end_bpm_range = (78, 300))
+df_arcs.iloc[filter_index.get_rows(slow_to_fast_bpm)][['name', 'title', 'arc_start_bpm', 'arc_end_bpm']]
+
+# - sets peaking at energy 9+ ----
+df_arcs.iloc[filter_index.get_rows(filter_index.get_arc_mask(peak_energy_range = (9, 10)))][['name', 'title', 'arc_peak_energy']]
+
+
+# ------------------------------------------------------------------------------
+# QUERY TIMING ----
+# ------------------------------------------------------------------------------
+# - 10k copies of the catalog
+df_large = pd.concat([df_arcs] * 10_000, ignore_index = True)
+large_index = SetFilterIndex(df_large)
+
+n_queries = 100
+
+start = time.perf_counter()
+for _ in range(n_queries):
+    large_index.get_arc_mask(builds = True, start_level_range = (0, 0.35), end_level_range = (0.65, 1))
+query_ms = (time.perf_counter() - start) / n_queries * 1e3
+
+start = time.perf_counter()
+get_energy_arcs(df_sets.sample(1_000, replace = True, random_state = 42))
+parse_ms_per_1k = (time.perf_counter() - start) * 1e3
+
+print(pd.Series({
+    'shows':           len(df_large),
+    'query_ms':        round(query_ms, 3),
+    'parse_ms_per_1k': round(parse_ms_per_1k, 1),
+}))
@@ -0,0 +1,74 @@
+# ==============================================================================
+# DOCUMENT BUILDER BENCHMARK ----
+# get_rag_document (one loop, full record as metadata, whole list in memory)
+# vs document_builder.iter_documents (chunks rendered in a process pool,
+# retrieval metadata only, documents streamed to the consumer).
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# SETUP ----
+# ------------------------------------------------------------------------------
+
+# Import Libraries ----
+import os
+import time
+import tracemalloc
+
+import pandas as pd
+
+from utilities.document_builder import iter_documents, iter_batches
+from utilities.rag_utilities import get_rag_document
+from utilities.synthetic_data import get_synthetic_sets
+
+# Synthetic Corpus ----
+# - the load_data-shaped catalog plus the DJ and text columns of the merged frame
+def get_synthetic_combined(n_rows, seed = 42):
+    df = get_synthetic_sets(n_rows, seed = seed).rename(columns = {'name': 'dj_name'})
+    return df.assign(
+        dj_info            = 'Zouk DJ based in the US, playing socials and weekenders. ' * 4,
+        dj_followers       = 1200,
+        dj_following       = 300,
+        date_posted        = '1 year ago',
+        artists_list       = 'Playing tracks by Chris Brown, Kaytranada, Naïka, Tems and more.',
+        show_info_combined = 'show_info_1:\nEnergy 3-8 | 70-79 BPM\n\nshow_info_3:\nChapters: groovy > sexy > build. ' * 3,
+    )
+
+
+def consume(documents, batch_size = 1_000):
+    # - stands in for the indexer: takes a batch at a time
+    n_documents = 0
+    for batch in iter_batches(documents, batch_size):
+        n_documents += len(batch)
+    return n_documents
+
+
+def measure(build):
+    tracemalloc.start()
+    start = time.perf_counter()
+    n_documents = build()
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {'documents': n_documents, 'seconds': round(seconds, 2), 'peak_mb': round(peak / 1e6, 1)}
+
+
+# ------------------------------------------------------------------------------
+# BENCHMARK ----
+# ------------------------------------------------------------------------------
+if __name__ == '__main__':
+    results = {}
+
+    # - 100k shows: the list-building function against the streaming builder ----
+    df_combined = get_synthetic_combined(100_000)
+    results['get_rag_document (100k)'] = measure(lambda: len(get_rag_document(df_combined)))
+    results['iter_documents, 1 process (100k)'] = measure(lambda: consume(iter_documents(df_combined, processes = 0)))
+    results[f"iter_documents, {os.cpu_count()} processes (100k)"] = measure(lambda: consume(iter_documents(df_combined)))
+
+    # - 1M shows, generated and rendered chunk by chunk (the corpus is never in memory) ----
+    def get_chunks(n_chunks = 20, chunk_rows = 50_000):
+        for i in range(n_chunks):
+            yield get_synthetic_combined(chunk_rows, seed = i)
+
+    results[f"iter_documents, {os.cpu_count()} processes (1M, streamed)"] = measure(lambda: consume(iter_documents(get_chunks())))
+
+    print(pd.DataFrame(results).T)
@@ -0,0 +1,85 @@
+# ==============================================================================
+# STREAMING SCRAPE -> INDEX ----
+# Shows are formatted, turned into documents and upserted into the vector
+# store in micro-batches while the crawl is still running, instead of after
+# the whole DJ has been scraped. Reports how long each show took from being
+# scraped to being searchable.
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# SETUP ----
+# ------------------------------------------------------------------------------
+
+# Import Libraries ----
+import os
+import time
+
+import pandas as pd
+from langchain_core.vectorstores import InMemoryVectorStore
+
+from utilities.streaming_pipeline import stream_to_index
+from utilities.fake_models import get_fake_embeddings
+from utilities.rag_utilities import DATA_DIR
+
+# Settings ----
+# - live: scrape Mixcloud and upsert into the Chroma store the assistant reads
+LIVE = False
+DJ_URL = 'https://www.mixcloud.com/djsprenk'
+
+
+# ------------------------------------------------------------------------------
+# REPLAY (OFFLINE) ----
+# ------------------------------------------------------------------------------
+# - the dev shows replayed at ~1.5s per show page, fake embeddings with API-like latency
+df_djs = pd.read_csv(os.path.join(DATA_DIR, 'dj_info_test.csv'))
+df_sets = pd.read_csv(os.path.join(DATA_DIR, 'dj_shows_test.csv'))
+
+def replay_shows(data, seconds_per_show = 1.5):
+    for record in data.to_dict(orient = 'records'):
+        time.sleep(seconds_per_show)
+        yield record
+
+vectorstore = InMemoryVectorStore(get_fake_embeddings(latency = 0.2))
+
+crawl_start = time.perf_counter()
+batches = []
+for stats in stream_to_index(
+    records        = replay_shows(df_sets),
+    dj_info        = df_djs,
+    vectorstore    = vectorstore,
+    format_records = False,
+    batch_size     = 4,
+    max_wait       = 2.0,
+):
+    stats['searchable_after_crawl_start'] = round(time.perf_counter() - crawl_start, 1)
+    # - already searchable while the crawl continues
+    stats['hits'] = len(vectorstore.similarity_search('zouk', k = 2))
+    batches.append(stats)
+    print(stats)
+
+df_batches = pd.DataFrame(batches)
+print(df_batches[['shows', 'index_seconds', 'latency_seconds', 'searchable_after_crawl_start']].describe())
+
+
+# ------------------------------------------------------------------------------
+# LIVE ----
+# ------------------------------------------------------------------------------
+if LIVE:
+    import yaml
+
+    from utilities.mixcloud_scraper import scrape_mixcloud_stream
+    from utilities.rag_utilities import get_vectorstore, close_vectorstore
+
+    OPENAI_API_KEY = yaml.safe_load(open("credentials.yml"))['openai']
+    chroma = get_vectorstore(os.path.join(DATA_DIR, 'chroma_db'), openai_api_key = OPENAI_API_KEY)
+
+    dj_info, shows = scrape_mixcloud_stream(dj_url = DJ_URL, test_size = 10, scroll_number = 5)
+    for stats in stream_to_index(
+        records     = shows,
+        dj_info     = dj_info,
+        vectorstore = chroma,
+        shows_path  = os.path.join(DATA_DIR, 'pipeline', 'streamed_shows.csv'),
+    ):
+        print(stats)
+
+    close_vectorstore(chroma)
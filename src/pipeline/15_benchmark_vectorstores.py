@@ -0,0 +1,168 @@
+# ==============================================================================
+# VECTORSTORE BACKEND BENCHMARK ----
+# Chroma vs the memory-mapped NumpyVectorStore (float32 / float16 / int8,
+# exact and HNSW) on a synthetic corpus: load time (open + first query),
+# single and batched query latency, resident memory, size on disk and
+# recall@10 against exact float32 search.
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# SETUP ----
+# ------------------------------------------------------------------------------
+
+# Import Libraries ----
+import multiprocessing as mp
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from utilities.numpy_vectorstore import NumpyVectorStore
+from utilities.synthetic_data import get_synthetic_embeddings, get_synthetic_queries
+
+# Settings ----
+N_DOCUMENTS = 100_000
+DIM = 1536
+N_QUERIES = 200
+K = 10
+CHROMA_BATCH_SIZE = 5_000
+
+
+# Synthetic Corpus ----
+def get_corpus(n_documents = N_DOCUMENTS, dim = DIM):
+    vectors, labels = get_synthetic_embeddings(n_documents, dim)
+    metadatas = [{'dj_name': f"dj_{label % 50}", 'bpm_min': int(60 + label % 40)} for label in labels]
+    return vectors, metadatas
+
+
+def get_rss_mb():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1e6
+
+
+def get_dir_mb(path):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names) / 1e6
+
+
+# ------------------------------------------------------------------------------
+# BUILD ----
+# ------------------------------------------------------------------------------
+def build_chroma(path, vectors, metadatas):
+    import chromadb
+
+    client = chromadb.PersistentClient(path = path)
+    collection = client.get_or_create_collection('langchain', metadata = {'hnsw:space': 'cosine'})
+    for start in range(0, len(vectors), CHROMA_BATCH_SIZE):
+        stop = start + CHROMA_BATCH_SIZE
+        collection.add(
+            ids        = [str(i) for i in range(start, min(stop, len(vectors)))],
+            embeddings = vectors[start:stop].tolist(),
+            documents  = [f"show {i}" for i in range(start, min(stop, len(vectors)))],
+            metadatas  = metadatas[start:stop],
+        )
+    client.clear_system_cache()
+
+
+def build_numpy(path, vectors, metadatas, dtype, hnsw = False):
+    store = NumpyVectorStore(embedding = None, dtype = dtype)
+    store.add_vectors(vectors, [f"show {i}" for i in range(len(vectors))], metadatas, [str(i) for i in range(len(vectors))])
+    store.save(path, hnsw = hnsw)
+
+
+# ------------------------------------------------------------------------------
+# MEASURE ----
+# ------------------------------------------------------------------------------
+def open_store(backend, path):
+    if backend == 'chroma':
+        from langchain_community.vectorstores import Chroma
+        return Chroma(persist_directory = path)
+    return NumpyVectorStore.load(path, embedding = None)
+
+
+def measure(backend, path, queries, result):
+    """ Runs in its own process, so resident memory is not shared between backends. """
+    rss_before = get_rss_mb()
+
+    start = time.perf_counter()
+    store = open_store(backend, path)
+    store.similarity_search_by_vector(queries[0].tolist(), k = K)
+    load_seconds = time.perf_counter() - start
+
+    latencies = []
+    ids = []
+    for query in queries:
+        start = time.perf_counter()
+        docs = store.similarity_search_by_vector(query.tolist(), k = K)
+        latencies.append(time.perf_counter() - start)
+        ids.append([doc.page_content for doc in docs])
+
+    start = time.perf_counter()
+    store.similarity_search_by_vector(queries[0].tolist(), k = K, filter = {'dj_name': 'dj_7'})
+    filtered_ms = (time.perf_counter() - start) * 1e3
+
+    batch_ms = None
+    if backend != 'chroma':
+        start = time.perf_counter()
+        store.search_vectors(queries, k = K)
+        batch_ms = (time.perf_counter() - start) * 1e3 / len(queries)
+
+    result.put({
+        'load_ms':            round(load_seconds * 1e3, 1),
+        'query_p50_ms':       round(np.percentile(latencies, 50) * 1e3, 2),
+        'query_p95_ms':       round(np.percentile(latencies, 95) * 1e3, 2),
+        'batched_ms_per_q':   round(batch_ms, 3) if batch_ms is not None else None,
+        'filtered_query_ms':  round(filtered_ms, 2),
+        'rss_mb':             round(get_rss_mb() - rss_before, 1),
+        'disk_mb':            round(get_dir_mb(path), 1),
+        'ids':                ids,
+    })
+
+
+def run(backend, path, queries):
+    result = mp.Queue()
+    process = mp.Process(target = measure, args = (backend, path, queries, result))
+    process.start()
+    stats = result.get()
+    process.join()
+    return stats
+
+
+def get_recall(ids, exact_ids):
+    return float(np.mean([len(set(a) & set(b)) / len(b) for a, b in zip(ids, exact_ids)]))
+
+
+# ------------------------------------------------------------------------------
+# BENCHMARK ----
+# ------------------------------------------------------------------------------
+if __name__ == '__main__':
+    vectors, metadatas = get_corpus()
+    queries = get_synthetic_queries(vectors, N_QUERIES)
+    workdir = tempfile.mkdtemp(prefix = 'vectorstore_benchmark_')
+
+    backends = {
+        'chroma (hnsw)':       ('chroma', lambda path: build_chroma(path, vectors, metadatas)),
+        'numpy float32':       ('numpy', lambda path: build_numpy(path, vectors, metadatas, 'float32')),
+        'numpy float16':       ('numpy', lambda path: build_numpy(path, vectors, metadatas, 'float16')),
+        'numpy int8':          ('numpy', lambda path: build_numpy(path, vectors, metadatas, 'int8')),
+        'numpy float16 hnsw':  ('numpy', lambda path: build_numpy(path, vectors, metadatas, 'float16', hnsw = True)),
+    }
+
+    try:
+        results = {}
+        for i, (label, (backend, build)) in enumerate(backends.items()):
+            path = os.path.join(workdir, str(i))
+            start = time.perf_counter()
+            build(path)
+            build_seconds = time.perf_counter() - start
+            results[label] = {'build_s': round(build_seconds, 1), **run(backend, path, queries)}
+
+        exact_ids = results['numpy float32']['ids']
+        for stats in results.values():
+            stats['recall@10'] = round(get_recall(stats.pop('ids'), exact_ids), 3)
+
+        print(pd.DataFrame(results).T)
+    finally:
+        shutil.rmtree(workdir, ignore_errors = True)
@@ -0,0 +1,89 @@
+# ==============================================================================
+# BATCH RECOMMENDATIONS ----
+# Pushes a few hundred canned questions through the RAG layer at once:
+# batched query embeddings, one vectorised top-k search, answers generated
+# with bounded concurrency and written to a JSON lines file. Reports
+# queries/sec against the same retrieval + packed QA chain answering one
+# question at a time, using the local fake LLM / embeddings.
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# SETUP ----
+# ------------------------------------------------------------------------------
+
+# Import Libraries ----
+import os
+from pprint import pprint
+
+import pandas as pd
+
+from utilities.batch_recommender import load_queries, run_batch_recommendations
+from utilities.fake_models import get_fake_rag_chain
+from utilities.rag_benchmark import BENCHMARK_QUERIES_PATH
+from utilities.rag_utilities import DATA_DIR
+
+# Settings ----
+N_QUERIES = 500
+N_SEQUENTIAL = 50
+LLM_LATENCY = 0.2
+EMBEDDING_LATENCY = 0.05
+# - the fake embeddings carry no meaning, so the cross-encoder re-rank is off
+#   here (set True to include its cost); the artist lookup stays on
+RERANK = False
+OUTPUT_DIR = os.path.join(DATA_DIR, 'batch')
+
+# Queries ----
+# - the labelled benchmark questions, repeated with a suffix so every query is distinct
+base_queries = load_queries(BENCHMARK_QUERIES_PATH)
+queries = [f"{base_queries[i % len(base_queries)]} (#{i})" for i in range(N_QUERIES)]
+
+# Components ----
+fake = get_fake_rag_chain(llm_latency = LLM_LATENCY, embedding_latency = EMBEDDING_LATENCY)
+
+
+# ------------------------------------------------------------------------------
+# ONE AT A TIME ----
+# ------------------------------------------------------------------------------
+# - same retrieval and packed QA chain, one embedding request and one LLM call at a time
+results = {
+    '1 at a time': run_batch_recommendations(
+        queries[:N_SEQUENTIAL],
+        vectorstore          = fake['vectorstore'],
+        embedding_function   = fake['embeddings'],
+        llm                  = fake['llm'],
+        output_path          = os.path.join(OUTPUT_DIR, 'recommendations_sequential.jsonl'),
+        rerank               = RERANK,
+        max_concurrency      = 1,
+        embedding_batch_size = 1,
+    ),
+}
+
+
+# ------------------------------------------------------------------------------
+# BATCH ----
+# ------------------------------------------------------------------------------
+for max_concurrency in [1, 8, 32, 64]:
+    summary = run_batch_recommendations(
+        queries,
+        vectorstore        = fake['vectorstore'],
+        embedding_function = fake['embeddings'],
+        llm                = fake['llm'],
+        output_path        = os.path.join(OUTPUT_DIR, f"recommendations_c{max_concurrency}.jsonl"),
+        rerank             = RERANK,
+        max_concurrency    = max_concurrency,
+    )
+    results[f"batch, concurrency {max_concurrency}"] = summary
+
+# - retrieval only (precomputing candidates, evaluating an index change)
+results['batch, retrieval only'] = run_batch_recommendations(
+    queries,
+    vectorstore        = fake['vectorstore'],
+    embedding_function = fake['embeddings'],
+    llm                = fake['llm'],
+    output_path        = os.path.join(OUTPUT_DIR, 'retrieval.jsonl'),
+    rerank             = RERANK,
+    generate           = False,
+)
+
+pprint(results['batch, concurrency 32'])
+print(pd.DataFrame(results).T[['queries', 'qps', 'retrieval_qps', 'embed_seconds', 'search_seconds', 'rerank_seconds', 'generate_seconds']])
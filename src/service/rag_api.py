@@ -0,0 +1,198 @@
+# ==============================================================================
+# RAG QUERY SERVICE (HTTP API) ----
+# uvicorn src.service.rag_api:app --host 0.0.0.0 --port 8000
+# ==============================================================================
+
+# ------------------------------------------------------------------------------
+# SETUP ----
+# ------------------------------------------------------------------------------
+
+# Import Libraries ----
+import os
+import time
+from collections import defaultdict, deque
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import yaml
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from utilities.rag_utilities import get_rag_components, close_vectorstore, get_vectorstore_stats
+from utilities.rag_serving import RagRequestServer
+from utilities.reranker import get_rerank_stats
+from utilities.session_store import SessionHistoryStore
+
+# Settings ----
+MAX_CONCURRENCY = int(os.environ.get('RAG_MAX_CONCURRENCY', 8))
+MAX_QUEUE_SIZE = int(os.environ.get('RAG_MAX_QUEUE_SIZE', 100))
+SESSION_TTL_SECONDS = int(os.environ.get('RAG_SESSION_TTL_SECONDS', 1800))
+# - documents the retriever returns after re-ranking: the most /search can serve
+RERANK_TOP_N = int(os.environ.get('RAG_RERANK_TOP_N', 4))
+
+
+def get_openai_api_key(credentials_path = 'credentials.yml'):
+    if os.environ.get('OPENAI_API_KEY'):
+        return os.environ['OPENAI_API_KEY']
+    return yaml.safe_load(open(credentials_path))['openai']
+
+
+# ------------------------------------------------------------------------------
+# LATENCY METRICS ----
+# ------------------------------------------------------------------------------
+LATENCIES = defaultdict(lambda: deque(maxlen = 1000))
+
+
+def record_latency(endpoint, start):
+    LATENCIES[endpoint].append((time.perf_counter() - start) * 1000)
+
+
+def get_latency_summary():
+    summary = {}
+    for endpoint, values in LATENCIES.items():
+        values = sorted(values)
+        summary[endpoint] = {
+            'count':   len(values),
+            'mean_ms': round(sum(values) / len(values), 1),
+            'p50_ms':  round(values[len(values) // 2], 1),
+            'p95_ms':  round(values[min(len(values) - 1, int(len(values) * 0.95))], 1),
+        }
+    return summary
+
+
+# ------------------------------------------------------------------------------
+# APP ----
+# ------------------------------------------------------------------------------
+
+# Lifespan: load the vectorstore + chain once, before serving ----
+RESOURCES = {}
+
+
+@asynccontextmanager
+async def lifespan(app):
+    components = get_rag_components(openai_api_key = get_openai_api_key(), rerank_top_n = RERANK_TOP_N)
+
+    RESOURCES['components'] = components
+    RESOURCES['server'] = await RagRequestServer(
+        components['chain'],
+        max_concurrency = MAX_CONCURRENCY,
+        max_queue_size  = MAX_QUEUE_SIZE,
+    ).start()
+    RESOURCES['sessions'] = SessionHistoryStore(ttl_seconds = SESSION_TTL_SECONDS)
+
+    yield
+
+    await RESOURCES['server'].stop()
+    close_vectorstore(components['vectorstore'])
+
+
+app = FastAPI(title = "Zouk Set Recommender RAG Service", lifespan = lifespan)
+
+
+# Schemas ----
+class RecommendRequest(BaseModel):
+    query: str
+    session_id: Optional[str] = None
+    stream: bool = False
+
+
+class SearchRequest(BaseModel):
+    query: str
+    k: int = Field(default = min(4, RERANK_TOP_N), ge = 1, le = RERANK_TOP_N)
+
+
+# Endpoints ----
+@app.post("/recommend")
+async def recommend(request: RecommendRequest):
+    start = time.perf_counter()
+    server = RESOURCES['server']
+    sessions = RESOURCES['sessions']
+
+    session_id, history = sessions.get(request.session_id)
+    inputs = {"input": request.query, "chat_history": list(history.messages)}
+
+    try:
+        if request.stream:
+            # - enqueue and wait for the first chunk before sending the 200 headers, so a
+            #   full queue or a failing chain is still reported as a 503
+            chunks = server.stream(inputs, output_key = "answer")
+            try:
+                first_chunk = await chunks.__anext__()
+            except StopAsyncIteration:
+                first_chunk = None
+
+            async def stream_answer():
+                answer = []
+                try:
+                    if first_chunk is not None:
+                        answer.append(first_chunk)
+                        yield first_chunk
+                    async for chunk in chunks:
+                        answer.append(chunk)
+                        yield chunk
+                except Exception as e:
+                    yield f"\n\n[error: the answer was interrupted ({type(e).__name__}), please retry]"
+                    return
+                finally:
+                    await chunks.aclose()
+                sessions.add_turn(session_id, request.query, ''.join(answer))
+                record_latency('/recommend (stream)', start)
+
+            return StreamingResponse(
+                stream_answer(),
+                media_type = "text/plain",
+                headers    = {"X-Session-Id": session_id},
+            )
+
+        response = await server.submit(inputs)
+
+    except Exception as e:
+        raise HTTPException(status_code = 503, detail = f"Request not served: {e!r}")
+
+    sessions.add_turn(session_id, request.query, response['answer'])
+    record_latency('/recommend', start)
+
+    return {
+        "session_id": session_id,
+        "answer":     response['answer'],
+        "show_urls":  [doc.metadata.get('show_url') for doc in response.get('context', [])],
+    }
+
+
+@app.post("/search")
+async def search(request: SearchRequest):
+    start = time.perf_counter()
+    retriever = RESOURCES['components']['retriever']
+
+    documents = (await retriever.ainvoke(request.query))[:request.k]
+
+    record_latency('/search', start)
+
+    return {
+        "results": [
+            {
+                "dj_name":         doc.metadata.get('dj_name'),
+                "title":           doc.metadata.get('show_title') or doc.metadata.get('title'),
+                "show_url":        doc.metadata.get('show_url'),
+                "relevance_score": doc.metadata.get('relevance_score'),
+            }
+            for doc in documents
+        ]
+    }
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok" if 'server' in RESOURCES else "loading"}
+
+
+@app.get("/metrics")
+async def metrics():
+    return {
+        "latency":     get_latency_summary(),
+        "serving":     RESOURCES['server'].get_stats(),
+        "sessions":    len(RESOURCES['sessions']),
+        "vectorstore": get_vectorstore_stats(),
+        "rerank":      get_rerank_stats(),
+    }
@@ -0,0 +1,8 @@
+
+# Imports ----
+import os
+import sys
+
+# - the app and utilities import each other as `src.` / `utilities.` from the project root
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, PROJECT_ROOT)
@@ -0,0 +1,59 @@
+
+# Imports ----
+import os
+
+import httpx
+import pytest
+from streamlit.testing.v1 import AppTest
+
+from tests.conftest import PROJECT_ROOT
+
+
+# Paths ----
+HOME_PAGE = os.path.join(PROJECT_ROOT, 'src', 'app', 'app_tab_0.py')
+
+
+# Helpers ----
+def run_home_page(active_tab):
+    app = AppTest.from_file(HOME_PAGE, default_timeout = 120)
+    app.session_state.active_tab = active_tab
+    return app.run()
+
+
+# Tests ----
+def test_welcome_page_opens(monkeypatch):
+    monkeypatch.chdir(PROJECT_ROOT)
+    app = run_home_page(None)
+    assert not app.exception
+
+
+def test_preference_tab_opens(monkeypatch):
+    monkeypatch.chdir(PROJECT_ROOT)
+    app = run_home_page('decide_preference')
+    assert not app.exception
+    assert app.title
+
+
+def test_ai_tab_opens(monkeypatch, tmp_path):
+    # - thin client of the RAG query service, so no OpenAI key or vectorstore is needed
+    (tmp_path / 'credentials.yml').write_text("openai: test-key\n")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('RAG_SERVICE_URL', 'http://rag-service.test')
+    monkeypatch.setattr(httpx, 'get', lambda url, **kwargs: httpx.Response(200, json = {}, request = httpx.Request('GET', url)))
+
+    app = run_home_page('ai_recommend')
+    assert not app.exception
+    assert [title.value for title in app.title] == ["🎧🤖 AI Zouk Music Assistant"]
+
+
+def test_results_back_to_first_page_on_sort_change(monkeypatch):
+    monkeypatch.chdir(PROJECT_ROOT)
+    app = run_home_page('decide_preference')
+    app.selectbox(key = 'page_size_select').select(10).run()
+    next(button for button in app.button if button.label == "🔎 Apply Filters").click().run()
+
+    app.number_input(key = 'your_picks_page').set_value(2).run()
+    app.selectbox(key = 'sort_by_select').select_index(1).run()
+
+    assert not app.exception
+    assert app.number_input(key = 'your_picks_page').value == 1
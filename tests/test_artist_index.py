@@ -0,0 +1,30 @@
+
+# Imports ----
+from utilities.artist_index import ArtistIndex, get_artist_retriever
+
+
+# Fixtures ----
+def get_index():
+    return ArtistIndex([['Her', 'Chris Brown'], ['H.E.R'], ['Nelly'], ['Kizomba Brasil']])
+
+
+# Tests ----
+def test_common_word_artist_not_matched_in_a_question_with_her():
+    assert get_index().find_in_text("Something for her birthday, she loves slow sets") == []
+
+
+def test_common_word_artist_matched_when_quoted_or_stylised():
+    index = get_index()
+    assert index.find_in_text('Any sets with "Her" in them?') == ['Her']
+    assert index.find_in_text("Sets playing H.E.R please") == ['Her']
+
+
+def test_other_artists_matched_in_any_case():
+    assert get_index().find_in_text("chris brown or NELLY for her party") == ['Chris Brown', 'Nelly']
+
+
+def test_artist_retriever_ignores_her():
+    documents = ["show 0", "show 1", "show 2", "show 3"]
+    retriever = get_artist_retriever(get_index(), documents)
+    assert retriever.invoke("a chill set for her birthday") == []
+    assert retriever.invoke("a chill set with Nelly") == ["show 2"]
@@ -0,0 +1,20 @@
+
+# Imports ----
+import numpy as np
+
+from utilities.energy_arc import get_energy_arc
+
+
+# Tests ----
+def test_word_chapters_give_levels_not_bpms():
+    arc = get_energy_arc("Energy 3-8 | 70-79 BPM", ("Chapters: slow > groovy > hype",))
+
+    assert arc['arc_builds']
+    assert arc['arc_start_level'] < arc['arc_end_level']
+    assert np.isnan(arc['arc_start_bpm']) and np.isnan(arc['arc_end_bpm'])
+
+
+def test_stated_chapter_bpms_are_kept():
+    arc = get_energy_arc("Energy 3-8 | 70-90 BPM", ("Chapters: slow (70 BPM) > groove > hype (86-90 BPM)",))
+
+    assert (arc['arc_start_bpm'], arc['arc_end_bpm']) == (70.0, 88.0)
@@ -0,0 +1,33 @@
+
+# Imports ----
+import numpy as np
+import pytest
+
+from utilities.numpy_vectorstore import NumpyVectorStore
+from utilities.product_quantizer import ProductQuantizer
+
+
+# Fixtures ----
+def get_vectors(n_rows, dim = 16, seed = 0):
+    return np.random.default_rng(seed).normal(size = (n_rows, dim)).astype(np.float32)
+
+
+# Tests ----
+def test_pq_store_needs_explicit_fit():
+    store = NumpyVectorStore(embedding = None, dtype = 'pq', pq_subspaces = 4)
+    with pytest.raises(ValueError, match = 'fit_pq'):
+        store.add_vectors(get_vectors(300), [f"show {i}" for i in range(300)])
+
+
+def test_pq_fit_needs_n_centroids_vectors():
+    with pytest.raises(ValueError, match = 'n_centroids'):
+        ProductQuantizer(n_subspaces = 4).fit(get_vectors(100))
+
+
+def test_pq_store_searches_after_fit():
+    vectors = get_vectors(300)
+    store = NumpyVectorStore(embedding = None, dtype = 'pq', pq_subspaces = 4, rescore = True).fit_pq(vectors)
+    store.add_vectors(vectors, [f"show {i}" for i in range(300)])
+
+    rows, _ = store.search_vectors(vectors[:5], k = 1)
+    assert [row[0] for row in rows] == [0, 1, 2, 3, 4]
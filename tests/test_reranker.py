@@ -0,0 +1,24 @@
+
+# Imports ----
+from langchain_core.documents import Document
+
+from utilities.reranker import rerank_documents
+
+
+# Fixtures ----
+class LengthCrossEncoder:
+    """ Scores a (query, text) pair by the text length. """
+
+    def predict(self, pairs, **kwargs):
+        return [float(len(text)) for _, text in pairs]
+
+
+# Tests ----
+def test_rerank_leaves_shared_candidates_untouched():
+    candidates = [Document(page_content = "a" * n, metadata = {'show_url': f"url {n}"}, id = str(n)) for n in (1, 3, 2)]
+
+    results = rerank_documents("query", candidates, cross_encoder = LengthCrossEncoder(), top_n = 2)
+
+    assert [doc.id for doc in results] == ['3', '2']
+    assert [doc.metadata['relevance_score'] for doc in results] == [3.0, 2.0]
+    assert all('relevance_score' not in doc.metadata for doc in candidates)
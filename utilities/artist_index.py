@@ -0,0 +1,286 @@
+
+# Imports ----
+import re
+import unicodedata
+from collections import Counter
+
+import numpy as np
+
+
+# Parsing ----
+ARTIST_SEPARATORS = re.compile(r"\s*(?:,|\bfeat\b\.?|\bft\b\.?|\bfeaturing\b|\s&\s|\sx\s)\s*", flags = re.IGNORECASE)
+
+# - "1. Artist - Title", "Artist – Title" lines of a track list
+TRACK_LINE = re.compile(r"^\s*(?:\d{1,3}[\.\)]\s*)?(?P<artist>[^\n]{1,80}?)\s+[-–—]\s+(?P<title>[^\n]{1,120})\s*$")
+
+# - "quoted" / 'quoted' phrases of a question
+QUOTED_PHRASE = re.compile(r"(?<!\w)[\"“'‘]([^\"”'’\n]+)[\"”'’](?!\w)")
+
+# - artist names that are also everyday words ("Her", "Jones" is fine): in free text
+#   they only count when quoted or written in the artist's stylised spelling ("H.E.R")
+COMMON_WORDS = frozenset("""
+    a about after again all also always am an and another any are around as at away back be because been before
+    being best big both but by can come could day did do does down each easy even ever every feel for free from
+    fun get give go going good got great had happy has have he her here hers high him his home hot how i if in
+    into is it its just keep kind last let life like little live long look lost love low made make many me mine
+    more most much my never new next night no not now of off old on once one only or other our out over party
+    play please real right same say see set she show slow so some soul still summer sun sunday take than that the
+    their them then there these they thing this those time to today too two up us very want was way we well were
+    what when where which while who why will with without would yes you young your
+""".split())
+
+
+def normalize_artist_name(name):
+    """ Lookup key for an artist: accents, case and punctuation removed ('Naïka' -> 'naika', 'H.E.R' -> 'her'). """
+    name = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode('ascii')
+    name = re.sub(r"[^\w\s&]", '', name.lower())
+    return re.sub(r"\s+", ' ', name).strip()
+
+
+def split_artist_credits(credit):
+    """ 'Chris Brown feat. Davido & Lojay' -> ['Chris Brown', 'Davido', 'Lojay'] """
+    credit = credit.replace('(', ' ').replace(')', ' ')
+    names = [name.strip(' -–') for name in ARTIST_SEPARATORS.split(credit)]
+    return [name for name in names if normalize_artist_name(name)]
+
+
+def get_artists(artists_list):
+    """ Artists named in Mixcloud's 'Playing tracks by A, B feat. C and more.' text (deduplicated). """
+    if not isinstance(artists_list, str):
+        return []
+
+    text = re.sub(r"^\s*playing tracks by\s*", '', artists_list, flags = re.IGNORECASE)
+    text = re.sub(r"\s*and more\.?\s*$", '', text, flags = re.IGNORECASE).rstrip('.')
+
+    return dedupe_artists(split_artist_credits(text))
+
+
+def get_track_list(text):
+    """ Tracks ('Artist - Title' lines) in a show description, when it has a track list.
+
+    Returns:
+        list[dict]: [{'artist': str, 'title': str}, ...]
+    """
+    if not isinstance(text, str):
+        return []
+
+    tracks = []
+    for line in text.splitlines():
+        match = TRACK_LINE.match(line)
+        if match:
+            tracks.append({'artist': match['artist'].strip(), 'title': match['title'].strip()})
+
+    # - a single dash line is prose more often than a track list
+    return tracks if len(tracks) >= 3 else []
+
+
+def dedupe_artists(names):
+    seen, artists = set(), []
+    for name in names:
+        key = normalize_artist_name(name)
+        if key not in seen:
+            seen.add(key)
+            artists.append(name)
+    return artists
+
+
+def get_show_artists(data, info_columns = ('show_info2', 'show_info3', 'show_info4')):
+    """ Artists per show from artists_list plus any track list in the show descriptions.
+
+    Returns:
+        tuple: (artists per show as lists, track lists per show).
+    """
+    records = data.to_dict(orient = 'records')
+    track_lists = [
+        [track for col in info_columns for track in get_track_list(row.get(col))] for row in records
+    ]
+    artists = [
+        dedupe_artists(
+            get_artists(row.get('artists_list'))
+            + [name for track in tracks for name in split_artist_credits(track['artist'])]
+        )
+        for row, tracks in zip(records, track_lists)
+    ]
+    return artists, track_lists
+
+
+# Artist Index ----
+class ArtistIndex:
+    """ Inverted index from normalised artist names to the rows of the shows featuring them.
+
+    Built once from the per-row artist lists (or the CSR arrays of a
+    CompactCatalog). Looking up an artist is a dict access returning a sorted
+    row id array, so "sets featuring Chris Brown" needs no retrieval model.
+
+    Args:
+        artist_lists (list[list[str]]): Artists per row; non-list entries count as none.
+    """
+
+    def __init__(self, artist_lists):
+        artist_lists = [artists if isinstance(artists, list) else [] for artists in artist_lists]
+        self.n_rows = len(artist_lists)
+
+        rows_per_key = {}
+        names_per_key = {}
+        for row, artists in enumerate(artist_lists):
+            for name in artists:
+                key = normalize_artist_name(name)
+                rows_per_key.setdefault(key, []).append(row)
+                names_per_key.setdefault(key, Counter())[name] += 1
+
+        self._build(rows_per_key, names_per_key)
+
+    @classmethod
+    def from_csr(cls, offsets, codes, vocab):
+        """ Build from CSR artist arrays (row i's artists are vocab[codes[offsets[i]:offsets[i + 1]]]). """
+        index = cls.__new__(cls)
+        index.n_rows = len(offsets) - 1
+
+        row_ids = np.repeat(np.arange(index.n_rows, dtype = np.int64), np.diff(offsets))
+        order = np.argsort(codes, kind = 'stable')
+        boundaries = np.cumsum(np.bincount(codes, minlength = len(vocab)))[:-1]
+
+        rows_per_key, names_per_key = {}, {}
+        for name, rows in zip(vocab, np.split(row_ids[order], boundaries) if len(vocab) else []):
+            key = normalize_artist_name(name)
+            rows_per_key.setdefault(key, []).extend(rows.tolist())
+            names_per_key.setdefault(key, Counter())[name] += len(rows)
+
+        index._build(rows_per_key, names_per_key)
+        return index
+
+    def _build(self, rows_per_key, names_per_key):
+        self.rows = {key: np.unique(np.asarray(rows, dtype = np.int64)) for key, rows in rows_per_key.items()}
+        self.mentions = {key: len(rows) for key, rows in rows_per_key.items()}
+
+        # - display name: the most common spelling
+        self.names = {key: names.most_common(1)[0][0] for key, names in names_per_key.items()}
+        self.keys = {name: key for key, name in self.names.items()}
+
+        # - stylised spellings ('H.E.R', 'HER'), which plain text wouldn't produce
+        self.stylised_names = {
+            key: [name for name in names if name not in (name.lower(), name.capitalize())]
+            for key, names in names_per_key.items()
+        }
+
+    # Lookups ----
+    def get_rows(self, artist):
+        """ Sorted rows of the shows featuring `artist` (any spelling / case). """
+        return self.rows.get(normalize_artist_name(artist), np.empty(0, dtype = np.int64))
+
+    def get_mask(self, artists):
+        """ Rows featuring any of `artists`. """
+        mask = np.zeros(self.n_rows, dtype = bool)
+        for artist in artists:
+            mask[self.get_rows(artist)] = True
+        return mask
+
+    def get_show_count(self, artist):
+        return len(self.get_rows(artist))
+
+    def search(self, text):
+        """ Artists whose name contains `text` (normalised), most featured first. """
+        text = normalize_artist_name(text)
+        keys = [key for key in self.rows if text in key]
+        return [self.names[key] for key in sorted(keys, key = lambda key: -len(self.rows[key]))]
+
+    def find_in_text(self, text, min_length = 3):
+        """ Artists mentioned by name in free text (e.g. a chat question).
+
+        Names that are everyday words (COMMON_WORDS, e.g. the artist "Her" in
+        "something for her birthday") only match when quoted or written in
+        the artist's stylised spelling ('"her"', 'H.E.R').
+        """
+        normalized = f" {normalize_artist_name(text)} "
+        quoted = {normalize_artist_name(phrase) for phrase in QUOTED_PHRASE.findall(str(text))}
+
+        found = []
+        for key in self.rows:
+            if len(key) < min_length or f" {key} " not in normalized:
+                continue
+            if key in COMMON_WORDS and key not in quoted and not self._is_written_stylised(key, text):
+                continue
+            found.append(self.names[key])
+        return found
+
+    def _is_written_stylised(self, key, text):
+        return any(
+            re.search(rf"(?<!\w){re.escape(name)}(?!\w)", str(text)) is not None
+            for name in self.stylised_names.get(key, [])
+        )
+
+    # Multiselect ----
+    def get_artist_options(self):
+        """ Display names sorted alphabetically. """
+        return sorted(self.names.values(), key = str.lower)
+
+    def format_artist_option(self, artist):
+        """ Multiselect label with the number of sets featuring the artist. """
+        return f"{artist} ({self.get_show_count(artist):,})"
+
+    def get_top_artists(self, n = 20):
+        """ [(artist, shows, mentions), ...] for the most featured artists. """
+        keys = sorted(self.rows, key = lambda key: -len(self.rows[key]))[:n]
+        return [(self.names[key], len(self.rows[key]), self.mentions[key]) for key in keys]
+
+
+# Retrieval ----
+def get_artist_retriever(artist_index, documents, max_documents = 10):
+    """ Retriever returning the shows featuring the artists named in the query.
+
+    A Runnable[str, list[Document]]; `documents` must be aligned with the rows
+    of `artist_index` (one document per show).
+    """
+    from langchain_core.runnables import RunnableLambda
+
+    def retrieve(query):
+        rows = [row for artist in artist_index.find_in_text(query) for row in artist_index.get_rows(artist)]
+        rows = list(dict.fromkeys(rows))[:max_documents]
+        return [documents[row] for row in rows]
+
+    return RunnableLambda(retrieve).with_config(run_name = 'artist_retriever')
+
+
+def get_artist_aware_retriever(retriever, artist_index, documents, max_documents = 10):
+    """ Shows featuring artists named in the query first, then `retriever`'s results (deduplicated by show_url). """
+    from langchain_core.runnables import RunnableLambda
+
+    artist_retriever = get_artist_retriever(artist_index, documents, max_documents)
+
+    def retrieve(query):
+        seen, results = set(), []
+        for doc in artist_retriever.invoke(query) + retriever.invoke(query):
+            url = doc.metadata.get('show_url')
+            if url not in seen:
+                seen.add(url)
+                results.append(doc)
+        return results
+
+    return RunnableLambda(retrieve).with_config(run_name = 'artist_aware_retriever')
+
+
+def get_artist_lookup_tool(artist_index, data):
+    """ LangChain tool: 'which sets feature <artist>?' answered from the index.
+
+    Args:
+        artist_index (ArtistIndex): Index over the rows of `data`.
+        data (pd.DataFrame): Shows (name, title, show_url) aligned with the index.
+    """
+    from langchain_core.tools import Tool
+
+    def lookup(artist):
+        rows = artist_index.get_rows(artist)
+        if len(rows) == 0:
+            matches = artist_index.search(artist)[:5]
+            return f"No sets found for '{artist}'." + (f" Did you mean: {', '.join(matches)}?" if matches else '')
+
+        shows = data.iloc[rows]
+        return '\n'.join(
+            f"- {row['name']} - {row['title']}: {row['show_url']}" for row in shows.to_dict(orient = 'records')
+        )
+
+    return Tool.from_function(
+        func        = lookup,
+        name        = 'artist_lookup',
+        description = 'Find the DJ sets that feature a given artist. Input: the artist name.',
+    )
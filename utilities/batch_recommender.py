@@ -0,0 +1,276 @@
+
+# Imports ----
+import asyncio
+import json
+import os
+import time
+
+import numpy as np
+
+from utilities.context_packer import create_packed_documents_chain
+from utilities.document_builder import iter_batches
+from utilities.numpy_vectorstore import NumpyVectorStore
+from utilities.rag_utilities import DATA_DIR, get_qa_prompt, get_artist_lookup
+from utilities.reranker import rerank_documents, get_cross_encoder
+from utilities.popularity_features import POPULARITY_FEATURES_PATH, get_popularity_boosts, load_popularity_features
+
+
+# Defaults ----
+EMBEDDING_BATCH_SIZE = 500
+MAX_CONCURRENCY = 8
+
+
+# Queries ----
+def load_queries(path):
+    """ Queries from a .txt (one per line), .json (strings or {'query': ...}) or .csv ('query' column) file. """
+    if path.endswith('.json'):
+        with open(path) as f:
+            items = json.load(f)
+        return [item['query'] if isinstance(item, dict) else item for item in items]
+
+    if path.endswith('.csv'):
+        import pandas as pd
+        return pd.read_csv(path)['query'].dropna().astype(str).tolist()
+
+    with open(path) as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+# Batched Retrieval ----
+def get_search_index(vectorstore, dtype = 'float32'):
+    """ A NumpyVectorStore over the same vectors, for one vectorised search per batch.
+
+    NumpyVectorStores are used as is; InMemoryVectorStore and Chroma stores are
+    copied once (float32 by default, so results match their own search).
+    """
+    if isinstance(vectorstore, NumpyVectorStore):
+        return vectorstore
+
+    index = NumpyVectorStore(vectorstore.embeddings, dtype = dtype)
+    if hasattr(vectorstore, 'store'):
+        items = list(vectorstore.store.values())
+        index.add_vectors(
+            np.asarray([item['vector'] for item in items], dtype = np.float32),
+            texts     = [item['text'] for item in items],
+            metadatas = [item['metadata'] for item in items],
+            ids       = [item['id'] for item in items],
+        )
+        return index
+
+    return NumpyVectorStore.from_chroma(vectorstore, dtype = dtype)
+
+
+def search_batch(index, embedding_function, queries, k = 4, filter = None, batch_size = EMBEDDING_BATCH_SIZE):
+    """ Top-k documents by similarity for every query: one embedding request and one top-k search per batch.
+
+    Args:
+        index (NumpyVectorStore): Search index (see get_search_index).
+        embedding_function (Embeddings): Query embedding function.
+        queries (list[str]): Questions.
+        k (int, optional): Documents per query. Defaults to 4.
+        filter (dict, optional): Chroma-style metadata filter. Defaults to none.
+        batch_size (int, optional): Queries per embedding request. Defaults to 500.
+
+    Returns:
+        tuple: (documents per query, {'embed_seconds', 'search_seconds'}).
+    """
+    results = []
+    timings = {'embed_seconds': 0.0, 'search_seconds': 0.0}
+
+    for batch in iter_batches(queries, batch_size):
+        start = time.perf_counter()
+        query_vectors = embedding_function.embed_documents(batch)
+        timings['embed_seconds'] += time.perf_counter() - start
+
+        start = time.perf_counter()
+        results.extend(index.batch_similarity_search_by_vector(query_vectors, k = k, filter = filter))
+        timings['search_seconds'] += time.perf_counter() - start
+
+    return results, timings
+
+
+def retrieve_batch(
+    index,
+    embedding_function,
+    queries,
+    k                    = 4,
+    filter               = None,
+    rerank               = True,
+    rerank_fetch_k       = 50,
+    popularity_weight    = 0.0,
+    artist_retriever     = None,
+    data_dir             = DATA_DIR,
+    embedding_batch_size = EMBEDDING_BATCH_SIZE,
+):
+    """ The chat retriever's documents for every query, with the similarity search batched.
+
+    Same steps as get_rag_components (whole-show index): `rerank_fetch_k`
+    candidates by similarity, shows featuring artists named in the query
+    merged in front, then the cross-encoder re-rank (with the popularity
+    boost, from the popularity features in `data_dir`) down to `k`. With
+    rerank = False and no artist retriever it is a raw similarity top-k.
+
+    Returns:
+        tuple: (documents per query, {'embed_seconds', 'search_seconds', 'rerank_seconds'}).
+    """
+    fetch_k = rerank_fetch_k if rerank else k
+    candidates, timings = search_batch(index, embedding_function, queries, k = fetch_k, filter = filter, batch_size = embedding_batch_size)
+
+    start = time.perf_counter()
+    popularity = None
+    if rerank and popularity_weight:
+        features = load_popularity_features(os.path.join(data_dir, os.path.basename(POPULARITY_FEATURES_PATH)))
+        popularity = get_popularity_boosts(features) if features is not None else {}
+    cross_encoder = get_cross_encoder() if rerank else None
+
+    documents = []
+    for query, query_candidates in zip(queries, candidates):
+        if artist_retriever is not None:
+            seen, merged = set(), []
+            for doc in artist_retriever.invoke(query) + query_candidates:
+                url = doc.metadata.get('show_url')
+                if url not in seen:
+                    seen.add(url)
+                    merged.append(doc)
+            query_candidates = merged
+
+        if rerank:
+            query_candidates = rerank_documents(
+                query,
+                query_candidates,
+                cross_encoder     = cross_encoder,
+                top_n             = k,
+                popularity        = popularity,
+                popularity_weight = popularity_weight,
+            )
+        documents.append(query_candidates)
+
+    timings['rerank_seconds'] = time.perf_counter() - start
+    return documents, timings
+
+
+# Batched Recommendations ----
+async def arun_batch_recommendations(
+    queries,
+    vectorstore,
+    embedding_function,
+    llm,
+    output_path,
+    k                    = 4,
+    filter               = None,
+    rerank               = True,
+    rerank_fetch_k       = 50,
+    popularity_weight    = 0.0,
+    artist_lookup        = True,
+    data_dir             = DATA_DIR,
+    max_concurrency      = MAX_CONCURRENCY,
+    max_context_tokens   = 1500,
+    model                = 'gpt-4o-mini',
+    generate             = True,
+    embedding_batch_size = EMBEDDING_BATCH_SIZE,
+):
+    """ Answer many standalone questions: batched retrieval, bounded concurrent generation.
+
+    Retrieval matches the chat tab's retriever over the whole-show index
+    (see retrieve_batch: similarity candidates, artist lookup, cross-encoder
+    re-rank and popularity boost), with the queries embedded in batched
+    requests and searched with one vectorised top-k per batch. The chunked
+    parent-document index is not used: pass the whole-show vectorstore.
+    Answers are then generated with the assistant's QA prompt and packed
+    context, at most `max_concurrency` LLM calls at a time. There is no chat
+    history, so the question rewrite step is skipped. Each result is appended
+    to `output_path` (JSON lines, in completion order, with the query index)
+    as soon as it is done; a failed generation is recorded, not raised.
+
+    Args:
+        queries (list[str]): Questions.
+        vectorstore (VectorStore): NumpyVectorStore, Chroma or InMemoryVectorStore.
+        embedding_function (Embeddings): Query embedding function.
+        llm (BaseChatModel): Chat model.
+        output_path (str): JSON lines file the results are written to (overwritten).
+        k (int, optional): Documents per query (rerank_top_n). Defaults to 4.
+        filter (dict, optional): Chroma-style metadata filter. Defaults to none.
+        rerank (bool, optional): Re-rank rerank_fetch_k candidates with the cross-encoder;
+            False is a raw similarity top-k. Defaults to True.
+        rerank_fetch_k (int, optional): Candidates fetched before re-ranking. Defaults to 50.
+        popularity_weight (float, optional): Popularity boost in the re-rank. Defaults to 0.
+        artist_lookup (bool, optional): Merge in the shows featuring artists named in the
+            question (from the csv files in `data_dir`). Defaults to True.
+        data_dir (str, optional): Folder with the DJ info / DJ shows csv files and the popularity
+            features. Defaults to data/dev.
+        max_concurrency (int, optional): LLM calls in flight. Defaults to 8.
+        max_context_tokens (int, optional): Token budget for the packed context. Defaults to 1500.
+        model (str, optional): Model name used to count tokens. Defaults to 'gpt-4o-mini'.
+        generate (bool, optional): Generate answers; False writes retrieval results only. Defaults to True.
+        embedding_batch_size (int, optional): Queries per embedding request. Defaults to 500.
+
+    Returns:
+        dict: Counts, stage timings and queries/sec for retrieval and end to end.
+    """
+    start = time.perf_counter()
+    queries = list(queries)
+
+    index = get_search_index(vectorstore)
+    documents, timings = retrieve_batch(
+        index,
+        embedding_function,
+        queries,
+        k                    = k,
+        filter               = filter,
+        rerank               = rerank,
+        rerank_fetch_k       = rerank_fetch_k,
+        popularity_weight    = popularity_weight,
+        artist_retriever     = get_artist_lookup(data_dir) if artist_lookup else None,
+        data_dir             = data_dir,
+        embedding_batch_size = embedding_batch_size,
+    )
+    retrieval_seconds = time.perf_counter() - start
+
+    qa_chain = create_packed_documents_chain(llm, get_qa_prompt(), max_tokens = max_context_tokens, model = model)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def answer(i):
+        record = {
+            'index':     i,
+            'query':     queries[i],
+            'show_urls': [doc.metadata.get('show_url') for doc in documents[i]],
+        }
+        if not generate:
+            return record
+        async with semaphore:
+            generate_start = time.perf_counter()
+            try:
+                record['answer'] = await qa_chain.ainvoke({'input': queries[i], 'chat_history': [], 'context': documents[i]})
+            except Exception as e:
+                record['error'] = repr(e)
+            record['generate_seconds'] = round(time.perf_counter() - generate_start, 3)
+        return record
+
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok = True)
+    errors = 0
+    generate_start = time.perf_counter()
+    with open(output_path, 'w') as f:
+        for task in asyncio.as_completed([answer(i) for i in range(len(queries))]):
+            record = await task
+            errors += 'error' in record
+            f.write(json.dumps(record, default = str) + '\n')
+    generate_seconds = time.perf_counter() - generate_start
+
+    total_seconds = time.perf_counter() - start
+    return {
+        'queries':           len(queries),
+        'errors':            errors,
+        'embed_seconds':     round(timings['embed_seconds'], 3),
+        'search_seconds':    round(timings['search_seconds'], 3),
+        'rerank_seconds':    round(timings['rerank_seconds'], 3),
+        'generate_seconds':  round(generate_seconds, 3),
+        'total_seconds':     round(total_seconds, 3),
+        'retrieval_qps':     round(len(queries) / retrieval_seconds, 1) if retrieval_seconds else None,
+        'qps':               round(len(queries) / total_seconds, 1) if total_seconds else None,
+        'output_path':       output_path,
+    }
+
+
+def run_batch_recommendations(*args, **kwargs):
+    """ Synchronous arun_batch_recommendations (not for use inside a running event loop). """
+    return asyncio.run(arun_batch_recommendations(*args, **kwargs))
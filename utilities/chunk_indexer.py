@@ -0,0 +1,197 @@
+
+# Imports ----
+import hashlib
+import os
+import re
+
+from langchain.docstore.document import Document
+from langchain.retrievers.multi_vector import MultiVectorRetriever
+from langchain.storage import LocalFileStore, create_kv_docstore
+from langchain_community.vectorstores import Chroma
+from langchain_core.runnables import RunnableLambda
+from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+
+# Defaults ----
+ID_KEY = 'doc_id'
+CHUNK_SIZE = 500
+CHUNK_OVERLAP = 50
+
+# - child chunks matched per parent show wanted (several chunks of one show often match)
+CHUNKS_PER_PARENT = 4
+
+# - metadata copied onto every child vector (chroma only accepts scalars)
+CHILD_METADATA_FIELDS = ['dj_name', 'show_url']
+
+
+# Helpers ----
+def get_parent_id(item):
+    """ Stable parent id for a show (file-store safe hash of its show_url). """
+    return hashlib.md5(str(item.get('show_url')).encode('utf-8')).hexdigest()
+
+
+def get_show_info_sections(show_info_combined):
+    """ Split show_info_combined back into its show_info_N sections.
+
+    Returns:
+        dict: {'show_info_1': text, ...}, skipping sections with no info.
+    """
+    if not isinstance(show_info_combined, str):
+        return {}
+
+    sections = re.findall(
+        r'(show_info_\d):\n(.*?)(?=\n\nshow_info_\d:|\Z)',
+        show_info_combined,
+        flags = re.DOTALL,
+    )
+
+    return {
+        name: text.strip()
+        for name, text in sections
+        if text.strip() and text.strip() != 'no info'
+    }
+
+
+# Chunking ----
+def get_show_chunks(item, chunk_size = CHUNK_SIZE, chunk_overlap = CHUNK_OVERLAP):
+    """ Split one merged show record into small child documents.
+
+    Each field group (summary, DJ bio, artists, each show info section) is
+    embedded on its own so specific content such as a chapter list isn't
+    diluted by the rest of the show. Long free text is split further.
+
+    Args:
+        item (dict): One row of the merged dj / show frame.
+        chunk_size (int, optional): Max characters per long-text chunk. Defaults to 500.
+        chunk_overlap (int, optional): Character overlap between long-text chunks. Defaults to 50.
+
+    Returns:
+        list[Document]: Child documents carrying metadata[ID_KEY] of their parent show.
+    """
+    splitter = RecursiveCharacterTextSplitter(chunk_size = chunk_size, chunk_overlap = chunk_overlap)
+
+    dj_name = item.get('dj_name')
+    title = item.get('show_title') or item.get('title')
+
+    fields = {
+        'summary': (
+            f"dj_name: {dj_name}\n"
+            f"title: {title}\n"
+            f"genre_tags: {item.get('show_tags_cleaned')}\n"
+            f"energy: {item.get('energy_min')}-{item.get('energy_max')}\n"
+            f"bpm: {item.get('bpm_min')}-{item.get('bpm_max')}"
+        ),
+        'dj_bio':  f"dj_name: {dj_name}\ndj_bio: {item.get('dj_info')}",
+        'artists': f"title: {title}\n{item.get('artists_list')}",
+        **get_show_info_sections(item.get('show_info_combined')),
+    }
+
+    metadata = {
+        ID_KEY: get_parent_id(item),
+        **{field: str(item.get(field)) for field in CHILD_METADATA_FIELDS},
+    }
+
+    chunks = []
+    for chunk_type, text in fields.items():
+        for i, piece in enumerate(splitter.split_text(text)):
+            # keep the title on split pieces so they still say which show they belong to
+            content = piece if i == 0 or chunk_type == 'summary' else f"title: {title}\n{piece}"
+            chunks.append(Document(
+                page_content = content,
+                metadata     = {**metadata, 'chunk_type': chunk_type},
+            ))
+
+    return chunks
+
+
+def get_chunked_documents(documents, **kwargs):
+    """ Split parent documents (from get_rag_document) into child documents.
+
+    Returns:
+        tuple: (child documents, list of (parent id, parent document)).
+    """
+    children = []
+    parents = []
+
+    for doc in documents:
+        parents.append((get_parent_id(doc.metadata), doc))
+        children.extend(get_show_chunks(doc.metadata, **kwargs))
+
+    return children, parents
+
+
+# Index ----
+def get_docstore(docstore_path):
+    """ Open the file-backed parent document store. """
+    os.makedirs(docstore_path, exist_ok = True)
+    return create_kv_docstore(LocalFileStore(docstore_path))
+
+
+def build_chunked_index(
+    documents,
+    embedding_function,
+    persist_directory,
+    docstore_path,
+    collection_name = 'dj_sets_chunks',
+    **kwargs,
+):
+    """ Embed child chunks into Chroma and store the parent shows in a docstore.
+
+    Args:
+        documents (list[Document]): Parent documents from get_rag_document.
+        embedding_function (Embeddings): Embedding function.
+        persist_directory (str): Chroma persist directory for the child vectors.
+        docstore_path (str): Directory for the parent docstore.
+        collection_name (str, optional): Chroma collection. Defaults to 'dj_sets_chunks'.
+        **kwargs: Passed through to get_show_chunks.
+
+    Returns:
+        Chroma: The child vectorstore.
+    """
+    children, parents = get_chunked_documents(documents, **kwargs)
+
+    vectorstore = Chroma.from_documents(
+        documents         = children,
+        embedding         = embedding_function,
+        persist_directory = persist_directory,
+        collection_name   = collection_name,
+    )
+
+    get_docstore(docstore_path).mset(parents)
+
+    return vectorstore
+
+
+# Retriever ----
+def get_parent_document_retriever(
+    vectorstore,
+    docstore_path,
+    child_k           = 20,
+    top_n             = 4,
+    chunks_per_parent = CHUNKS_PER_PARENT,
+):
+    """ Retriever that matches child chunks and returns each parent show once.
+
+    Parents come back in order of their best matching chunk and are capped at
+    top_n, so the context sent to the LLM stays the same size as with whole-show
+    documents. At least top_n * chunks_per_parent chunks are matched, so a large
+    top_n (e.g. the re-ranker's fetch_k) still gets about that many parents.
+
+    Args:
+        vectorstore (VectorStore): Child chunk vectorstore.
+        docstore_path (str): Directory of the parent docstore.
+        child_k (int, optional): Min child chunks to match. Defaults to 20.
+        top_n (int, optional): Max parent shows returned. Defaults to 4.
+        chunks_per_parent (int, optional): Chunks matched per parent wanted. Defaults to 4.
+    """
+    child_k = max(child_k, top_n * chunks_per_parent)
+
+    retriever = MultiVectorRetriever(
+        vectorstore   = vectorstore,
+        docstore      = get_docstore(docstore_path),
+        id_key        = ID_KEY,
+        search_kwargs = {'k': child_k},
+    )
+
+    return (retriever | RunnableLambda(lambda docs: docs[:top_n])) \
+        .with_config(run_name = 'parent_document_retriever')
@@ -0,0 +1,186 @@
+
+# Imports ----
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+
+# Defaults ----
+TAGS_COLUMN = 'show_tags_cleaned'
+ARTISTS_COLUMN = 'artists'
+DATE_COLUMN = 'date_uploaded'
+NUMERIC_COLUMNS = [
+    'play_count', 'fav_count', 'energy_min', 'energy_max', 'bpm_min', 'bpm_max',
+    'play_velocity', 'fav_velocity', 'trending_score', 'popularity_score',
+    'n_chapters', 'arc_start_energy', 'arc_peak_energy', 'arc_end_energy',
+    'arc_start_level', 'arc_peak_level', 'arc_end_level', 'arc_start_bpm', 'arc_end_bpm', 'arc_builds',
+]
+CATEGORICAL_COLUMNS = ['name']
+
+
+# Helpers ----
+def get_arrow_strings(data, columns = None):
+    """ Convert object string columns to Arrow-backed strings.
+
+    Arrow strings live in one contiguous buffer instead of one Python object
+    per cell, and slicing them doesn't copy the characters.
+    """
+    columns = columns or [
+        col for col in data.columns
+        if data[col].dtype == object
+        and data[col].map(lambda x: isinstance(x, str) or (not isinstance(x, (list, tuple)) and pd.isna(x))).all()
+    ]
+    return data.astype({col: 'string[pyarrow]' for col in columns})
+
+
+def get_smallest_int_dtype(max_value):
+    """ int16 / int32 / int64, whichever holds values up to `max_value`. """
+    for dtype in (np.int16, np.int32):
+        if max_value <= np.iinfo(dtype).max:
+            return dtype
+    return np.int64
+
+
+def get_compact_numeric(values):
+    """ Numeric column -> int16 / int32 when it only holds whole numbers, else float32. """
+    values = pd.to_numeric(pd.Series(values), errors = 'coerce').to_numpy(dtype = np.float64)
+    finite = values[~np.isnan(values)]
+
+    if len(finite) == len(values) and np.all(finite == np.round(finite)):
+        low, high = (finite.min(), finite.max()) if len(finite) else (0, 0)
+        return values.astype(get_smallest_int_dtype(max(abs(low), abs(high))))
+
+    return values.astype(np.float32)
+
+
+def get_date32(values):
+    """ Dates (date objects, strings or datetimes) -> Arrow date32 series (missing -> null). """
+    days = pd.to_datetime(pd.Series(values), errors = 'coerce').to_numpy().astype('datetime64[D]')
+    return pd.Series(pd.arrays.ArrowExtensionArray(pa.array(days, type = pa.date32(), from_pandas = True)))
+
+
+def get_csr_lists(tag_lists):
+    """ Per-row lists of strings (tags, artists) -> CSR arrays.
+
+    Returns:
+        tuple: (offsets, codes, vocab), row i's tags being
+            vocab[codes[offsets[i]:offsets[i + 1]]].
+    """
+    tag_lists = [tags if isinstance(tags, list) else [] for tags in tag_lists]
+
+    lengths = np.fromiter((len(tags) for tags in tag_lists), dtype = np.int64, count = len(tag_lists))
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    flat_tags = pd.Series([tag for tags in tag_lists for tag in tags], dtype = object).astype(str)
+    codes, vocab = pd.factorize(flat_tags)
+
+    offsets = offsets.astype(np.int32 if offsets[-1] <= np.iinfo(np.int32).max else np.int64)
+    codes = codes.astype(get_smallest_int_dtype(max(len(vocab) - 1, 0)))
+
+    return offsets, codes, list(vocab)
+
+
+def get_csr_rows(offsets, codes, vocab, rows):
+    """ Decode the lists of the given rows from CSR arrays. """
+    return [[vocab[code] for code in codes[offsets[row]:offsets[row + 1]]] for row in rows]
+
+
+# Compact Catalog ----
+class CompactCatalog:
+    """ Show catalog stored in compact column types.
+
+    DJ names are categorical, tags (and artists) are integer-coded CSR arrays
+    (offsets plus codes into a shared vocabulary) instead of a Python list per row, whole
+    number columns are int16 / int32, the upload date is Arrow date32 and the
+    remaining text columns are Arrow strings.
+
+    SetFilterIndex builds straight from the CSR arrays and day numbers; the
+    display code gets plain rows (tag lists, date objects) for the page it
+    shows with `take`.
+
+    Args:
+        frame (pd.DataFrame): Compact columns (everything but the tags).
+        tag_offsets (np.ndarray): CSR row offsets into tag_codes (n_rows + 1).
+        tag_codes (np.ndarray): Tag codes into tag_vocab.
+        tag_vocab (list[str]): Tag vocabulary.
+        artists (tuple, optional): (offsets, codes, vocab) CSR arrays of the artists per show.
+    """
+
+    def __init__(self, frame, tag_offsets, tag_codes, tag_vocab, artists = None):
+        self.frame = frame
+        self.tag_offsets = tag_offsets
+        self.tag_codes = tag_codes
+        self.tag_vocab = tag_vocab
+        self.artists = artists
+
+    @classmethod
+    def from_frame(cls, data):
+        """ Build from a catalog as returned by load_data (tags as lists, dates as date objects). """
+        data = data.reset_index(drop = True)
+        tag_lists = data[TAGS_COLUMN] if TAGS_COLUMN in data.columns else [[]] * len(data)
+        artists = get_csr_lists(list(data[ARTISTS_COLUMN])) if ARTISTS_COLUMN in data.columns else None
+        frame = data.drop(columns = [TAGS_COLUMN, ARTISTS_COLUMN], errors = 'ignore')
+
+        for col in CATEGORICAL_COLUMNS:
+            if col in frame.columns:
+                frame[col] = frame[col].astype('category')
+        for col in NUMERIC_COLUMNS:
+            if col in frame.columns:
+                frame[col] = get_compact_numeric(frame[col])
+        if DATE_COLUMN in frame.columns:
+            frame[DATE_COLUMN] = get_date32(frame[DATE_COLUMN])
+
+        return cls(get_arrow_strings(frame), *get_csr_lists(list(tag_lists)), artists = artists)
+
+    def __len__(self):
+        return len(self.frame)
+
+    @property
+    def columns(self):
+        return list(self.frame.columns) + [TAGS_COLUMN] + ([ARTISTS_COLUMN] if self.artists is not None else [])
+
+    # Columns ----
+    def get_date_days(self):
+        """ Upload dates as int64 day numbers, plus a bool array of valid dates. """
+        dates = pa.array(self.frame[DATE_COLUMN].array)
+        if isinstance(dates, pa.ChunkedArray):
+            dates = dates.combine_chunks()
+
+        valid = ~dates.is_null().to_numpy(zero_copy_only = False)
+        days = pc.fill_null(dates.cast(pa.int32()), 0).to_numpy(zero_copy_only = False)
+        return days.astype(np.int64), valid
+
+    def get_tag_lists(self, rows):
+        """ Decoded tag lists for the given row positions. """
+        return get_csr_rows(self.tag_offsets, self.tag_codes, self.tag_vocab, rows)
+
+    def get_artist_lists(self, rows):
+        """ Decoded artist lists for the given row positions. """
+        return get_csr_rows(*self.artists, rows)
+
+    # Rows ----
+    def take(self, rows):
+        """ Rows by position as a plain frame for display (tag lists, date objects). """
+        rows = np.arange(len(self))[rows]
+        page = self.frame.iloc[rows].copy()
+
+        for col in CATEGORICAL_COLUMNS:
+            if col in page.columns:
+                page[col] = page[col].astype(object)
+        if DATE_COLUMN in page.columns:
+            page[DATE_COLUMN] = page[DATE_COLUMN].astype(object)
+        page[TAGS_COLUMN] = self.get_tag_lists(rows)
+        if self.artists is not None:
+            page[ARTISTS_COLUMN] = self.get_artist_lists(rows)
+
+        return page
+
+    def to_frame(self):
+        """ The whole catalog in the load_data layout. """
+        return self.take(slice(None))
+
+    def get_nbytes(self):
+        """ Bytes held by the catalog (columns, CSR arrays and tag vocabulary). """
+        csr = [(self.tag_offsets, self.tag_codes, self.tag_vocab)] + ([self.artists] if self.artists is not None else [])
+        csr_bytes = sum(offsets.nbytes + codes.nbytes + sum(len(name.encode()) for name in vocab) for offsets, codes, vocab in csr)
+        return int(self.frame.memory_usage(deep = True).sum()) + csr_bytes
@@ -0,0 +1,219 @@
+
+# Imports ----
+from functools import lru_cache
+
+import tiktoken
+from langchain_core.output_parsers import StrOutputParser
+from langchain_core.runnables import RunnablePassthrough
+
+
+# Field Budgets ----
+# - max tokens per field for each retrieved set, in the order they are written
+#   into the prompt. long free text (show info / "DJ Nerds" notes) gets trimmed
+#   hardest since the short structured fields carry most of the signal.
+FIELD_BUDGETS = {
+    'title':              32,
+    'show_url':           32,
+    'date_uploaded':      8,
+    'play_count':         8,
+    'fav_count':          8,
+    'genre_tags':         48,
+    'energy':             8,
+    'bpm':                8,
+    'artists_list':       64,
+    'show_info_combined': 160,
+}
+
+DJ_BIO_BUDGET = 80
+
+
+# Token Counting ----
+@lru_cache(maxsize = None)
+def get_encoding(model = 'gpt-4o-mini'):
+    """ Get (and cache) the tiktoken encoding for a model.
+
+    Args:
+        model (str, optional): OpenAI model name. Defaults to 'gpt-4o-mini'.
+    """
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding('cl100k_base')
+
+
+def count_tokens(text, model = 'gpt-4o-mini'):
+    """ Count the tokens in a piece of text. """
+    return len(get_encoding(model).encode(text or ''))
+
+
+def trim_to_tokens(text, max_tokens, model = 'gpt-4o-mini'):
+    """ Trim text to at most max_tokens tokens, marking the cut with an ellipsis.
+
+    Args:
+        text (str): Text to trim.
+        max_tokens (int): Token budget for the text.
+        model (str, optional): OpenAI model name used to pick the encoding.
+    """
+    if text is None:
+        return ''
+
+    text = ' '.join(str(text).split())
+    encoding = get_encoding(model)
+    tokens = encoding.encode(text)
+
+    if len(tokens) <= max_tokens:
+        return text
+
+    return encoding.decode(tokens[:max_tokens]).rstrip() + '...'
+
+
+# Helpers ----
+def get_set_fields(metadata):
+    """ Pull the prompt fields for one set out of a document's metadata. """
+    energy = f"{metadata.get('energy_min')}-{metadata.get('energy_max')}"
+    bpm = f"{metadata.get('bpm_min')}-{metadata.get('bpm_max')}"
+
+    return {
+        'title':              metadata.get('show_title') or metadata.get('title'),
+        'show_url':           metadata.get('show_url'),
+        'date_uploaded':      metadata.get('date_uploaded'),
+        'play_count':         metadata.get('play_count'),
+        'fav_count':          metadata.get('fav_count'),
+        'genre_tags':         metadata.get('show_tags_cleaned'),
+        'energy':             energy if 'None' not in energy and 'nan' not in energy else None,
+        'bpm':                bpm if 'None' not in bpm and 'nan' not in bpm else None,
+        'artists_list':       metadata.get('artists_list'),
+        'show_info_combined': metadata.get('show_info_combined'),
+    }
+
+
+def get_relevance_order(documents):
+    """ Order documents by relevance, most relevant first.
+
+    Uses metadata['relevance_score'] when a scoring stage (e.g. a re-ranker) set
+    one, otherwise keeps the retriever's order, which is already by similarity.
+    """
+    indexed = list(enumerate(documents))
+
+    if any('relevance_score' in doc.metadata for doc in documents):
+        indexed = sorted(
+            indexed,
+            key = lambda x: (-x[1].metadata.get('relevance_score', float('-inf')), x[0])
+        )
+
+    return [doc for _, doc in indexed]
+
+
+# Context Packing ----
+def get_packed_context(
+    documents,
+    max_tokens    = 1500,
+    field_budgets = FIELD_BUDGETS,
+    dj_bio_budget = DJ_BIO_BUDGET,
+    model         = 'gpt-4o-mini',
+):
+    """ Pack retrieved documents into a compact, token-budgeted prompt context.
+
+    DJ bios are written once per DJ instead of once per set, each field is
+    trimmed to its budget, and sets are added in relevance order until the
+    overall budget is used up.
+
+    Args:
+        documents (list[Document]): Retrieved documents.
+        max_tokens (int, optional): Overall token budget for the context. Defaults to 1500.
+        field_budgets (dict, optional): Per-field token budgets. Defaults to FIELD_BUDGETS.
+        dj_bio_budget (int, optional): Token budget for each DJ bio. Defaults to 80.
+        model (str, optional): OpenAI model name used to pick the encoding.
+
+    Returns:
+        str: The packed context.
+    """
+    set_blocks = []
+    dj_bios = {}
+    used_tokens = 0
+
+    for doc in get_relevance_order(documents):
+        metadata = doc.metadata or {}
+        new_bio = None
+
+        # fall back to the raw text for documents without structured metadata
+        if not metadata.get('show_url'):
+            block = trim_to_tokens(doc.page_content, sum(field_budgets.values()), model)
+        else:
+            fields = get_set_fields(metadata)
+            dj_name = metadata.get('dj_name') or metadata.get('name')
+
+            lines = [f"dj_name: {dj_name}"]
+            for field, budget in field_budgets.items():
+                value = fields.get(field)
+                if value is None or str(value) in ('', 'nan'):
+                    continue
+                lines.append(f"{field}: {trim_to_tokens(value, budget, model)}")
+            block = '\n'.join(lines)
+
+            if dj_name and dj_name not in dj_bios:
+                dj_bio = trim_to_tokens(metadata.get('dj_info'), dj_bio_budget, model)
+                new_bio = (
+                    f"dj_name: {dj_name}\n"
+                    f"dj_bio: {dj_bio}\n"
+                    f"dj_followers: {metadata.get('dj_followers')}"
+                )
+
+        # - a new DJ's bio only goes in together with their set, and counts against the budget
+        bio_tokens = count_tokens(new_bio, model) if new_bio else 0
+        block_tokens = count_tokens(block, model)
+        if set_blocks and used_tokens + bio_tokens + block_tokens > max_tokens:
+            break
+
+        if new_bio:
+            dj_bios[dj_name] = new_bio
+        set_blocks.append(block)
+        used_tokens += bio_tokens + block_tokens
+
+    sections = []
+    if dj_bios:
+        sections.append("DJs:\n\n" + '\n\n'.join(dj_bios.values()))
+    if set_blocks:
+        sections.append("Sets (most relevant first):\n\n" + '\n\n'.join(set_blocks))
+
+    return '\n\n'.join(sections)
+
+
+def get_context_token_report(documents, model = 'gpt-4o-mini', **kwargs):
+    """ Compare prompt tokens for the raw stuffed context against the packed one.
+
+    Args:
+        documents (list[Document]): Retrieved documents.
+        model (str, optional): OpenAI model name used to pick the encoding.
+        **kwargs: Passed through to get_packed_context.
+    """
+    raw_tokens = count_tokens('\n\n'.join(doc.page_content for doc in documents), model)
+    packed_tokens = count_tokens(get_packed_context(documents, model = model, **kwargs), model)
+
+    return {
+        'documents':     len(documents),
+        'raw_tokens':    raw_tokens,
+        'packed_tokens': packed_tokens,
+        'saved_pct':     round(100 * (1 - packed_tokens / raw_tokens), 1) if raw_tokens else 0.0,
+    }
+
+
+# Packed Documents Chain ----
+def create_packed_documents_chain(llm, prompt, document_variable_name = 'context', **pack_kwargs):
+    """ Drop-in replacement for create_stuff_documents_chain that packs the context.
+
+    Args:
+        llm (BaseChatModel): Chat model.
+        prompt (ChatPromptTemplate): Prompt with a {context} variable.
+        document_variable_name (str, optional): Prompt variable for the context. Defaults to 'context'.
+        **pack_kwargs: Passed through to get_packed_context.
+    """
+    def format_docs(inputs):
+        return get_packed_context(inputs[document_variable_name], **pack_kwargs)
+
+    return (
+        RunnablePassthrough.assign(**{document_variable_name: format_docs}).with_config(run_name = 'pack_inputs')
+        | prompt
+        | llm
+        | StrOutputParser()
+    ).with_config(run_name = 'packed_documents_chain')
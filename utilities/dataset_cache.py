@@ -0,0 +1,89 @@
+
+# Imports ----
+import os
+import sys
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from utilities.compact_catalog import CompactCatalog
+from utilities.filter_engine import SetFilterIndex
+from utilities.incremental_filter import IncrementalFilter
+
+
+# Helpers ----
+def get_file_mtime(path):
+    """ Modification time of a data file (0 when it doesn't exist). """
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return 0.0
+
+
+def get_object_nbytes(obj):
+    """ Approximate deep size in bytes of a session state value. """
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        usage = obj.memory_usage(deep = True)
+        return int(usage.sum() if isinstance(usage, pd.Series) else usage)
+    if isinstance(obj, np.ndarray):
+        return int(obj.nbytes)
+    if isinstance(obj, (list, tuple, set)):
+        return sys.getsizeof(obj) + sum(get_object_nbytes(x) for x in obj)
+    if isinstance(obj, dict):
+        return sys.getsizeof(obj) + sum(get_object_nbytes(k) + get_object_nbytes(v) for k, v in obj.items())
+    return sys.getsizeof(obj)
+
+
+def get_session_memory_report(session_state):
+    """ Bytes held by each entry of a (streamlit) session state, largest first. """
+    sizes = {str(key): get_object_nbytes(value) for key, value in dict(session_state).items()}
+    return dict(sorted(sizes.items(), key = lambda x: -x[1]))
+
+
+# Shared Dataset ----
+class SharedDataset:
+    """ Read-only show catalog shared by every session in the process.
+
+    Holds the prepared catalog in compact form (CompactCatalog) and its
+    SetFilterIndex, with an IncrementalFilter mask cache shared by every
+    session. `data` is the compact frame (everything but the tags) for
+    slider ranges and DJ lists. Sessions keep only their filter values and the
+    row ids of their results, and look rows up here with `get_rows`; nothing
+    in here should be mutated. Row ids are only valid for the dataset with
+    the same `mtime` (a reload can reorder or drop rows).
+
+    Args:
+        data (pd.DataFrame): Prepared catalog (as returned by load_data).
+        path (str): Data file the catalog was loaded from.
+        mtime (float | tuple): Modification time of the file(s) the catalog was built from.
+        **index_kwargs: Passed through to SetFilterIndex.
+    """
+
+    def __init__(self, data, path, mtime, **index_kwargs):
+        self.catalog = CompactCatalog.from_frame(data)
+        self.data = self.catalog.frame
+        self.index = SetFilterIndex(self.catalog, **index_kwargs)
+        self.filter = IncrementalFilter(self.index)
+        self.url_index = pd.Index(self.data['show_url']) if 'show_url' in self.data.columns else None
+        self.path = path
+        self.mtime = mtime
+        self.loaded_at = datetime.now()
+
+    def __len__(self):
+        return len(self.data)
+
+    def get_rows(self, rows):
+        """ Rows of the catalog by position (only materialise what is displayed). """
+        return self.catalog.take(rows)
+
+    def get_url_rows(self, show_urls):
+        """ Row positions of shows by url (unknown urls are dropped). """
+        if self.url_index is None:
+            return np.empty(0, dtype = np.int64)
+        rows = self.url_index.get_indexer(list(show_urls))
+        return rows[rows >= 0]
+
+    def get_nbytes(self):
+        """ Bytes held by the shared catalog. """
+        return self.catalog.get_nbytes()
@@ -0,0 +1,167 @@
+
+# Imports ----
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import numpy as np
+import pandas as pd
+
+from langchain.docstore.document import Document
+
+
+# Defaults ----
+# - metadata read after retrieval: context packer, chunk indexer, re-ranker and API
+RETRIEVAL_METADATA_FIELDS = [
+    'dj_name', 'dj_info', 'dj_followers', 'title', 'show_title', 'show_url', 'date_uploaded',
+    'play_count', 'fav_count', 'show_tags_cleaned', 'energy_min', 'energy_max', 'bpm_min', 'bpm_max',
+    'artists_list', 'show_info_combined',
+]
+
+CHUNK_SIZE = 5_000
+
+
+# Rendering ----
+def get_document_content(item):
+    """ Page content of a show's RAG document (one merged dj / show record). """
+    return f"""
+        dj_name: {item.get('dj_name')},
+        dj_bio: {item.get('dj_info')},
+        df_followers: {item.get('dj_followers')},
+        df_following: {item.get('dj_following')},
+        title: {item.get('show_title') or item.get('title')},
+        play_count: {item.get('play_count')},
+        favorited_count: {item.get('fav_count')},
+        date_uploaded: {item.get('date_uploaded')},
+        genre_tags: {item.get('show_tags_cleaned')},
+        energy_min: {item.get('energy_min')},
+        energy_max: {item.get('energy_max')},
+        bpm_min: {item.get('bpm_min')},
+        bpm_max: {item.get('bpm_max')},
+        artists_list: {item.get('artists_list')},
+        show_info_combined: {item.get('show_info_combined')},
+        show_url: {item.get('show_url')},
+        """
+
+
+def get_document_metadata(item, fields = RETRIEVAL_METADATA_FIELDS):
+    """ The `fields` of a record as vectorstore-safe scalars (missing values dropped, lists as text). """
+    metadata = {}
+    for field in fields:
+        value = item.get(field)
+        if value is None or (isinstance(value, float) and np.isnan(value)):
+            continue
+        if isinstance(value, np.generic):
+            value = value.item()
+        metadata[field] = value if isinstance(value, (str, int, float, bool)) else str(value)
+    return metadata
+
+
+def render_records(records, fields = RETRIEVAL_METADATA_FIELDS):
+    """ [(page_content, metadata), ...] for a chunk of records (runs in the worker processes).
+
+    fields = None keeps the whole record as metadata, like get_rag_document.
+    """
+    return [
+        (get_document_content(item), item if fields is None else get_document_metadata(item, fields))
+        for item in records
+    ]
+
+
+# Streaming ----
+def iter_record_chunks(data, chunk_size = CHUNK_SIZE):
+    """ Lists of record dicts, `chunk_size` rows at a time.
+
+    Args:
+        data (pd.DataFrame | Iterable[pd.DataFrame]): Merged frame, or frames
+            (e.g. iter_combined_chunks) so the whole corpus is never in memory.
+        chunk_size (int, optional): Rows per chunk. Defaults to 5,000.
+    """
+    frames = [data] if isinstance(data, pd.DataFrame) else data
+    for frame in frames:
+        for start in range(0, len(frame), chunk_size):
+            yield frame.iloc[start:start + chunk_size].to_dict(orient = 'records')
+
+
+def iter_combined_chunks(info_path, shows_path, chunk_size = CHUNK_SIZE):
+    """ The merged dj / show frame (get_combined_data), read from the csv files in chunks. """
+    from utilities.rag_utilities import get_combined_data
+
+    df_djs = pd.read_csv(info_path)
+    for df_sets in pd.read_csv(shows_path, chunksize = chunk_size):
+        yield get_combined_data(df_djs, df_sets)
+
+
+def iter_documents(data, fields = RETRIEVAL_METADATA_FIELDS, chunk_size = CHUNK_SIZE, processes = None, max_pending = None):
+    """ Lazily yield one Document per show, rendered in a process pool.
+
+    Chunks of records are rendered by worker processes while earlier chunks
+    are consumed; at most `max_pending` chunks are in flight, so memory stays
+    bounded by the chunk size rather than the corpus size. Documents come out
+    in input order.
+
+    Args:
+        data (pd.DataFrame | Iterable[pd.DataFrame]): Merged dj / show records.
+        fields (list[str], optional): Metadata kept per document (None = every field,
+            as get_rag_document). Defaults to RETRIEVAL_METADATA_FIELDS.
+        chunk_size (int, optional): Records per task. Defaults to 5,000.
+        processes (int, optional): Worker processes; 0 renders in this process.
+            Defaults to the CPU count.
+        max_pending (int, optional): Chunks in flight. Defaults to 2 per process.
+
+    Yields:
+        Document: Documents in input order.
+    """
+    chunks = iter_record_chunks(data, chunk_size)
+    processes = os.cpu_count() if processes is None else processes
+
+    def to_documents(rendered):
+        return (Document(page_content = content, metadata = metadata) for content, metadata in rendered)
+
+    if processes <= 0:
+        for records in chunks:
+            yield from to_documents(render_records(records, fields))
+        return
+
+    max_pending = max_pending or 2 * processes
+    with ProcessPoolExecutor(max_workers = processes) as executor:
+        pending = deque(executor.submit(render_records, records, fields) for records in islice(chunks, max_pending))
+        while pending:
+            rendered = pending.popleft().result()
+            next_records = next(chunks, None)
+            if next_records is not None:
+                pending.append(executor.submit(render_records, next_records, fields))
+            yield from to_documents(rendered)
+
+
+def iter_batches(items, batch_size):
+    """ Lists of up to `batch_size` items from an iterator. """
+    items = iter(items)
+    while batch := list(islice(items, batch_size)):
+        yield batch
+
+
+# Indexing ----
+def index_documents(vectorstore, documents, batch_size = 500, id_func = None):
+    """ Add streamed documents to a vectorstore in batches (never holding more than one batch).
+
+    Args:
+        vectorstore (VectorStore): Target vectorstore.
+        documents (Iterable[Document]): Documents, e.g. from iter_documents.
+        batch_size (int, optional): Documents per add_documents call. Defaults to 500.
+        id_func (callable, optional): Document metadata -> id, so re-indexing replaces
+            documents. Defaults to chunk_indexer.get_parent_id (hash of the show_url).
+
+    Returns:
+        int: Documents indexed.
+    """
+    if id_func is None:
+        from utilities.chunk_indexer import get_parent_id
+        id_func = get_parent_id
+
+    n_documents = 0
+    for batch in iter_batches(documents, batch_size):
+        vectorstore.add_documents(batch, ids = [id_func(doc.metadata) for doc in batch])
+        n_documents += len(batch)
+    return n_documents
@@ -0,0 +1,201 @@
+
+# Imports ----
+import re
+
+import numpy as np
+import pandas as pd
+
+
+# Parsing ----
+# - "Energy 3-8 | 70-79 BPM" notes (same patterns as the formatting pipeline)
+ENERGY_PATTERN = re.compile(r"Energy\s*(\d+)-(\d+)\s*(?:\||and)", flags = re.IGNORECASE)
+BPM_PATTERN = re.compile(r"(?:\||and)\s*(\d+)-(\d+)\s*BPM", flags = re.IGNORECASE)
+
+# - "Chapters: feel-good R&B > Traditional > groovy > ..."
+CHAPTERS_PATTERN = re.compile(r"Chapters?\s*:\s*(?P<chapters>[^\n]+)", flags = re.IGNORECASE)
+ROUND_SUFFIX = re.compile(r"\s*\((?:round|part)\s*\d+\)\s*$", flags = re.IGNORECASE)
+
+# - a BPM stated in a chapter ("slow (70 BPM) > groove (78-82 BPM)")
+CHAPTER_BPM_PATTERN = re.compile(r"(\d{2,3})(?:\s*-\s*(\d{2,3}))?\s*BPM", flags = re.IGNORECASE)
+
+# - relative energy of chapter words (0 = lowest, 1 = highest); a chapter is the
+#   mean of the words it contains, shouted words ("BUILD") count one step higher
+CHAPTER_ENERGY = {
+    'slow': 0.1, 'sad': 0.1, 'lovely': 0.15, 'chill': 0.15, 'spacey': 0.2, 'moody': 0.2,
+    'gooey': 0.25, 'mellow': 0.2, 'soft': 0.15, 'calm': 0.1, 'easy': 0.2,
+    'alternative': 0.3, 'neo': 0.35, 'cutesy': 0.35, 'sexy': 0.4, 'flirty': 0.45,
+    'traditional': 0.5, 'familiar': 0.5, 'flow': 0.5, 'feel-good': 0.5, 'r&b': 0.4,
+    'groove': 0.55, 'groovy': 0.55, 'trancey': 0.55, 'electronic': 0.6, 'inversion': 0.6,
+    'dirty': 0.65, 'pop': 0.65, 'playful': 0.6, 'punch': 0.8, 'dangerous': 0.8,
+    'build': 0.8, 'hype': 0.9, 'peak': 0.9, 'high': 0.85,
+}
+SHOUT_BOOST = 0.2
+
+# - prose describing a build, for sets without chapters
+BUILD_PHRASES = re.compile(
+    r"\b(?:build(?:s|ing)?\s+up|upped the energy|push(?:ed)? the tempo|"
+    r"peak(?:ed)? near the end|let loose in the second half)\b",
+    flags = re.IGNORECASE,
+)
+
+# - largest drop between chapters that still counts as a monotonic build
+BUILD_TOLERANCE = 0.15
+
+# - arc_*_level: relative chapter energy in [0, 1] from the chapter words (an estimate);
+#   arc_*_bpm: only set when the first / last chapter states its BPM
+ARC_COLUMNS = [
+    'chapters', 'n_chapters', 'arc_start_energy', 'arc_peak_energy', 'arc_end_energy',
+    'arc_start_level', 'arc_peak_level', 'arc_end_level', 'arc_start_bpm', 'arc_end_bpm', 'arc_builds',
+]
+ARC_NUMERIC_COLUMNS = [
+    'arc_start_energy', 'arc_peak_energy', 'arc_end_energy',
+    'arc_start_level', 'arc_peak_level', 'arc_end_level', 'arc_start_bpm', 'arc_end_bpm',
+]
+
+
+def get_range(text, pattern):
+    """ (low, high) from an 'Energy 3-8' / '70-79 BPM' note, or (nan, nan). """
+    match = pattern.search(text) if isinstance(text, str) else None
+    if not match:
+        return np.nan, np.nan
+    low, high = float(match[1]), float(match[2])
+    return min(low, high), max(low, high)
+
+
+def get_chapters(text):
+    """ 'Chapters: a > b > c.' -> ['a', 'b', 'c'] ('(round 2)' suffixes dropped). """
+    match = CHAPTERS_PATTERN.search(text) if isinstance(text, str) else None
+    if not match:
+        return []
+
+    chapters = [ROUND_SUFFIX.sub('', chapter).strip(' .') for chapter in match['chapters'].split('>')]
+    return [chapter for chapter in chapters if chapter]
+
+
+def get_chapter_level(chapter):
+    """ Relative energy of a chapter from its words (None when no word is known). """
+    levels = []
+    for word in re.findall(r"[\w&-]+", chapter):
+        level = CHAPTER_ENERGY.get(word.lower())
+        if level is not None:
+            shouted = word.isalpha() and word.isupper() and len(word) > 2
+            levels.append(min(level + SHOUT_BOOST, 1.0) if shouted else level)
+    return float(np.mean(levels)) if levels else None
+
+
+def get_chapter_bpm(chapter):
+    """ BPM stated in a chapter (middle of a stated range), or nan. """
+    match = CHAPTER_BPM_PATTERN.search(chapter)
+    if not match:
+        return np.nan
+    return (float(match[1]) + float(match[2] or match[1])) / 2
+
+
+def get_chapter_levels(chapters):
+    """ Relative energy per chapter; unknown chapters carry the previous level forward. """
+    levels = [get_chapter_level(chapter) for chapter in chapters]
+    known = [level for level in levels if level is not None]
+    if not known:
+        return []
+
+    filled, previous = [], known[0]
+    for level in levels:
+        previous = level if level is not None else previous
+        filled.append(previous)
+    return filled
+
+
+def is_monotonic_build(levels, tolerance = BUILD_TOLERANCE):
+    """ Ends higher than it starts and never drops by more than `tolerance` between chapters. """
+    if len(levels) < 2 or levels[-1] <= levels[0]:
+        return False
+    return all(later >= earlier - tolerance for earlier, later in zip(levels, levels[1:]))
+
+
+def scale_levels(levels, low, high):
+    """ Chapter levels mapped onto the set's [low, high] range (quietest chapter -> low). """
+    levels = np.asarray(levels, dtype = np.float64)
+    if np.isnan(low) or np.isnan(high):
+        return np.full(len(levels), np.nan)
+
+    spread = levels.max() - levels.min()
+    if spread == 0:
+        return np.full(len(levels), (low + high) / 2)
+    return low + (levels - levels.min()) / spread * (high - low)
+
+
+def get_energy_arc(notes, descriptions = ()):
+    """ Structured arc of one set from its energy / BPM notes and chapter list.
+
+    Args:
+        notes (str): show_info1 ("Energy 3-8 | 70-79 BPM").
+        descriptions (tuple, optional): Other show descriptions, searched for the
+            chapter list and, when there is none, for prose describing a build.
+
+    Returns:
+        dict: ARC_COLUMNS (chapters as a list; energies / levels / BPMs nan when unknown).
+    """
+    texts = [text for text in (notes, *descriptions) if isinstance(text, str)]
+    chapters = next((chapters for chapters in map(get_chapters, texts) if chapters), [])
+    levels = get_chapter_levels(chapters)
+
+    energy_low, energy_high = get_range(notes, ENERGY_PATTERN)
+    bpm_low, bpm_high = get_range(notes, BPM_PATTERN)
+
+    # - BPMs are never derived from the word levels: only a BPM the chapter states counts
+    start_bpm, end_bpm = (get_chapter_bpm(chapters[0]), get_chapter_bpm(chapters[-1])) if chapters else (np.nan, np.nan)
+
+    if levels:
+        energies = scale_levels(levels, energy_low, energy_high)
+        start_energy, peak_energy, end_energy = energies[0], energies.max(), energies[-1]
+        start_level, peak_level, end_level = levels[0], max(levels), levels[-1]
+        builds = is_monotonic_build(levels)
+    else:
+        start_energy, peak_energy, end_energy = np.nan, energy_high, np.nan
+        start_level, peak_level, end_level = np.nan, np.nan, np.nan
+        builds = any(BUILD_PHRASES.search(text) for text in texts)
+
+    return {
+        'chapters':         chapters,
+        'n_chapters':       len(chapters),
+        'arc_start_energy': start_energy,
+        'arc_peak_energy':  peak_energy,
+        'arc_end_energy':   end_energy,
+        'arc_start_level':  start_level,
+        'arc_peak_level':   peak_level,
+        'arc_end_level':    end_level,
+        'arc_start_bpm':    start_bpm,
+        'arc_end_bpm':      end_bpm,
+        'arc_builds':       bool(builds),
+    }
+
+
+def get_energy_arcs(data, info_columns = ('show_info2', 'show_info3', 'show_info4')):
+    """ Energy arcs for every show (one row per show, aligned with `data`).
+
+    Args:
+        data (pd.DataFrame): Shows with show_info1 (energy / BPM notes) and the info columns.
+        info_columns (tuple, optional): Descriptions searched for chapters and build prose.
+
+    Returns:
+        pd.DataFrame: ARC_COLUMNS, float32 energies / levels / BPMs.
+    """
+    records = data.to_dict(orient = 'records')
+    arcs = pd.DataFrame(
+        [get_energy_arc(row.get('show_info1'), tuple(row.get(col) for col in info_columns)) for row in records],
+        columns = ARC_COLUMNS,
+        index   = data.index,
+    )
+    return arcs.astype({**{col: np.float32 for col in ARC_NUMERIC_COLUMNS}, 'n_chapters': np.int16, 'arc_builds': bool})
+
+
+def add_energy_arc_features(data):
+    """ Join the arc columns onto the catalog (chapters as a ' > '-joined string). """
+    arcs = get_energy_arcs(data)
+    arcs['chapters'] = arcs['chapters'].map(' > '.join)
+    return data.assign(**{col: arcs[col] for col in ARC_COLUMNS})
+
+
+def parse_chapters(value):
+    """ Stored ' > '-joined chapters -> list. """
+    return [chapter.strip() for chapter in value.split('>') if chapter.strip()] if isinstance(value, str) else []
@@ -0,0 +1,167 @@
+
+# Imports ----
+import asyncio
+import time
+from typing import List
+
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+
+# Defaults ----
+FAKE_RESPONSES = [
+    "🎧 Recommendations:\n\"Breaking with Tradition\" by DJ Sprenk\n"
+    "Listen here: [DJ Sprenk - Breaking with Tradition](https://www.mixcloud.com/djsprenk/20250404-zouk-heat-2/)",
+]
+
+
+# Fake Chat Model ----
+class FakeLatencyChatModel(BaseChatModel):
+    """ Local stand-in for ChatOpenAI with a fixed per-call latency.
+
+    Cycles through canned responses, sleeps (or awaits) `latency` seconds per
+    call and streams word by word, so serving / load tests and benchmarks can
+    run without network access or API cost. The last prompt is kept for token
+    accounting.
+    """
+
+    responses: List[str] = FAKE_RESPONSES
+    latency: float = 0.5
+    stream_delay: float = 0.0
+    calls: int = 0
+    last_prompt: str = ''
+
+    @property
+    def _llm_type(self):
+        return 'fake-latency-chat'
+
+    def _next_response(self, messages):
+        self.last_prompt = '\n'.join(str(m.content) for m in messages)
+        response = self.responses[self.calls % len(self.responses)]
+        self.calls += 1
+        return response
+
+    def _generate(self, messages, stop = None, run_manager = None, **kwargs):
+        response = self._next_response(messages)
+        time.sleep(self.latency)
+        return ChatResult(generations = [ChatGeneration(message = AIMessage(content = response))])
+
+    async def _agenerate(self, messages, stop = None, run_manager = None, **kwargs):
+        response = self._next_response(messages)
+        await asyncio.sleep(self.latency)
+        return ChatResult(generations = [ChatGeneration(message = AIMessage(content = response))])
+
+    async def _astream(self, messages, stop = None, run_manager = None, **kwargs):
+        response = self._next_response(messages)
+        await asyncio.sleep(self.latency)
+        for word in response.split(' '):
+            await asyncio.sleep(self.stream_delay)
+            yield ChatGenerationChunk(message = AIMessageChunk(content = word + ' '))
+
+
+# Fake Embeddings ----
+class FakeLatencyEmbeddings(DeterministicFakeEmbedding):
+    """ Local stand-in for OpenAIEmbeddings (deterministic vectors per text).
+
+    Sleeps `latency` seconds per request, like one round trip to the
+    embeddings API regardless of batch size.
+    """
+
+    latency: float = 0.05
+    calls: int = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        time.sleep(self.latency)
+        return super().embed_documents(texts)
+
+    def embed_query(self, text):
+        self.calls += 1
+        time.sleep(self.latency)
+        return super().embed_query(text)
+
+    async def aembed_documents(self, texts):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return super().embed_documents(texts)
+
+    async def aembed_query(self, text):
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        return super().embed_query(text)
+
+
+def get_fake_llm(latency = 0.5, responses = None, stream_delay = 0.0):
+    """ Get a FakeLatencyChatModel.
+
+    Args:
+        latency (float, optional): Seconds per call. Defaults to 0.5.
+        responses (list[str], optional): Canned responses. Defaults to FAKE_RESPONSES.
+        stream_delay (float, optional): Seconds between streamed words. Defaults to 0.0.
+    """
+    return FakeLatencyChatModel(
+        responses    = responses or FAKE_RESPONSES,
+        latency      = latency,
+        stream_delay = stream_delay,
+    )
+
+
+def get_fake_embeddings(latency = 0.05, size = 1536):
+    """ Get a FakeLatencyEmbeddings with ada-002 sized vectors.
+
+    Args:
+        latency (float, optional): Seconds per request. Defaults to 0.05.
+        size (int, optional): Vector size. Defaults to 1536.
+    """
+    return FakeLatencyEmbeddings(size = size, latency = latency)
+
+
+# Fake Rag Chain ----
+def get_fake_rag_chain(
+    llm_latency       = 0.5,
+    embedding_latency = 0.05,
+    data_dir          = None,
+    k                 = 4,
+    embeddings        = None,
+):
+    """ Build the assistant's conversational RAG chain over local fakes.
+
+    Documents come from the dev csv files and are indexed into an in-memory
+    vectorstore with fake embeddings, so the full chain (rewrite, embed,
+    retrieve, generate) runs offline with controllable latency.
+
+    Args:
+        llm_latency (float, optional): Seconds per fake LLM call. Defaults to 0.5.
+        embedding_latency (float, optional): Seconds per fake embedding request. Defaults to 0.05.
+        data_dir (str, optional): Folder with the dev csv files. Defaults to data/dev.
+        k (int, optional): Documents retrieved per question. Defaults to 4.
+        embeddings (Embeddings, optional): Embedding function to index / search with (e.g. a
+            rag_benchmark.TimedEmbeddings). Defaults to fake embeddings with `embedding_latency`.
+
+    Returns:
+        dict: 'chain', 'retriever', 'llm', 'embeddings', 'vectorstore' and 'documents'.
+    """
+    from langchain_core.vectorstores import InMemoryVectorStore
+    from utilities.rag_utilities import (
+        DATA_DIR, load_combined_data, get_rag_document, get_conversational_rag_chain
+    )
+
+    documents = get_rag_document(load_combined_data(data_dir or DATA_DIR))
+
+    llm = get_fake_llm(latency = llm_latency)
+    embeddings = embeddings or get_fake_embeddings(latency = embedding_latency)
+    vectorstore = InMemoryVectorStore.from_documents(documents, embeddings)
+    retriever = vectorstore.as_retriever(search_kwargs = {'k': k})
+
+    chain = get_conversational_rag_chain(llm, retriever)
+
+    return {
+        'chain':       chain,
+        'retriever':   retriever,
+        'llm':         llm,
+        'embeddings':  embeddings,
+        'vectorstore': vectorstore,
+        'documents':   documents,
+    }
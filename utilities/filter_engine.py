@@ -0,0 +1,285 @@
+
+# Imports ----
+import numpy as np
+import pandas as pd
+
+from utilities.tag_index import TagIndex
+from utilities.interval_index import IntervalIndex
+from utilities.compact_catalog import CompactCatalog
+from utilities.artist_index import ArtistIndex
+
+
+# Defaults ----
+EXCLUDED_GENRES = ('bachata', 'salsa')
+
+# - filter dimensions, in the order their masks are combined
+FILTER_DIMENSIONS = [
+    'selected_djs', 'selected_genres', 'selected_artists', 'date_range', 'play_count_range',
+    'fav_count_range', 'energy_range', 'bpm_range', 'arc_builds',
+]
+
+
+# Helpers ----
+def get_date_ordinals(values):
+    """ Dates (date objects, strings or datetimes) -> int64 day numbers, NaT -> missing.
+
+    Returns:
+        tuple: (day numbers, bool array of valid dates).
+    """
+    days = pd.to_datetime(pd.Series(values), errors = 'coerce').to_numpy().astype('datetime64[D]')
+    valid = ~np.isnat(days)
+    return days.astype(np.int64), valid
+
+
+def get_date_ordinal(value):
+    """ A single date -> int64 day number (same scale as get_date_ordinals). """
+    return np.datetime64(pd.Timestamp(value).date(), 'D').astype(np.int64)
+
+
+# Filter Index ----
+class SetFilterIndex:
+    """ Precomputed arrays for filtering the show catalog with NumPy masks.
+
+    Built once when the data is loaded: DJ names as categorical codes, tags as
+    an inverted tag -> row bitmap index (TagIndex), artists as an inverted
+    artist -> rows index (ArtistIndex), upload dates as day numbers
+    and the numeric columns as plain arrays. Each filter is then a vectorised
+    boolean mask and all masks are combined once, with the same semantics as
+    the original row-by-row pandas filters.
+
+    Args:
+        data (pd.DataFrame | CompactCatalog): Show catalog as returned by load_data (show_tags_cleaned
+            as lists), or its CompactCatalog (tags read from the CSR arrays).
+        excluded_genres (tuple, optional): Tags hidden from the genre list. Rows need at least
+            one other tag to be shown. Defaults to ('bachata', 'salsa').
+        use_interval_index (bool, optional): Build interval trees for the energy / BPM overlap and
+            upload date filters. Defaults to False.
+        interval_max_selectivity (float, optional): Share of rows a range query may match and still
+            be answered from its tree (O(log n + k)); broader ones use the column masks. The tree
+            only wins for narrow queries (05_benchmark_interval_index.py at 1M rows: a one-week
+            date range 0.5 ms vs 1.9 ms with masks, the full date range 33 ms vs 1.8 ms). Defaults to 0.05.
+    """
+
+    NUMERIC_COLUMNS = [
+        'play_count', 'fav_count', 'energy_min', 'energy_max', 'bpm_min', 'bpm_max',
+        'trending_score', 'popularity_score',
+        'arc_start_energy', 'arc_peak_energy', 'arc_end_energy',
+        'arc_start_level', 'arc_peak_level', 'arc_end_level', 'arc_start_bpm', 'arc_end_bpm', 'arc_builds',
+    ]
+
+    def __init__(self, data, excluded_genres = EXCLUDED_GENRES, use_interval_index = False, interval_max_selectivity = 0.05):
+        catalog = data if isinstance(data, CompactCatalog) else None
+        if catalog is not None:
+            data = catalog.frame
+
+        self.n_rows = len(data)
+        self.columns = set(catalog.columns) if catalog is not None else set(data.columns)
+
+        # - dj names ----
+        names = pd.Categorical(data['name']) if 'name' in data.columns else pd.Categorical([None] * self.n_rows)
+        self.name_codes = names.codes
+        self.name_lookup = {name: code for code, name in enumerate(names.categories)}
+
+        # - tags ----
+        if catalog is not None:
+            self.tags = TagIndex.from_csr(catalog.tag_offsets, catalog.tag_codes, catalog.tag_vocab)
+        else:
+            tags = data['show_tags_cleaned'] if 'show_tags_cleaned' in data.columns else pd.Series([[]] * self.n_rows)
+            self.tags = TagIndex(list(tags))
+
+        # - artists ----
+        if catalog is not None:
+            self.artists = ArtistIndex.from_csr(*catalog.artists) if catalog.artists is not None else None
+        else:
+            self.artists = ArtistIndex(list(data['artists'])) if 'artists' in data.columns else None
+
+        # - rows with at least one tag that is offered in the genre list ----
+        self.has_allowed_tag = self.tags.get_tags_mask(self.tags.get_genre_options(excluded = excluded_genres))
+
+        # - dates ----
+        if catalog is not None and 'date_uploaded' in data.columns:
+            self.date_days, self.date_valid = catalog.get_date_days()
+        elif 'date_uploaded' in data.columns:
+            self.date_days, self.date_valid = get_date_ordinals(data['date_uploaded'].to_numpy())
+        else:
+            self.date_days, self.date_valid = None, None
+
+        # - numerics ----
+        self.numerics = {
+            col: pd.to_numeric(data[col], errors = 'coerce').to_numpy(dtype = np.float64)
+            for col in self.NUMERIC_COLUMNS if col in data.columns
+        }
+
+        self.sort_orders = {}
+
+        # - interval trees for the range filters ----
+        self.intervals = {}
+        self.interval_max_selectivity = interval_max_selectivity
+        if use_interval_index:
+            for min_column, max_column in [('energy_min', 'energy_max'), ('bpm_min', 'bpm_max')]:
+                if min_column in self.numerics and max_column in self.numerics:
+                    self.intervals[min_column] = IntervalIndex(self.numerics[min_column], self.numerics[max_column])
+            if self.date_days is not None:
+                self.intervals['date_uploaded'] = IntervalIndex(
+                    np.where(self.date_valid, self.date_days, np.nan)
+                )
+
+    def get_interval(self, column, low, high):
+        """ The interval tree for `column` when it should answer [low, high] (a narrow query), else None. """
+        tree = self.intervals.get(column)
+        if tree is None or tree.count(low, high) > self.interval_max_selectivity * self.n_rows:
+            return None
+        return tree
+
+    # Masks ----
+    def get_dj_mask(self, selected_djs):
+        # - boolean lookup table indexed by the name codes (one gather instead of np.isin);
+        #   the extra last slot is where the -1 code of a missing name lands
+        selected = np.zeros(len(self.name_lookup) + 1, dtype = bool)
+        selected[[self.name_lookup[dj] for dj in selected_djs if dj in self.name_lookup]] = True
+        return selected[self.name_codes]
+
+    def get_genre_mask(self, selected_genres):
+        # - partial matching: a selected genre matches every tag containing it
+        return self.tags.get_genre_mask(selected_genres)
+
+    def get_artist_mask(self, selected_artists):
+        return self.artists.get_mask(selected_artists)
+
+    def get_date_mask(self, date_range):
+        start_date, end_date = date_range
+        start, end = get_date_ordinal(start_date), get_date_ordinal(end_date)
+        tree = self.get_interval('date_uploaded', start, end)
+        if tree is not None:
+            return tree.query_mask(start, end)
+        return self.date_valid & (self.date_days >= start) & (self.date_days <= end)
+
+    def get_between_mask(self, column, value_range):
+        low, high = value_range
+        values = self.numerics[column]
+        return (values >= low) & (values <= high)
+
+    def get_overlap_mask(self, min_column, max_column, value_range):
+        # - rows whose [min, max] range overlaps the selected range
+        low, high = value_range
+        tree = self.get_interval(min_column, low, high)
+        if tree is not None:
+            return tree.query_mask(low, high)
+        if min_column in self.numerics and max_column in self.numerics:
+            return (self.numerics[min_column] <= high) & (self.numerics[max_column] >= low)
+        return self.get_between_mask(min_column, value_range)
+
+    def get_arc_mask(
+        self,
+        builds            = None,
+        start_level_range = None,
+        end_level_range   = None,
+        start_bpm_range   = None,
+        end_bpm_range     = None,
+        peak_energy_range = None,
+    ):
+        """ Rows whose energy arc (see utilities.energy_arc) matches, e.g. "builds from slow to high":
+        get_arc_mask(builds = True, start_level_range = (0, 0.35), end_level_range = (0.65, 1)).
+
+        Levels are relative chapter energies in [0, 1]; the BPM ranges only match
+        sets whose first / last chapter states its BPM.
+        """
+        mask = np.ones(self.n_rows, dtype = bool)
+        if builds is not None:
+            mask &= (self.numerics['arc_builds'] > 0) == builds
+        for column, value_range in [
+            ('arc_start_level', start_level_range),
+            ('arc_end_level',   end_level_range),
+            ('arc_start_bpm',   start_bpm_range),
+            ('arc_end_bpm',     end_bpm_range),
+            ('arc_peak_energy', peak_energy_range),
+        ]:
+            if value_range is not None:
+                mask &= self.get_between_mask(column, value_range)
+        return mask
+
+    def get_filter_mask(self, dimension, value):
+        """ Mask for one filter dimension (see FILTER_DIMENSIONS), or None when it filters nothing. """
+        if dimension == 'selected_djs':
+            return self.get_dj_mask(value) if value else None
+        if dimension == 'selected_genres':
+            return self.get_genre_mask(value) if value else None
+        if dimension == 'selected_artists':
+            return self.get_artist_mask(value) if value and self.artists is not None else None
+        if value is None:
+            return None
+
+        if dimension == 'date_range':
+            return self.get_date_mask(value) if self.date_days is not None else None
+        if dimension in ('play_count_range', 'fav_count_range'):
+            column = dimension[:-len('_range')]
+            return self.get_between_mask(column, value) if column in self.numerics else None
+        if dimension in ('energy_range', 'bpm_range'):
+            prefix = dimension[:-len('_range')]
+            if f"{prefix}_min" not in self.numerics:
+                return None
+            return self.get_overlap_mask(f"{prefix}_min", f"{prefix}_max", value)
+        if dimension == 'arc_builds':
+            return self.get_arc_mask(builds = True) if value and 'arc_builds' in self.numerics else None
+
+        raise ValueError(f"Unknown filter dimension: {dimension}")
+
+    def combine_masks(self, masks):
+        """ AND of the per-dimension masks (None = no filter) and the allowed-tag rule. """
+        masks = [mask for mask in masks if mask is not None]
+        if 'show_tags_cleaned' in self.columns:
+            masks.append(self.has_allowed_tag)
+
+        if not masks:
+            return np.ones(self.n_rows, dtype = bool)
+
+        return np.logical_and.reduce(masks)
+
+    def get_mask(
+        self,
+        selected_djs     = None,
+        selected_genres  = None,
+        selected_artists = None,
+        date_range       = None,
+        play_count_range = None,
+        fav_count_range  = None,
+        energy_range     = None,
+        bpm_range        = None,
+        arc_builds       = None,
+    ):
+        """ Combined boolean mask for a set of filter values (None / empty = no filter). """
+        filters = {
+            'selected_djs':     selected_djs,
+            'selected_genres':  selected_genres,
+            'selected_artists': selected_artists,
+            'date_range':       date_range,
+            'play_count_range': play_count_range,
+            'fav_count_range':  fav_count_range,
+            'energy_range':     energy_range,
+            'bpm_range':        bpm_range,
+            'arc_builds':       arc_builds,
+        }
+        return self.combine_masks(self.get_filter_mask(dimension, filters[dimension]) for dimension in FILTER_DIMENSIONS)
+
+    # Sorting ----
+    def get_sort_order(self, sort_by, descending = True):
+        """ Row order for a sort column, computed once and cached (missing values last). """
+        key = (sort_by, descending)
+        if key not in self.sort_orders:
+            if sort_by == 'date_uploaded':
+                values = np.where(self.date_valid, self.date_days, np.nan).astype(np.float64)
+            else:
+                values = self.numerics[sort_by]
+            self.sort_orders[key] = np.argsort(-values if descending else values, kind = 'stable')
+        return self.sort_orders[key]
+
+    def get_rows(self, mask, sort_by = None, descending = True):
+        """ Positions of the rows in `mask`, in catalog order or sorted by `sort_by`. """
+        if sort_by is None:
+            return np.flatnonzero(mask)
+        order = self.get_sort_order(sort_by, descending)
+        return order[mask[order]]
+
+    def apply(self, data, sort_by = None, descending = True, **filters):
+        """ Rows of `data` (the frame the index was built from) matching the filters. """
+        return data.iloc[self.get_rows(self.get_mask(**filters), sort_by, descending)]
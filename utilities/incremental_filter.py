@@ -0,0 +1,113 @@
+
+# Imports ----
+import threading
+from collections import OrderedDict
+
+from utilities.filter_engine import FILTER_DIMENSIONS
+
+
+# Helpers ----
+def get_filter_key(dimension, value):
+    """ Hashable cache key for a filter value (DJ / genre selections are order-free). """
+    if value is None:
+        return None
+    if dimension in ('selected_djs', 'selected_genres', 'selected_artists'):
+        return tuple(sorted(value))
+    if isinstance(value, (list, tuple)):
+        return tuple(value)
+    return value
+
+
+# Incremental Filter ----
+class IncrementalFilter:
+    """ Per-dimension mask cache in front of a SetFilterIndex.
+
+    Each filter dimension (DJ, genre, artist, date, plays, favourites, energy, BPM, arc)
+    keeps a small LRU of masks keyed by that filter's value, so changing one
+    control recomputes only its mask; the cached masks of the others are
+    reused and the masks are combined again. The combined mask is cached as
+    well, for re-applying unchanged filters (e.g. after changing the sort).
+
+    Cached masks are read-only and shared, so one instance can serve every
+    session of the dataset it was built for.
+
+    Args:
+        index (SetFilterIndex): Index to compute masks from.
+        max_entries (int, optional): Masks kept per dimension. Defaults to 8.
+    """
+
+    def __init__(self, index, max_entries = 8):
+        self.index = index
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        """ Drop every cached mask and reset the stats. """
+        self.masks = {dimension: OrderedDict() for dimension in FILTER_DIMENSIONS + ['combined']}
+        self.stats = {dimension: {'hits': 0, 'misses': 0} for dimension in self.masks}
+
+    # Cache ----
+    def _get_cached(self, dimension, key, compute):
+        cache = self.masks[dimension]
+
+        with self.lock:
+            if key in cache:
+                cache.move_to_end(key)
+                self.stats[dimension]['hits'] += 1
+                return cache[key]
+            self.stats[dimension]['misses'] += 1
+
+        mask = compute()
+        if mask is not None:
+            mask.flags.writeable = False
+
+        with self.lock:
+            cache[key] = mask
+            while len(cache) > self.max_entries:
+                cache.popitem(last = False)
+
+        return mask
+
+    # Masks ----
+    def get_filter_mask(self, dimension, value):
+        """ Cached SetFilterIndex.get_filter_mask. """
+        return self._get_cached(
+            dimension,
+            get_filter_key(dimension, value),
+            lambda: self.index.get_filter_mask(dimension, value),
+        )
+
+    def get_mask(self, **filters):
+        """ Combined mask for the filters (same arguments and result as SetFilterIndex.get_mask). """
+        unknown = set(filters) - set(FILTER_DIMENSIONS)
+        if unknown:
+            raise TypeError(f"Unknown filters: {sorted(unknown)}")
+
+        key = tuple(get_filter_key(dimension, filters.get(dimension)) for dimension in FILTER_DIMENSIONS)
+
+        def combine():
+            return self.index.combine_masks(
+                self.get_filter_mask(dimension, filters.get(dimension)) for dimension in FILTER_DIMENSIONS
+            )
+
+        return self._get_cached('combined', key, combine)
+
+    # Stats ----
+    def get_stats(self):
+        """ Hits, misses, hit rate and cached entries per dimension, plus bytes held. """
+        with self.lock:
+            stats = {}
+            for dimension, counts in self.stats.items():
+                lookups = counts['hits'] + counts['misses']
+                stats[dimension] = {
+                    **counts,
+                    'hit_rate': round(counts['hits'] / lookups, 3) if lookups else None,
+                    'entries':  len(self.masks[dimension]),
+                }
+
+            stats['nbytes'] = sum(
+                mask.nbytes for cache in self.masks.values() for mask in cache.values() if mask is not None
+            )
+
+        return stats
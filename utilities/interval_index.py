@@ -0,0 +1,129 @@
+
+# Imports ----
+import numpy as np
+
+
+# Interval Index ----
+class IntervalIndex:
+    """ Static centered interval tree over per-row [start, end] ranges.
+
+    Answers "which rows overlap [low, high]" (start <= high and end >= low) in
+    O(log n + k). Each node keeps the intervals containing its center twice,
+    sorted by start and by end, so the matching ones are found with a binary
+    search; only subtrees that can overlap the query are visited.
+
+    Rows with a missing bound never match (as with NaN comparisons in a mask),
+    and rows with start > end are checked directly so results stay identical to
+    the (start <= high) & (end >= low) mask.
+
+    Args:
+        starts (array-like): Interval starts, one per row.
+        ends (array-like): Interval ends, one per row. Defaults to starts (point intervals).
+        leaf_size (int, optional): Max intervals per node before splitting further. Defaults to 64.
+    """
+
+    def __init__(self, starts, ends = None, leaf_size = 64):
+        starts = np.asarray(starts, dtype = np.float64)
+        ends = starts if ends is None else np.asarray(ends, dtype = np.float64)
+
+        self.n_rows = len(starts)
+        self.leaf_size = leaf_size
+        self.starts = starts
+        self.ends = ends
+
+        valid = ~np.isnan(starts) & ~np.isnan(ends)
+        self.inverted_rows = np.flatnonzero(valid & (starts > ends))
+
+        # - sorted bounds of the valid rows, for counting matches without a query
+        self.sorted_starts = np.sort(starts[valid])
+        self.sorted_ends = np.sort(ends[valid])
+
+        self.nodes = []
+        self.root = self._build(np.flatnonzero(valid & (starts <= ends)))
+
+    # Build ----
+    def _build(self, rows):
+        if len(rows) == 0:
+            return -1
+
+        starts, ends = self.starts[rows], self.ends[rows]
+        center = np.median(np.concatenate([starts, ends]))
+
+        if len(rows) <= self.leaf_size:
+            center_mask = np.ones(len(rows), dtype = bool)
+        else:
+            center_mask = (starts <= center) & (ends >= center)
+
+        here = rows[center_mask]
+        by_start = here[np.argsort(self.starts[here], kind = 'stable')]
+        by_end = here[np.argsort(-self.ends[here], kind = 'stable')]
+
+        node_id = len(self.nodes)
+        self.nodes.append(None)
+
+        left = self._build(rows[~center_mask & (ends < center)])
+        right = self._build(rows[~center_mask & (starts > center)])
+
+        self.nodes[node_id] = {
+            'center':         center,
+            'by_start':       by_start,
+            'starts_sorted':  self.starts[by_start],
+            'by_end':         by_end,
+            'neg_ends_sorted': -self.ends[by_end],
+            'left':           left,
+            'right':          right,
+        }
+
+        return node_id
+
+    # Query ----
+    def query(self, low, high):
+        """ Row ids whose interval overlaps [low, high] (unsorted). """
+        found = []
+        stack = [self.root]
+
+        while stack:
+            node_id = stack.pop()
+            if node_id < 0:
+                continue
+            node = self.nodes[node_id]
+
+            # - node intervals: start <= high and end >= low, using whichever bound can fail
+            n_start_ok = np.searchsorted(node['starts_sorted'], high, side = 'right')
+            n_end_ok = np.searchsorted(node['neg_ends_sorted'], -low, side = 'right')
+
+            if n_start_ok == len(node['by_start']):
+                found.append(node['by_end'][:n_end_ok])
+            elif n_end_ok == len(node['by_end']):
+                found.append(node['by_start'][:n_start_ok])
+            else:
+                candidates = node['by_start'][:n_start_ok]
+                found.append(candidates[self.ends[candidates] >= low])
+
+            # - left subtree ends before the center, right subtree starts after it
+            if low < node['center']:
+                stack.append(node['left'])
+            if high > node['center']:
+                stack.append(node['right'])
+
+        if len(self.inverted_rows):
+            rows = self.inverted_rows
+            found.append(rows[(self.starts[rows] <= high) & (self.ends[rows] >= low)])
+
+        return np.concatenate(found) if found else np.empty(0, dtype = np.int64)
+
+    def count(self, low, high):
+        """ Number of rows overlapping [low, high], from two binary searches.
+
+        Exact for start <= end rows (an interval can't both start after high
+        and end before low); an upper bound when inverted intervals exist.
+        """
+        start_after = len(self.sorted_starts) - np.searchsorted(self.sorted_starts, high, side = 'right')
+        end_before = np.searchsorted(self.sorted_ends, low, side = 'left')
+        return int(len(self.sorted_starts) - start_after - end_before)
+
+    def query_mask(self, low, high):
+        """ Boolean row mask of intervals overlapping [low, high]. """
+        mask = np.zeros(self.n_rows, dtype = bool)
+        mask[self.query(low, high)] = True
+        return mask
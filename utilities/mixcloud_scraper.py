@@ -2,6 +2,7 @@
 import pandas as pd
 import numpy as np
 import re
+import json
 import requests
 import time
 from datetime import datetime, timedelta
@@ -17,6 +18,9 @@ from selenium.webdriver.chrome.service import Service
 from selenium.common.exceptions import NoSuchElementException, TimeoutException
 from tqdm import tqdm
 
+from utilities.artist_index import get_show_artists
+from utilities.energy_arc import get_energy_arcs, ARC_COLUMNS
+
 
 # ------------------------------------------------------------------------------
 # HELPER FUNCTIONS 1 ----
@@ -289,81 +293,92 @@ def get_dj_show_info(driver, dj_info_dict_test, verbose = True):
     if verbose:
             print("=== Step 5: Scraping Show Info... ===")
 
-    all_shows_data = []
-
-    for show_url in dj_info_dict_test['dj_show_urls']:
-
-        if verbose:
-            print(f"   === Scraping data for {show_url}... ===")
-
-        # driver
-        driver.get(show_url)
-
-        # Wait for Page to Load ----
-        wait = WebDriverWait(driver, 10)
-
-        try:
-            # Wait for a key element instead of arbitrary sleep
-            wait.until(EC.presence_of_element_located((By.TAG_NAME, 'h1')))
-        except TimeoutException:
-            print("Timed out waiting for page to load")
-
-        # Sroll Down (Not to the End) ----
-        driver.execute_script("window.scrollBy(0, 300)")
-
-        # Click "Next" Button ----
-        try:
-            next_button = driver.find_element('xpath', '//*[@id="react-root"]/div[1]/div[2]/div[3]/div/div/div[1]/div/div[2]/button')
-            next_button.click()
-            time.sleep(0.5)
-        except NoSuchElementException:
-            print(f"        No next button found for {show_url}, proceeding to scrape.")
-        except Exception as e:
-            print(f"Warning: Error interacting with next button for {show_url}: {str(e)}")
-
-        # Grab Page Source ----
-        soup2 = BS(requests.get(show_url).text, 'html.parser')
-
-        # Scrape Show Info ----
-        show_title = soup2.find_all("h1", class_ = "wS6VZW_title E95hVG_headingMedium")[0].text.strip()
-        show_plays = soup2.find_all("p", class_ = "styles__Label-css-in-js__sc-1yk6zpi-7 gdkxXY")[0].text
-        show_favs = soup2.find_all("p", class_ = "styles__Label-css-in-js__sc-1yk6zpi-7 gdkxXY")[1].text
-        show_posted = soup2.find_all("div", class_ = "styles__TimeSinceDesktop-css-in-js__sc-1yk6zpi-6 cwtjao")[0].get("aria-label")
-        show_tags = get_show_tags(soup2)
-        show_info1 = get_show_info(soup2, 'L1')
-        show_info2 = get_show_info(soup2, 'L2')
-        show_info3 = get_show_info(soup2, 'L3')
-        show_info4 = get_show_info(soup2, 'L4')
-        show_info5 = soup2.find('div', class_ = 'styles__Paragraph-css-in-js__sc-12xxm55-1 fhRopu').text.strip()
-
-        # Append Data to List ----
-        show_data = {
-            'title': show_title,
-            'play_count': show_plays,
-            'fav_count': show_favs,
-            'date_posted': show_posted,
-            'show_tags': show_tags,
-            'show_info1': show_info1,
-            'show_info2': show_info2,
-            'show_info3': show_info3,
-            'show_info4': show_info4,
-            'show_info5': show_info5,
-            'show_url': show_url
-        }
-
-        # print("  === Appending Data to Data List... ===")
-        all_shows_data.append(show_data)
+    all_shows_data = list(iter_dj_show_info(driver, dj_info_dict_test, verbose = verbose))
 
     if verbose:
         # print(f"   === Data for {show_url} appended to list ✅ ===")
         print("=== Step 5 Completed: All Shows Scraped ✅ === \n")
 
-    # - close driver ----
-    driver.quit()
-
     # - return data ----
     return all_shows_data
 
+
+# Function: Iterate Show Info ----
+def iter_dj_show_info(driver, dj_info_dict_test, verbose = True):
+    """ Yield each show's data as soon as its page is scraped (closes the driver when done).
+
+    Args:
+        driver (webdriver): Selenium WebDriver instance.
+        dj_info_dict_test (dict): DJ info with the show urls to scrape.
+        verbose (bool, optional): Whether to print verbose output. Defaults to True.
+    """
+    try:
+        for show_url in dj_info_dict_test['dj_show_urls']:
+
+            if verbose:
+                print(f"   === Scraping data for {show_url}... ===")
+
+            # driver
+            driver.get(show_url)
+
+            # Wait for Page to Load ----
+            wait = WebDriverWait(driver, 10)
+
+            try:
+                # Wait for a key element instead of arbitrary sleep
+                wait.until(EC.presence_of_element_located((By.TAG_NAME, 'h1')))
+            except TimeoutException:
+                print("Timed out waiting for page to load")
+
+            # Sroll Down (Not to the End) ----
+            driver.execute_script("window.scrollBy(0, 300)")
+
+            # Click "Next" Button ----
+            try:
+                next_button = driver.find_element('xpath', '//*[@id="react-root"]/div[1]/div[2]/div[3]/div/div/div[1]/div/div[2]/button')
+                next_button.click()
+                time.sleep(0.5)
+            except NoSuchElementException:
+                print(f"        No next button found for {show_url}, proceeding to scrape.")
+            except Exception as e:
+                print(f"Warning: Error interacting with next button for {show_url}: {str(e)}")
+
+            # Grab Page Source ----
+            soup2 = BS(requests.get(show_url).text, 'html.parser')
+
+            # Scrape Show Info ----
+            show_title = soup2.find_all("h1", class_ = "wS6VZW_title E95hVG_headingMedium")[0].text.strip()
+            show_plays = soup2.find_all("p", class_ = "styles__Label-css-in-js__sc-1yk6zpi-7 gdkxXY")[0].text
+            show_favs = soup2.find_all("p", class_ = "styles__Label-css-in-js__sc-1yk6zpi-7 gdkxXY")[1].text
+            show_posted = soup2.find_all("div", class_ = "styles__TimeSinceDesktop-css-in-js__sc-1yk6zpi-6 cwtjao")[0].get("aria-label")
+            show_tags = get_show_tags(soup2)
+            show_info1 = get_show_info(soup2, 'L1')
+            show_info2 = get_show_info(soup2, 'L2')
+            show_info3 = get_show_info(soup2, 'L3')
+            show_info4 = get_show_info(soup2, 'L4')
+            show_info5 = soup2.find('div', class_ = 'styles__Paragraph-css-in-js__sc-12xxm55-1 fhRopu').text.strip()
+
+            # Show Data ----
+            show_data = {
+                'title': show_title,
+                'play_count': show_plays,
+                'fav_count': show_favs,
+                'date_posted': show_posted,
+                'show_tags': show_tags,
+                'show_info1': show_info1,
+                'show_info2': show_info2,
+                'show_info3': show_info3,
+                'show_info4': show_info4,
+                'show_info5': show_info5,
+                'show_url': show_url
+            }
+
+            yield show_data
+
+    finally:
+        # - close driver ----
+        driver.quit()
+
 # Pandas DataFrame ----
 def get_dataframe(all_shows_data):
     """ Convert the list of show data to a Pandas DataFrame.
@@ -445,6 +460,17 @@ def get_formatted_dataframe(data):
             'show_info5': 'artists_list'
     })
 
+    # - artists & track lists (normalised entities for the artist index) ----
+    artists, track_lists = get_show_artists(df)
+    df.insert(df.columns.get_loc('show_url'), 'artists', [', '.join(names) for names in artists])
+    df.insert(df.columns.get_loc('show_url'), 'track_list', [json.dumps(tracks) for tracks in track_lists])
+
+    # - energy arc (chapters, start / peak / end energy & bpm, monotonic build) ----
+    arcs = get_energy_arcs(df)
+    arcs['chapters'] = arcs['chapters'].map(' > '.join)
+    for col in ARC_COLUMNS:
+        df.insert(df.columns.get_loc('show_url'), col, arcs[col])
+
     return df
 
 # ------------------------------------------------------------------------------
@@ -470,7 +496,10 @@ def scrape_mixcloud_main(
     scroll_number: int     = 10,
 
     # soup
-    test_size: int = 2
+    test_size: int = 2,
+
+    # output
+    format_data: bool = True,
 ):
     """_summary_
 
@@ -483,6 +512,8 @@ def scrape_mixcloud_main(
         scroll_sleep_time (int, optional): _description_. Defaults to 3.
         scroll_number (int, optional): _description_. Defaults to 10.
         test_size (int, optional): An optional parameter to test by specifying the number of shows to scrape. Defaults to 2.
+        format_data (bool, optional): Format the shows (counts, dates, energy, tags, artists). When False the raw
+            scraped shows are returned, for pipelines that format them as a separate step. Defaults to True.
 
     Returns:
         List: Returns a list of two dataframes: DJ info and DJ shows.
@@ -556,13 +587,70 @@ def scrape_mixcloud_main(
     main_pbar.update(1)
 
     # Format DataFrame ----
-    dj_shows_df = get_formatted_dataframe(df)
+    dj_shows_df = get_formatted_dataframe(df) if format_data else df
     main_pbar.update(1)
 
     # Return ----
     return [dj_info_df, dj_shows_df]
 
 
+# ------------------------------------------------------------------------------
+# STREAMING ----
+# ------------------------------------------------------------------------------
+def scrape_mixcloud_stream(
+    driver_path: str = '/Users/BachataLu/Desktop/School/2025_Projects/mixcloud_zouk_experience/chromedriver',
+    headless: bool = True,
+    dj_url: str = None,
+    wait_time: int = 11,
+    verbose: bool = False,
+    scroll_sleep_time: int = 3,
+    scroll_number: int = 10,
+    test_size: int = 0,
+):
+    """ Streaming version of scrape_mixcloud_main.
+
+    The DJ page is loaded and scrolled up front; the shows are then scraped
+    lazily, one record per show as soon as its page is parsed, so formatting
+    and indexing can start before the whole DJ is done.
+
+    Args:
+        Same as scrape_mixcloud_main.
+
+    Returns:
+        tuple: (DJ info dataframe, generator of raw show records (get_dataframe columns)).
+    """
+    chrome_driver = get_chrome_driver(
+        driver_path = driver_path,
+        dj_url      = dj_url,
+        headless    = headless,
+        wait_time   = wait_time,
+        verbose     = verbose,
+    )
+    scrolled_driver = get_scroll_page(
+        driver            = chrome_driver,
+        scroll_sleep_time = scroll_sleep_time,
+        scroll_number     = scroll_number,
+        verbose           = verbose
+    )
+    dj_info_dict = get_dj_info(soup = get_page_source(driver = scrolled_driver, verbose = verbose), verbose = verbose)
+
+    dj_info_df = pd.DataFrame({
+        'DJ Name': [dj_info_dict['dj_name']],
+        'DJ Info': [dj_info_dict['dj_info']],
+        'DJ Followers': [dj_info_dict['dj_followers']],
+        'DJ Following': [dj_info_dict['dj_following']]
+    })
+
+    if test_size > 0:
+        dj_info_dict = get_test_size(dj_info = dj_info_dict, test_size = test_size, verbose = verbose)
+
+    def iter_shows():
+        for show in iter_dj_show_info(scrolled_driver, dj_info_dict, verbose = verbose):
+            yield {**show, 'name': dj_info_dict['dj_name']}
+
+    return dj_info_df, iter_shows()
+
+
 # - Test the main function
 # result = scrape_mixcloud_main(
 #     dj_url = 'https://www.mixcloud.com/djsprenk',
@@ -0,0 +1,535 @@
+
+# Imports ----
+import json
+import os
+import uuid
+
+import numpy as np
+
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+from utilities.product_quantizer import ProductQuantizer, N_SUBSPACES, SAMPLE_SIZE as PQ_SAMPLE_SIZE
+
+
+# Files ----
+META_FILE = 'numpy_store.json'
+VECTORS_FILE = 'vectors.npy'
+SCALES_FILE = 'scales.npy'
+DOCUMENTS_FILE = 'documents.jsonl'
+HNSW_FILE = 'hnsw.bin'
+CODEBOOKS_FILE = 'pq_codebooks.npy'
+RESCORE_FILE = 'rescore.npy'
+
+DTYPES = ('float32', 'float16', 'int8', 'pq')
+
+# - candidates fetched per result when re-scoring with the full-precision vectors
+RESCORE_FACTOR = 4
+
+# - rows scored per matmul, so int8 / float16 blocks are upcast a slice at a time
+BLOCK_ROWS = 65_536
+
+
+# Helpers ----
+def l2_normalize(vectors):
+    vectors = np.asarray(vectors, dtype = np.float32)
+    norms = np.linalg.norm(vectors, axis = -1, keepdims = True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def quantize(vectors, dtype):
+    """ Normalised float32 vectors -> (stored vectors, per-row scales or None).
+
+    int8 uses a symmetric per-row scale (row max -> 127); float16 / float32 are cast.
+    """
+    if dtype == 'int8':
+        scales = np.abs(vectors).max(axis = 1) / 127.0
+        scales = np.where(scales == 0, 1.0, scales).astype(np.float32)
+        return np.round(vectors / scales[:, None]).astype(np.int8), scales
+    return vectors.astype(dtype), None
+
+
+def is_numpy_store(path):
+    """ True when `path` holds a saved NumpyVectorStore. """
+    return os.path.exists(os.path.join(path, META_FILE))
+
+
+def get_top_k(scores, k):
+    """ (indices, scores) of the k highest scores per row, best first. """
+    k = min(k, scores.shape[1])
+    if k <= 0:
+        return np.empty((len(scores), 0), dtype = np.int64), np.empty((len(scores), 0), dtype = np.float32)
+    top = np.argpartition(-scores, k - 1, axis = 1)[:, :k]
+    top_scores = np.take_along_axis(scores, top, axis = 1)
+    order = np.argsort(-top_scores, axis = 1, kind = 'stable')
+    return np.take_along_axis(top, order, axis = 1), np.take_along_axis(top_scores, order, axis = 1)
+
+
+# Filters ----
+def get_filter_mask(columns, filter, n_rows):
+    """ Rows matching a Chroma-style metadata filter.
+
+    Supports {field: value}, {field: {'$eq' | '$ne' | '$gt' | '$gte' | '$lt' |
+    '$lte' | '$in' | '$nin': value}} and {'$and' | '$or': [filters]}.
+
+    Args:
+        columns (callable): field -> np.ndarray of that metadata field per row.
+        filter (dict): The filter.
+        n_rows (int): Rows in the store.
+    """
+    masks = []
+    for key, condition in filter.items():
+        if key in ('$and', '$or'):
+            parts = [get_filter_mask(columns, part, n_rows) for part in condition]
+            masks.append(np.logical_and.reduce(parts) if key == '$and' else np.logical_or.reduce(parts))
+            continue
+
+        values = columns(key)
+        conditions = condition if isinstance(condition, dict) else {'$eq': condition}
+        for op, target in conditions.items():
+            if op == '$eq':
+                masks.append(values == target)
+            elif op == '$ne':
+                masks.append(values != target)
+            elif op in ('$in', '$nin'):
+                targets = set(target)
+                inside = np.array([value in targets for value in values], dtype = bool)
+                masks.append(inside if op == '$in' else ~inside)
+            elif op in ('$gt', '$gte', '$lt', '$lte'):
+                numeric = np.array([v if isinstance(v, (int, float)) and not isinstance(v, bool) else np.nan for v in values], dtype = np.float64)
+                compare = {'$gt': np.greater, '$gte': np.greater_equal, '$lt': np.less, '$lte': np.less_equal}[op]
+                with np.errstate(invalid = 'ignore'):
+                    masks.append(compare(numeric, target))
+            else:
+                raise ValueError(f"Unsupported filter operator: {op}")
+
+    return np.logical_and.reduce(masks) if masks else np.ones(n_rows, dtype = bool)
+
+
+# Vector Store ----
+class NumpyVectorStore(VectorStore):
+    """ Local vector store on a (memory-mapped) NumPy matrix.
+
+    Vectors are L2-normalised and stored as float32, float16, int8 (with a
+    per-row scale) or product-quantised codes (see product_quantizer), so
+    scores are cosine similarities. With `rescore`, a float32 copy is kept
+    next to the compressed vectors, memory-mapped and only read for the
+    `k * rescore_factor` candidates, which are re-scored exactly before the
+    top k are returned. A saved store is opened
+    with np.load(mmap_mode = 'r'): loading maps the file instead of reading
+    it, and the documents / metadata are only read when first needed.
+
+    Search is an exact, batched matrix product over blocks of rows (top-k by
+    argpartition), or an HNSW graph (hnswlib, installed with Chroma) when the
+    store was saved with one. Metadata filters use the Chroma filter syntax
+    and are evaluated as masks over per-field columns; filtered queries are
+    always exact.
+
+    Works anywhere a LangChain vectorstore is expected (as_retriever,
+    similarity_search, add_documents) and answers Chroma-style get() calls.
+
+    'pq' is not a drop-in replacement: its codebooks must be trained first
+    with `fit_pq` on a representative sample, and it trades recall for
+    memory. In 16_benchmark_quantization.py (100k x 1536) pq96 + rescore
+    has recall@10 0.38 at ~83 ms per query, against 1.0 at ~13 ms for
+    float32; int8 + rescore keeps recall@10 at 1.0 in 1/4 of the memory.
+
+    Args:
+        embedding (Embeddings): Embedding function for queries and added texts.
+        dtype (str, optional): 'float32', 'float16', 'int8' or 'pq'. Defaults to 'float16'.
+        rescore (bool, optional): Keep full-precision vectors and re-score the candidates
+            with them. Defaults to False.
+        rescore_factor (int, optional): Candidates per result re-scored. Defaults to 4.
+        pq_subspaces (int, optional): Bytes per vector for 'pq'; must divide the
+            dimension. Defaults to 96.
+
+    Raises:
+        ValueError: On adding vectors to a 'pq' store before `fit_pq`.
+    """
+
+    def __init__(self, embedding, dtype = 'float16', rescore = False, rescore_factor = RESCORE_FACTOR, pq_subspaces = N_SUBSPACES):
+        if dtype not in DTYPES:
+            raise ValueError(f"dtype must be one of {DTYPES}")
+
+        self.embedding = embedding
+        self.dtype = dtype
+        self.rescore = rescore
+        self.rescore_factor = rescore_factor
+        self.pq_subspaces = pq_subspaces
+        self.path = None
+
+        self.vectors = None
+        self.scales = None
+        self.pq = None
+        self.full = None
+        self.hnsw = None
+        self._ids = []
+        self._records = []
+        self._row_ids = None
+        self._columns = {}
+
+    # Properties ----
+    @property
+    def embeddings(self):
+        return self.embedding
+
+    def __len__(self):
+        return 0 if self.vectors is None else len(self.vectors)
+
+    @property
+    def ids(self):
+        self._load_documents()
+        return self._ids
+
+    @property
+    def records(self):
+        self._load_documents()
+        return self._records
+
+    @property
+    def row_ids(self):
+        if self._row_ids is None:
+            self._row_ids = {id_: row for row, id_ in enumerate(self.ids)}
+        return self._row_ids
+
+    @property
+    def dim(self):
+        return self.pq.dim if self.pq is not None else self.vectors.shape[1]
+
+    def get_nbytes(self):
+        """ Bytes searched per query: vectors or codes, scales and codebooks (not the rescore copy). """
+        nbytes = sum(array.nbytes for array in (self.vectors, self.scales) if array is not None)
+        return nbytes + (self.pq.get_nbytes() if self.pq is not None else 0)
+
+    def get_rescore_nbytes(self):
+        """ Bytes of the full-precision rescore copy (on disk, paged in per candidate). """
+        return 0 if self.full is None else self.full.nbytes
+
+    def fit_pq(self, vectors):
+        """ Train the 'pq' codebooks on a representative sample (at least 256 vectors, see ProductQuantizer.fit). """
+        self.pq = ProductQuantizer(n_subspaces = self.pq_subspaces).fit(l2_normalize(vectors))
+        return self
+
+    def _encode(self, vectors):
+        if self.dtype != 'pq':
+            return quantize(vectors, self.dtype)
+        if self.pq is None:
+            raise ValueError("A 'pq' store needs trained codebooks: call fit_pq on a representative sample first")
+        return self.pq.encode(vectors), None
+
+    # Adding ----
+    def add_vectors(self, vectors, texts, metadatas = None, ids = None):
+        """ Add precomputed embeddings (ids already in the store are replaced). """
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = list(metadatas) if metadatas is not None else [{} for _ in texts]
+        ids = list(ids) if ids is not None else [str(uuid.uuid4()) for _ in texts]
+
+        self.delete([id_ for id_ in ids if id_ in self.row_ids])
+
+        normalized = l2_normalize(vectors)
+        stored, scales = self._encode(normalized)
+        if self.vectors is None or len(self.vectors) == 0:
+            self.vectors, self.scales = stored, scales
+            self.full = normalized if self.rescore else None
+        else:
+            self.vectors = np.concatenate([self.vectors, stored])
+            self.scales = np.concatenate([self.scales, scales]) if scales is not None else None
+            self.full = np.concatenate([self.full, normalized]) if self.rescore else None
+
+        self._records.extend({'page_content': text, 'metadata': metadata or {}} for text, metadata in zip(texts, metadatas))
+        self._ids.extend(ids)
+        self._reset_lookups()
+        return ids
+
+    def add_texts(self, texts, metadatas = None, ids = None, **kwargs):
+        texts = list(texts)
+        return self.add_vectors(self.embedding.embed_documents(texts), texts, metadatas, ids)
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas = None, ids = None, dtype = 'float16', rescore = False, **kwargs):
+        store = cls(embedding, dtype = dtype, rescore = rescore)
+        store.add_texts(texts, metadatas, ids)
+        return store
+
+    @classmethod
+    def from_chroma(cls, chroma, embedding = None, dtype = 'float16', rescore = False, batch_size = 10_000):
+        """ Copy the vectors, documents and metadata of a Chroma vectorstore.
+
+        For 'pq', the codebooks are trained on the first PQ_SAMPLE_SIZE vectors of the collection.
+        """
+        store = cls(embedding or chroma.embeddings, dtype = dtype, rescore = rescore)
+        n_rows = chroma._collection.count()
+        if dtype == 'pq':
+            sample = chroma.get(include = ['embeddings'], limit = PQ_SAMPLE_SIZE)
+            store.fit_pq(np.asarray(sample['embeddings'], dtype = np.float32))
+        for offset in range(0, n_rows, batch_size):
+            batch = chroma.get(include = ['embeddings', 'documents', 'metadatas'], limit = batch_size, offset = offset)
+            store.add_vectors(np.asarray(batch['embeddings'], dtype = np.float32), batch['documents'], batch['metadatas'], batch['ids'])
+        return store
+
+    def delete(self, ids = None, **kwargs):
+        rows = sorted(self.row_ids[id_] for id_ in (ids or []) if id_ in self.row_ids)
+        if not rows:
+            return True
+
+        keep = np.ones(len(self), dtype = bool)
+        keep[rows] = False
+        self.vectors = np.asarray(self.vectors)[keep]
+        self.scales = np.asarray(self.scales)[keep] if self.scales is not None else None
+        self.full = np.asarray(self.full)[keep] if self.full is not None else None
+        self._records = [record for record, kept in zip(self.records, keep) if kept]
+        self._ids = [id_ for id_, kept in zip(self.ids, keep) if kept]
+        self._reset_lookups()
+        return True
+
+    def _reset_lookups(self):
+        self._row_ids = None
+        self._columns = {}
+        self.hnsw = None
+
+    # Persistence ----
+    def save(self, path, hnsw = False, ef_construction = 200, m = 16):
+        """ Write the store to `path` (vectors as .npy, documents as JSON lines).
+
+        Args:
+            path (str): Directory.
+            hnsw (bool, optional): Also build and save an HNSW graph for unfiltered
+                queries (needs hnswlib). Defaults to False.
+            ef_construction (int, optional): HNSW build quality. Defaults to 200.
+            m (int, optional): HNSW graph degree. Defaults to 16.
+        """
+        os.makedirs(path, exist_ok = True)
+        if path == self.path:
+            # - never overwrite the file the vectors are mapped from
+            self._load_documents()
+            self.vectors = np.array(self.vectors)
+            self.scales = np.array(self.scales) if self.scales is not None else None
+            self.full = np.array(self.full) if self.full is not None else None
+
+        np.save(os.path.join(path, VECTORS_FILE), np.asarray(self.vectors))
+        if self.scales is not None:
+            np.save(os.path.join(path, SCALES_FILE), np.asarray(self.scales))
+        if self.pq is not None:
+            np.save(os.path.join(path, CODEBOOKS_FILE), self.pq.codebooks)
+        if self.full is not None:
+            np.save(os.path.join(path, RESCORE_FILE), np.asarray(self.full))
+
+        with open(os.path.join(path, DOCUMENTS_FILE), 'w') as f:
+            for id_, record in zip(self.ids, self.records):
+                f.write(json.dumps({'id': id_, **record}, default = str) + '\n')
+
+        if hnsw:
+            self.build_hnsw(ef_construction = ef_construction, m = m)
+            self.hnsw.save_index(os.path.join(path, HNSW_FILE))
+
+        with open(os.path.join(path, META_FILE), 'w') as f:
+            json.dump({
+                'dtype':          self.dtype,
+                'count':          len(self),
+                'dim':            int(self.dim),
+                'hnsw':           hnsw,
+                'rescore':        self.full is not None,
+                'rescore_factor': self.rescore_factor,
+                'pq_subspaces':   self.pq_subspaces,
+            }, f)
+
+        self.path = path
+        return path
+
+    @classmethod
+    def load(cls, path, embedding, mmap = True):
+        """ Open a saved store; the vectors are memory-mapped unless mmap is False. """
+        with open(os.path.join(path, META_FILE)) as f:
+            meta = json.load(f)
+
+        store = cls(
+            embedding,
+            dtype          = meta['dtype'],
+            rescore        = meta.get('rescore', False),
+            rescore_factor = meta.get('rescore_factor', RESCORE_FACTOR),
+            pq_subspaces   = meta.get('pq_subspaces', N_SUBSPACES),
+        )
+        store.path = path
+        mmap_mode = 'r' if mmap else None
+        store.vectors = np.load(os.path.join(path, VECTORS_FILE), mmap_mode = mmap_mode)
+        if os.path.exists(os.path.join(path, SCALES_FILE)):
+            store.scales = np.load(os.path.join(path, SCALES_FILE), mmap_mode = mmap_mode)
+        if os.path.exists(os.path.join(path, CODEBOOKS_FILE)):
+            store.pq = ProductQuantizer.from_codebooks(np.load(os.path.join(path, CODEBOOKS_FILE)))
+        if store.rescore:
+            # - always mapped: only the candidates' rows are ever read
+            store.full = np.load(os.path.join(path, RESCORE_FILE), mmap_mode = 'r')
+
+        store._records = None
+        if meta.get('hnsw'):
+            store.load_hnsw(os.path.join(path, HNSW_FILE), meta['dim'])
+        return store
+
+    def _load_documents(self):
+        if self._records is not None:
+            return
+        self._ids, self._records = [], []
+        with open(os.path.join(self.path, DOCUMENTS_FILE)) as f:
+            for line in f:
+                record = json.loads(line)
+                self._ids.append(record.pop('id'))
+                self._records.append(record)
+
+    # HNSW ----
+    def build_hnsw(self, ef_construction = 200, m = 16, ef = 100):
+        import hnswlib
+
+        index = hnswlib.Index(space = 'ip', dim = self.dim)
+        index.init_index(max_elements = max(len(self), 1), ef_construction = ef_construction, M = m)
+        for start in range(0, len(self), BLOCK_ROWS):
+            index.add_items(self._get_block(start, start + BLOCK_ROWS), np.arange(start, min(start + BLOCK_ROWS, len(self))))
+        index.set_ef(ef)
+        self.hnsw = index
+
+    def load_hnsw(self, path, dim, ef = 100):
+        import hnswlib
+
+        index = hnswlib.Index(space = 'ip', dim = dim)
+        index.load_index(path, max_elements = len(self))
+        index.set_ef(ef)
+        self.hnsw = index
+
+    # Search ----
+    def _get_block(self, start, stop):
+        if self.pq is not None:
+            return self.pq.decode(self.vectors[start:stop])
+        block = np.asarray(self.vectors[start:stop], dtype = np.float32)
+        if self.scales is not None:
+            block *= np.asarray(self.scales[start:stop])[:, None]
+        return block
+
+    def _score_block(self, queries, lookup_tables, start, stop):
+        if self.pq is not None:
+            return self.pq.score(lookup_tables, self.vectors[start:stop])
+        return queries @ self._get_block(start, stop).T
+
+    def _get_rows(self, rows):
+        """ Vectors of `rows`: the full-precision copy when kept, else the dequantised vectors. """
+        if self.full is not None:
+            return np.asarray(self.full[rows], dtype = np.float32)
+        if self.pq is not None:
+            return self.pq.decode(self.vectors[rows])
+        vectors = np.asarray(self.vectors[rows], dtype = np.float32)
+        if self.scales is not None:
+            vectors *= np.asarray(self.scales[rows])[:, None]
+        return vectors
+
+    def get_column(self, field):
+        """ A metadata field for every row (cached), for filters. """
+        if field not in self._columns:
+            column = np.empty(len(self), dtype = object)
+            column[:] = [record['metadata'].get(field) for record in self.records]
+            self._columns[field] = column
+        return self._columns[field]
+
+    def search_vectors(self, query_vectors, k = 4, filter = None, rescore = None):
+        """ Batched top-k by cosine similarity.
+
+        Args:
+            query_vectors (array-like): (n_queries, dim) query embeddings.
+            k (int, optional): Results per query. Defaults to 4.
+            filter (dict, optional): Chroma-style metadata filter. Defaults to none.
+            rescore (bool, optional): Re-score `k * rescore_factor` candidates with the
+                full-precision vectors. Defaults to whenever they are kept.
+
+        Returns:
+            tuple: (row indices, scores), each (n_queries, <= k), best first.
+        """
+        queries = l2_normalize(np.atleast_2d(query_vectors))
+        if len(self) == 0:
+            return get_top_k(np.empty((len(queries), 0), dtype = np.float32), k)
+
+        rescore = self.full is not None if rescore is None else rescore and self.full is not None
+        if not rescore:
+            return self._search(queries, k, filter)
+
+        # - compressed search for candidates, exact scores for the final order ----
+        rows, _ = self._search(queries, k * self.rescore_factor, filter)
+        candidates = np.asarray(self.full[rows.ravel()], dtype = np.float32).reshape(*rows.shape, -1)
+        top, scores = get_top_k(np.einsum('qcd,qd->qc', candidates, queries), k)
+        return np.take_along_axis(rows, top, axis = 1), scores
+
+    def _search(self, queries, k, filter = None):
+        if filter:
+            rows = np.flatnonzero(get_filter_mask(self.get_column, filter, len(self)))
+            if len(rows) == 0:
+                return get_top_k(np.empty((len(queries), 0), dtype = np.float32), k)
+            indices, scores = get_top_k(queries @ self._get_rows(rows).T, k)
+            return rows[indices], scores
+
+        if self.hnsw is not None:
+            labels, distances = self.hnsw.knn_query(queries, k = min(k, len(self)))
+            return labels.astype(np.int64), (1.0 - distances).astype(np.float32)
+
+        # - exact over the stored vectors: keep the running top-k over blocks of rows ----
+        lookup_tables = self.pq.get_lookup_tables(queries) if self.pq is not None else None
+        best_rows = np.empty((len(queries), 0), dtype = np.int64)
+        best_scores = np.empty((len(queries), 0), dtype = np.float32)
+        for start in range(0, len(self), BLOCK_ROWS):
+            block_scores = self._score_block(queries, lookup_tables, start, start + BLOCK_ROWS)
+            block_rows, block_scores = get_top_k(block_scores, k)
+            merged_rows = np.concatenate([best_rows, block_rows + start], axis = 1)
+            merged_scores = np.concatenate([best_scores, block_scores], axis = 1)
+            top, best_scores = get_top_k(merged_scores, k)
+            best_rows = np.take_along_axis(merged_rows, top, axis = 1)
+
+        return best_rows, best_scores
+
+    def _to_documents(self, rows, scores):
+        return [
+            (Document(page_content = self.records[row]['page_content'], metadata = dict(self.records[row]['metadata']), id = self.ids[row]), float(score))
+            for row, score in zip(rows, scores)
+        ]
+
+    def similarity_search_with_score_by_vector(self, embedding, k = 4, filter = None, **kwargs):
+        rows, scores = self.search_vectors([embedding], k, filter)
+        return self._to_documents(rows[0], scores[0])
+
+    def similarity_search_with_score(self, query, k = 4, filter = None, **kwargs):
+        return self.similarity_search_with_score_by_vector(self.embedding.embed_query(query), k, filter)
+
+    def similarity_search_by_vector(self, embedding, k = 4, filter = None, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter)]
+
+    def similarity_search(self, query, k = 4, filter = None, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def batch_similarity_search_by_vector(self, embeddings, k = 4, filter = None):
+        """ Top-k documents for many query embeddings with one batched search. """
+        rows, scores = self.search_vectors(embeddings, k, filter)
+        return [[doc for doc, _ in self._to_documents(r, s)] for r, s in zip(rows, scores)]
+
+    def batch_similarity_search(self, queries, k = 4, filter = None):
+        """ Top-k documents for many queries with one embedding call and one batched search. """
+        return self.batch_similarity_search_by_vector(self.embedding.embed_documents(list(queries)), k, filter)
+
+    def _select_relevance_score_fn(self):
+        # - cosine similarity in [-1, 1] -> [0, 1]
+        return lambda score: (score + 1.0) / 2.0
+
+    # Chroma-style access ----
+    def get(self, ids = None, include = ('documents', 'metadatas'), limit = None, offset = 0, where = None):
+        """ Stored items like Chroma's get(): ids plus the requested 'embeddings', 'documents', 'metadatas'. """
+        if ids is not None:
+            rows = [self.row_ids[id_] for id_ in ids if id_ in self.row_ids]
+        elif where:
+            rows = np.flatnonzero(get_filter_mask(self.get_column, where, len(self))).tolist()
+        else:
+            rows = list(range(len(self)))
+        rows = rows[offset:offset + limit if limit is not None else None]
+
+        result = {'ids': [self.ids[row] for row in rows]}
+        if 'embeddings' in include:
+            result['embeddings'] = self._get_rows(np.asarray(rows, dtype = np.int64))
+        if 'documents' in include:
+            result['documents'] = [self.records[row]['page_content'] for row in rows]
+        if 'metadatas' in include:
+            result['metadatas'] = [self.records[row]['metadata'] for row in rows]
+        return result
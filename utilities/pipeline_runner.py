@@ -0,0 +1,295 @@
+
+# Imports ----
+import hashlib
+import importlib.util
+import inspect
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import datetime
+from graphlib import TopologicalSorter
+
+
+# Helpers ----
+def get_hash(*parts):
+    """ sha256 of the parts (json-encoded; objects that aren't json fall back to str). """
+    return hashlib.sha256(json.dumps(parts, sort_keys = True, default = str).encode('utf-8')).hexdigest()
+
+
+def get_code_hash(func):
+    """ Hash of a function's source, so editing a stage invalidates its cache. """
+    try:
+        source = inspect.getsource(func)
+    except (OSError, TypeError):
+        source = getattr(func, '__qualname__', repr(func))
+    return get_hash(source)
+
+
+def get_module_hash(module_name):
+    """ Hash of a module's source file (found without importing it). """
+    spec = importlib.util.find_spec(module_name)
+    if spec is None or not spec.origin or not os.path.exists(spec.origin):
+        raise ModuleNotFoundError(f"No source found for code dependency {module_name!r}")
+    with open(spec.origin, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def get_path_hash(path, cache = None):
+    """ Content hash of a file, or of every file under a directory (None when missing).
+
+    Args:
+        path (str): File or directory.
+        cache (dict, optional): (path, size, mtime) -> hash, so unchanged files aren't read again.
+    """
+    if not os.path.exists(path):
+        return None
+
+    if os.path.isdir(path):
+        files = sorted(
+            os.path.join(root, name) for root, _, names in os.walk(path) for name in names
+        )
+        return get_hash([(os.path.relpath(file, path), get_path_hash(file, cache)) for file in files])
+
+    stat = os.stat(path)
+    key = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    if cache is not None and key in cache:
+        return cache[key]
+
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    file_hash = digest.hexdigest()
+
+    if cache is not None:
+        cache[key] = file_hash
+    return file_hash
+
+
+# Stage ----
+class Stage:
+    """ One step of the pipeline: a function reading `inputs` and writing `outputs`.
+
+    Dependencies are not declared: a stage depends on every stage that writes
+    one of its inputs. Its fingerprint covers its code, the source of the
+    modules in `code_deps`, its params and the content of its inputs, so it
+    is skipped when none of them changed since the last successful run and
+    its outputs still exist. A stage function may return a short summary
+    string, printed with the stage's line when the pipeline is verbose.
+
+    Args:
+        name (str): Unique stage name.
+        func (callable): Called as func(**params); writes the outputs.
+        inputs (list[str], optional): Files / directories read. Defaults to none.
+        outputs (list[str], optional): Files / directories written. Defaults to none.
+        params (dict, optional): Keyword arguments for func (json-serialisable values
+            are part of the fingerprint). Defaults to none.
+        volatile (bool, optional): Depends on the outside world (e.g. scraping), so it
+            runs on every refresh. Defaults to False.
+        code_deps (list[str], optional): Modules the stage delegates to (e.g.
+            'utilities.mixcloud_scraper'); editing them invalidates the stage. Defaults to none.
+    """
+
+    def __init__(self, name, func, inputs = None, outputs = None, params = None, volatile = False, code_deps = None):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs or [])
+        self.outputs = list(outputs or [])
+        self.params = dict(params or {})
+        self.volatile = volatile
+        self.code_deps = list(code_deps or [])
+
+    def __repr__(self):
+        return f"Stage({self.name!r})"
+
+    def get_fingerprint(self, file_hashes = None):
+        return get_hash(
+            self.name,
+            get_code_hash(self.func),
+            [(module, get_module_hash(module)) for module in sorted(self.code_deps)],
+            self.params,
+            [(path, get_path_hash(path, file_hashes)) for path in self.inputs],
+        )
+
+
+# Pipeline ----
+class Pipeline:
+    """ DAG of stages with fingerprinted, cached outputs.
+
+    Stages whose dependencies are done run in parallel (threads: the stages
+    wait on the network, Selenium or native code). After each successful stage
+    its fingerprint is written to the manifest, so an interrupted run resumes
+    where it stopped and a re-run only does the work whose inputs changed.
+    When a stage re-runs but writes identical outputs, its dependants are
+    still skipped.
+
+    Args:
+        stages (list[Stage]): Pipeline stages.
+        manifest_path (str): JSON file with the fingerprints of the last successful runs.
+        max_workers (int, optional): Stages run at once. Defaults to 4.
+        verbose (bool, optional): Print a line per stage. Defaults to True.
+    """
+
+    def __init__(self, stages, manifest_path, max_workers = 4, verbose = True):
+        self.stages = {stage.name: stage for stage in stages}
+        if len(self.stages) != len(stages):
+            raise ValueError("Stage names must be unique.")
+
+        self.manifest_path = manifest_path
+        self.max_workers = max_workers
+        self.verbose = verbose
+        self.lock = threading.Lock()
+
+        writers = {}
+        for stage in stages:
+            for path in stage.outputs:
+                if path in writers:
+                    raise ValueError(f"{path} is written by both {writers[path]} and {stage.name}.")
+                writers[path] = stage.name
+
+        self.dependencies = {
+            stage.name: {writers[path] for path in stage.inputs if path in writers} for stage in stages
+        }
+        # - raises graphlib.CycleError on cycles
+        self.order = list(TopologicalSorter(self.dependencies).static_order())
+
+    # Manifest ----
+    def load_manifest(self):
+        if not os.path.exists(self.manifest_path):
+            return {'stages': {}, 'file_hashes': {}}
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def save_manifest(self, manifest):
+        os.makedirs(os.path.dirname(os.path.abspath(self.manifest_path)), exist_ok = True)
+        tmp_path = f"{self.manifest_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, indent = 2)
+        os.replace(tmp_path, self.manifest_path)
+
+    # Selection ----
+    def get_upstream(self, names):
+        """ The named stages plus everything they depend on. """
+        selected, stack = set(), list(names)
+        while stack:
+            name = stack.pop()
+            if name not in self.stages:
+                raise KeyError(f"Unknown stage: {name}")
+            if name not in selected:
+                selected.add(name)
+                stack.extend(self.dependencies[name])
+        return selected
+
+    def is_up_to_date(self, stage, fingerprint, manifest):
+        record = manifest['stages'].get(stage.name)
+        return (
+            record is not None
+            and record['fingerprint'] == fingerprint
+            and all(os.path.exists(path) for path in stage.outputs)
+        )
+
+    # Run ----
+    def run(self, targets = None, force = (), refresh = False, dry_run = False):
+        """ Run the stages that are out of date.
+
+        Args:
+            targets (list[str], optional): Stages to bring up to date (with their
+                dependencies). Defaults to all.
+            force (list[str], optional): Stages to run even when up to date. Defaults to none.
+            refresh (bool, optional): Also run the volatile stages. Defaults to False.
+            dry_run (bool, optional): Only report what would run (stages whose inputs
+                come from stages that would run are reported as 'pending'). Defaults to False.
+
+        Returns:
+            list[dict]: One record per stage (stage, status, seconds) in completion order;
+                status is 'ran', 'skipped', 'pending' (dry run) or 'failed'.
+        """
+        selected = self.get_upstream(targets) if targets else set(self.stages)
+        force = set(force) | ({name for name in selected if self.stages[name].volatile} if refresh else set())
+
+        manifest = self.load_manifest()
+        file_hashes = manifest.setdefault('file_hashes', {})
+        sorter = TopologicalSorter({name: self.dependencies[name] & selected for name in selected})
+        sorter.prepare()
+
+        report, errors = [], []
+        reran = set()
+
+        def run_stage(stage):
+            # - fingerprint after the dependencies finished, so it sees their new outputs
+            start = time.perf_counter()
+            fingerprint = stage.get_fingerprint(file_hashes)
+            with self.lock:
+                up_to_date = stage.name not in force and self.is_up_to_date(stage, fingerprint, manifest)
+
+            if up_to_date:
+                return {'stage': stage.name, 'status': 'skipped', 'seconds': 0.0}
+
+            if dry_run:
+                reran.add(stage.name)
+                return {'stage': stage.name, 'status': 'pending', 'seconds': 0.0}
+
+            note = stage.func(**stage.params)
+
+            with self.lock:
+                manifest['stages'][stage.name] = {
+                    'fingerprint': fingerprint,
+                    'outputs':     {path: get_path_hash(path, file_hashes) for path in stage.outputs},
+                    'finished_at': datetime.now().isoformat(timespec = 'seconds'),
+                    'seconds':     round(time.perf_counter() - start, 3),
+                }
+                self.save_manifest(manifest)
+
+            record = {'stage': stage.name, 'status': 'ran', 'seconds': round(time.perf_counter() - start, 3)}
+            if isinstance(note, str):
+                record['note'] = note
+            return record
+
+        with ThreadPoolExecutor(max_workers = self.max_workers) as executor:
+            running = {}
+            while sorter.is_active() and not errors:
+                for name in sorter.get_ready():
+                    # - in a dry run, stages downstream of pending ones can't be fingerprinted yet
+                    if dry_run and self.dependencies[name] & reran:
+                        reran.add(name)
+                        report.append({'stage': name, 'status': 'pending', 'seconds': 0.0})
+                        sorter.done(name)
+                        continue
+                    running[executor.submit(run_stage, self.stages[name])] = name
+
+                if not running:
+                    continue
+
+                finished, _ = wait(running, return_when = FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        record = future.result()
+                    except Exception as e:
+                        errors.append((name, e))
+                        record = {'stage': name, 'status': 'failed', 'seconds': None}
+                    else:
+                        sorter.done(name)
+
+                    report.append(record)
+                    if self.verbose:
+                        print(
+                            f"[{record['status']:>7}] {name}"
+                            + (f" ({record['seconds']}s)" if record['seconds'] else '')
+                            + (f": {record['note']}" if record.get('note') else '')
+                        )
+
+            # - let stages already running finish (their results are kept) ----
+            for future in wait(running).done:
+                try:
+                    report.append(future.result())
+                except Exception as e:
+                    errors.append((running[future], e))
+
+        if errors:
+            name, error = errors[0]
+            raise RuntimeError(f"Stage '{name}' failed: {error}") from error
+
+        return report
@@ -0,0 +1,369 @@
+
+# Imports ----
+import argparse
+import json
+import os
+import re
+
+import numpy as np
+import pandas as pd
+
+from utilities.pipeline_runner import Stage, Pipeline, get_hash
+
+
+# Paths ----
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'dev')
+
+# Defaults ----
+EMBEDDING_MODEL = 'text-embedding-ada-002'
+EMBEDDING_BATCH_SIZE = 100
+
+# - the collection get_vectorstore opens (Chroma's default)
+COLLECTION_NAME = 'langchain'
+
+
+# Helpers ----
+def get_dj_slug(dj_url):
+    """ 'https://www.mixcloud.com/djsprenk/' -> 'djsprenk' """
+    return re.sub(r"[^\w-]", '_', dj_url.rstrip('/').split('/')[-1])
+
+
+def get_openai_api_key(credentials_path = 'credentials.yml'):
+    if os.environ.get('OPENAI_API_KEY'):
+        return os.environ['OPENAI_API_KEY']
+    import yaml
+    return yaml.safe_load(open(credentials_path))['openai']
+
+
+def get_embedding_function(model = EMBEDDING_MODEL):
+    """ OpenAIEmbeddings, or the local fake embeddings for model='fake'. """
+    if model == 'fake':
+        from utilities.fake_models import get_fake_embeddings
+        return get_fake_embeddings(latency = 0.0)
+
+    from langchain_openai import OpenAIEmbeddings
+    return OpenAIEmbeddings(model = model, api_key = get_openai_api_key())
+
+
+def get_scalar_metadata(metadata):
+    # - chroma only accepts str / int / float / bool values
+    return {
+        key: value for key, value in metadata.items()
+        if isinstance(value, (str, int, float, bool)) and not (isinstance(value, float) and np.isnan(value))
+    }
+
+
+def write_csv(data, path):
+    # - write to a temporary file first, so an interrupted stage leaves no half-written output
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok = True)
+    data.to_csv(f"{path}.tmp", index = False)
+    os.replace(f"{path}.tmp", path)
+
+
+# Stages ----
+def scrape_dj(dj_url, info_path, raw_shows_path, test_size = 0, scroll_number = 10, headless = True):
+    """ Scrape one DJ page (unformatted shows, so formatting can be cached separately). """
+    from utilities.mixcloud_scraper import scrape_mixcloud_main
+
+    dj_info, raw_shows = scrape_mixcloud_main(
+        dj_url        = dj_url,
+        test_size     = test_size,
+        scroll_number = scroll_number,
+        headless      = headless,
+        verbose       = False,
+        format_data   = False,
+    )
+    write_csv(dj_info, info_path)
+    write_csv(raw_shows, raw_shows_path)
+
+
+def format_shows(raw_shows_path, shows_path):
+    """ Counts, dates, energy / BPM, tags, artists and energy arcs of one DJ's shows. """
+    from utilities.mixcloud_scraper import get_formatted_dataframe
+
+    write_csv(get_formatted_dataframe(pd.read_csv(raw_shows_path)), shows_path)
+
+
+def merge_data(info_paths, shows_paths, info_path, shows_path):
+    """ All DJs into the DJ info / DJ shows files the app and the RAG pipeline read. """
+    df_djs = pd.concat([pd.read_csv(path) for path in info_paths], ignore_index = True) \
+        .drop_duplicates(subset = ['DJ Name'], keep = 'last')
+    df_sets = pd.concat([pd.read_csv(path) for path in shows_paths], ignore_index = True) \
+        .drop_duplicates(subset = ['show_url'], keep = 'last')
+
+    write_csv(df_djs, info_path)
+    write_csv(df_sets, shows_path)
+
+
+def build_documents(info_path, shows_path, documents_path):
+    """ One RAG document per show, streamed to JSON lines with stable ids.
+
+    Shows are read in chunks and rendered in a process pool
+    (document_builder.iter_documents), so memory doesn't grow with the corpus.
+    """
+    from utilities.document_builder import iter_documents, iter_combined_chunks
+    from utilities.chunk_indexer import get_parent_id
+
+    os.makedirs(os.path.dirname(os.path.abspath(documents_path)), exist_ok = True)
+    with open(f"{documents_path}.tmp", 'w') as f:
+        for doc in iter_documents(iter_combined_chunks(info_path, shows_path)):
+            record = {'id': get_parent_id(doc.metadata), 'page_content': doc.page_content, 'metadata': doc.metadata}
+            f.write(json.dumps(record, default = str) + '\n')
+    os.replace(f"{documents_path}.tmp", documents_path)
+
+
+def load_documents(documents_path):
+    with open(documents_path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def embed_documents(documents_path, embeddings_path, model = EMBEDDING_MODEL, batch_size = EMBEDDING_BATCH_SIZE):
+    """ Embeddings of the documents; only documents whose text changed are sent to the model.
+
+    Vectors of the previous run are reused by content hash, so a refresh that
+    changes a few shows embeds just those.
+
+    Returns:
+        str: How many vectors were reused / embedded (printed by a verbose pipeline).
+    """
+    records = load_documents(documents_path)
+    content_hashes = [get_hash(model, record['page_content']) for record in records]
+
+    cached = {}
+    if os.path.exists(embeddings_path):
+        previous = np.load(embeddings_path)
+        cached = dict(zip(previous['content_hashes'].tolist(), previous['vectors']))
+
+    missing = [i for i, content_hash in enumerate(content_hashes) if content_hash not in cached]
+    if missing:
+        embedding_function = get_embedding_function(model)
+        for start in range(0, len(missing), batch_size):
+            batch = missing[start:start + batch_size]
+            vectors = embedding_function.embed_documents([records[i]['page_content'] for i in batch])
+            cached.update(zip((content_hashes[i] for i in batch), np.asarray(vectors, dtype = np.float32)))
+
+    vectors = np.stack([cached[content_hash] for content_hash in content_hashes]) if records else np.empty((0, 0))
+    with open(f"{embeddings_path}.tmp", 'wb') as f:
+        np.savez(
+            f,
+            ids            = np.array([record['id'] for record in records]),
+            content_hashes = np.array(content_hashes),
+            vectors        = vectors.astype(np.float32),
+        )
+    os.replace(f"{embeddings_path}.tmp", embeddings_path)
+
+    return f"embeddings: {len(records) - len(missing)} reused, {len(missing)} new"
+
+
+def build_index(documents_path, embeddings_path, vectorstore_path, collection_name = COLLECTION_NAME):
+    """ Upsert the embedded documents into Chroma and delete shows that are gone. """
+    from langchain_community.vectorstores import Chroma
+
+    records = load_documents(documents_path)
+    embeddings = np.load(embeddings_path)
+    if embeddings['ids'].tolist() != [record['id'] for record in records]:
+        raise ValueError("Embeddings are not aligned with the documents; re-run the embed stage.")
+
+    vectorstore = Chroma(persist_directory = vectorstore_path, collection_name = collection_name)
+    collection = vectorstore._collection
+
+    stale = set(collection.get(include = [])['ids']) - {record['id'] for record in records}
+    if stale:
+        collection.delete(ids = sorted(stale))
+
+    if records:
+        collection.upsert(
+            ids        = [record['id'] for record in records],
+            embeddings = embeddings['vectors'].tolist(),
+            metadatas  = [get_scalar_metadata(record['metadata']) for record in records],
+            documents  = [record['page_content'] for record in records],
+        )
+
+
+def update_popularity(shows_path, history_path, features_path):
+    """ Record the scraped counters and recompute the popularity / trending features. """
+    from utilities.popularity_features import append_counter_snapshot, get_popularity_features, save_popularity_features
+
+    df_sets = pd.read_csv(shows_path)
+    history = append_counter_snapshot(df_sets, path = history_path)
+    features = get_popularity_features(history, upload_dates = df_sets.set_index('show_url')['date_uploaded'])
+    save_popularity_features(features, path = features_path)
+
+
+# Pipeline ----
+def get_pipeline(
+    dj_urls          = (),
+    data_dir         = DATA_DIR,
+    embedding_model  = EMBEDDING_MODEL,
+    test_size        = 0,
+    scroll_number    = 10,
+    headless         = True,
+    max_workers      = 4,
+    verbose          = True,
+):
+    """ scrape -> format -> merge -> document -> embed -> index (and popularity).
+
+    Scraping and formatting run per DJ, so DJs are scraped in parallel and a
+    DJ whose page didn't change is not formatted again. The popularity stage
+    runs alongside the document / embed / index stages. Without `dj_urls` the
+    pipeline starts from the DJ info / DJ shows files already in `data_dir`.
+
+    Args:
+        dj_urls (list[str], optional): Mixcloud DJ pages to scrape. Defaults to none.
+        data_dir (str, optional): Data directory. Defaults to data/dev.
+        embedding_model (str, optional): OpenAI embedding model, or 'fake'. Defaults to ada-002.
+        test_size (int, optional): Shows per DJ (0 = all). Defaults to 0.
+        scroll_number (int, optional): Page scrolls per DJ. Defaults to 10.
+        headless (bool, optional): Headless Chrome. Defaults to True.
+        max_workers (int, optional): Stages run at once. Defaults to 4.
+        verbose (bool, optional): Print a line per stage. Defaults to True.
+
+    Returns:
+        Pipeline: The pipeline (manifest in <data_dir>/pipeline/manifest.json).
+    """
+    work_dir = os.path.join(data_dir, 'pipeline')
+    info_path = os.path.join(data_dir, 'dj_info_test.csv')
+    shows_path = os.path.join(data_dir, 'dj_shows_test.csv')
+    documents_path = os.path.join(work_dir, 'documents.jsonl')
+    embeddings_path = os.path.join(work_dir, 'embeddings.npz')
+
+    stages = []
+    info_paths, shows_paths = [], []
+
+    # - scrape & format, per DJ ----
+    for dj_url in dj_urls:
+        slug = get_dj_slug(dj_url)
+        dj_info_path = os.path.join(work_dir, 'raw', f"{slug}_info.csv")
+        raw_shows_path = os.path.join(work_dir, 'raw', f"{slug}_shows.csv")
+        dj_shows_path = os.path.join(work_dir, 'formatted', f"{slug}_shows.csv")
+
+        stages += [
+            Stage(
+                name      = f"scrape:{slug}",
+                func      = scrape_dj,
+                outputs   = [dj_info_path, raw_shows_path],
+                params    = {
+                    'dj_url':         dj_url,
+                    'info_path':      dj_info_path,
+                    'raw_shows_path': raw_shows_path,
+                    'test_size':      test_size,
+                    'scroll_number':  scroll_number,
+                    'headless':       headless,
+                },
+                volatile  = True,
+                code_deps = ['utilities.mixcloud_scraper'],
+            ),
+            Stage(
+                name      = f"format:{slug}",
+                func      = format_shows,
+                inputs    = [raw_shows_path],
+                outputs   = [dj_shows_path],
+                params    = {'raw_shows_path': raw_shows_path, 'shows_path': dj_shows_path},
+                code_deps = ['utilities.mixcloud_scraper', 'utilities.energy_arc', 'utilities.artist_index'],
+            ),
+        ]
+        info_paths.append(dj_info_path)
+        shows_paths.append(dj_shows_path)
+
+    # - merge ----
+    if dj_urls:
+        stages.append(Stage(
+            name    = 'merge',
+            func    = merge_data,
+            inputs  = info_paths + shows_paths,
+            outputs = [info_path, shows_path],
+            params  = {
+                'info_paths':  info_paths,
+                'shows_paths': shows_paths,
+                'info_path':   info_path,
+                'shows_path':  shows_path,
+            },
+        ))
+
+    # - documents, embeddings, index ----
+    stages += [
+        Stage(
+            name      = 'document',
+            func      = build_documents,
+            inputs    = [info_path, shows_path],
+            outputs   = [documents_path],
+            params    = {'info_path': info_path, 'shows_path': shows_path, 'documents_path': documents_path},
+            code_deps = ['utilities.document_builder', 'utilities.rag_utilities', 'utilities.chunk_indexer'],
+        ),
+        Stage(
+            name    = 'embed',
+            func    = embed_documents,
+            inputs  = [documents_path],
+            outputs = [embeddings_path],
+            params  = {'documents_path': documents_path, 'embeddings_path': embeddings_path, 'model': embedding_model},
+        ),
+        Stage(
+            name    = 'index',
+            func    = build_index,
+            inputs  = [documents_path, embeddings_path],
+            outputs = [os.path.join(data_dir, 'chroma_db')],
+            params  = {
+                'documents_path':   documents_path,
+                'embeddings_path':  embeddings_path,
+                'vectorstore_path': os.path.join(data_dir, 'chroma_db'),
+            },
+        ),
+        Stage(
+            name      = 'popularity',
+            func      = update_popularity,
+            inputs    = [shows_path],
+            outputs   = [os.path.join(data_dir, 'popularity_features.parquet'), os.path.join(data_dir, 'counter_history.parquet')],
+            params    = {
+                'shows_path':    shows_path,
+                'history_path':  os.path.join(data_dir, 'counter_history.parquet'),
+                'features_path': os.path.join(data_dir, 'popularity_features.parquet'),
+            },
+            code_deps = ['utilities.popularity_features'],
+        ),
+    ]
+
+    return Pipeline(
+        stages        = stages,
+        manifest_path = os.path.join(work_dir, 'manifest.json'),
+        max_workers   = max_workers,
+        verbose       = verbose,
+    )
+
+
+# CLI ----
+def main(argv = None):
+    """ mixcloud-pipeline: bring the data, documents and vector index up to date. """
+    parser = argparse.ArgumentParser(prog = 'mixcloud-pipeline', description = main.__doc__)
+    parser.add_argument('--dj-url', action = 'append', default = [], help = 'Mixcloud DJ page to scrape (repeatable).')
+    parser.add_argument('--data-dir', default = DATA_DIR, help = 'Data directory (default: data/dev).')
+    parser.add_argument('--stage', action = 'append', default = [], help = 'Only bring this stage (and its dependencies) up to date.')
+    parser.add_argument('--force', action = 'append', default = [], help = 'Run this stage even if it is up to date.')
+    parser.add_argument('--refresh', action = 'store_true', help = 'Scrape again (downstream stages still only run on changes).')
+    parser.add_argument('--dry-run', action = 'store_true', help = 'Show what would run.')
+    parser.add_argument('--embedding-model', default = EMBEDDING_MODEL, help = "Embedding model, or 'fake' for local runs.")
+    parser.add_argument('--test-size', type = int, default = 0, help = 'Shows per DJ (0 = all).')
+    parser.add_argument('--scroll-number', type = int, default = 10, help = 'Page scrolls per DJ.')
+    parser.add_argument('--max-workers', type = int, default = 4, help = 'Stages run at once.')
+    args = parser.parse_args(argv)
+
+    pipeline = get_pipeline(
+        dj_urls         = args.dj_url,
+        data_dir        = args.data_dir,
+        embedding_model = args.embedding_model,
+        test_size       = args.test_size,
+        scroll_number   = args.scroll_number,
+        max_workers     = args.max_workers,
+    )
+    report = pipeline.run(
+        targets = args.stage or None,
+        force   = args.force,
+        refresh = args.refresh,
+        dry_run = args.dry_run,
+    )
+
+    counts = pd.Series([record['status'] for record in report]).value_counts()
+    print(', '.join(f"{status}: {count}" for status, count in counts.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,171 @@
+
+# Imports ----
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+
+# Paths ----
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'dev')
+COUNTER_HISTORY_PATH = os.path.join(DATA_DIR, 'counter_history.parquet')
+POPULARITY_FEATURES_PATH = os.path.join(DATA_DIR, 'popularity_features.parquet')
+
+# Defaults ----
+# - a favourite says more than a play
+FAV_WEIGHT = 5.0
+
+FEATURE_COLUMNS = ['play_velocity', 'fav_velocity', 'trending_score', 'popularity_score']
+
+
+# Counter History ----
+def get_counter_snapshot(data, scraped_at = None):
+    """ Play / favourite counters of a scrape as history rows (show_url, scraped_at, counts). """
+    return pd.DataFrame({
+        'show_url':   data['show_url'].to_numpy(),
+        'scraped_at': pd.Timestamp(scraped_at or datetime.now()),
+        'play_count': pd.to_numeric(data['play_count'], errors = 'coerce').to_numpy(dtype = np.float64),
+        'fav_count':  pd.to_numeric(data['fav_count'], errors = 'coerce').to_numpy(dtype = np.float64),
+    })
+
+
+def load_counter_history(path = COUNTER_HISTORY_PATH):
+    """ All saved counter snapshots (empty frame when there are none yet). """
+    if not os.path.exists(path):
+        return pd.DataFrame(columns = ['show_url', 'scraped_at', 'play_count', 'fav_count'])
+    return pd.read_parquet(path)
+
+
+def append_counter_snapshot(data, scraped_at = None, path = COUNTER_HISTORY_PATH):
+    """ Add the counters of a scrape to the history, instead of overwriting them.
+
+    Args:
+        data (pd.DataFrame): Formatted shows (show_url, play_count, fav_count).
+        scraped_at (datetime, optional): Time of the scrape. Defaults to now.
+        path (str, optional): History file. Defaults to data/dev/counter_history.parquet.
+
+    Returns:
+        pd.DataFrame: The full history.
+    """
+    history = pd.concat([load_counter_history(path), get_counter_snapshot(data, scraped_at)], ignore_index = True)
+    history = history \
+        .drop_duplicates(subset = ['show_url', 'scraped_at'], keep = 'last') \
+        .sort_values(['show_url', 'scraped_at'], ignore_index = True)
+
+    history.to_parquet(path, index = False)
+    return history
+
+
+# Features ----
+def get_popularity_features(history, upload_dates = None, now = None, window_days = 7, half_life_days = 30):
+    """ Velocity, trending and decay-weighted popularity per show, from the counter history.
+
+    All scores are computed with vectorised group operations over the whole
+    history (no per-show Python loop).
+
+    - play_velocity / fav_velocity: counter increase per day over the last
+      `window_days` (from the latest snapshot at least that old, else the
+      oldest one; shows with a single snapshot use their lifetime rate).
+    - trending_score: log of the recent weighted rate minus log of the
+      lifetime weighted rate; above 0 means the show is accelerating.
+    - popularity_score: counter increases weighted by how recently they
+      happened (half-life `half_life_days`); counts before the first snapshot
+      are placed halfway between upload and that snapshot.
+
+    Args:
+        history (pd.DataFrame): Counter history (append_counter_snapshot).
+        upload_dates (pd.Series, optional): Upload dates indexed by show_url, for lifetime
+            rates. Defaults to the first snapshot time.
+        now (datetime, optional): Reference time. Defaults to the latest snapshot.
+        window_days (int, optional): Velocity window. Defaults to 7.
+        half_life_days (int, optional): Popularity half-life. Defaults to 30.
+
+    Returns:
+        pd.DataFrame: One row per show_url with FEATURE_COLUMNS and 'snapshots'.
+    """
+    history = history.sort_values(['show_url', 'scraped_at'], ignore_index = True)
+    history['scraped_at'] = pd.to_datetime(history['scraped_at'])
+    history['weighted'] = history['play_count'].fillna(0) + FAV_WEIGHT * history['fav_count'].fillna(0)
+    now = pd.Timestamp(now) if now is not None else history['scraped_at'].max()
+
+    groups = history.groupby('show_url', sort = True)
+    latest = groups.last()
+    first = groups.first()
+
+    # - uploads (lifetime rates, pre-history counts) ----
+    if upload_dates is not None:
+        uploaded = pd.to_datetime(upload_dates.groupby(level = 0).first(), errors = 'coerce').reindex(latest.index)
+        uploaded = uploaded.fillna(first['scraped_at'])
+    else:
+        uploaded = first['scraped_at']
+    age_days = ((latest['scraped_at'] - uploaded).dt.total_seconds() / 86400).clip(lower = 1)
+
+    # - velocity over the window: baseline = latest snapshot at least window_days old ----
+    cutoff = history['scraped_at'].groupby(history['show_url']).transform('max') - pd.Timedelta(days = window_days)
+    before_cutoff = history[history['scraped_at'] <= cutoff].groupby('show_url').last()
+    baseline = before_cutoff.reindex(latest.index).fillna(first)
+
+    span_days = ((latest['scraped_at'] - baseline['scraped_at']).dt.total_seconds() / 86400)
+    has_span = span_days > 0
+    span_days = span_days.where(has_span, 1)
+
+    lifetime_plays = latest['play_count'].fillna(0) / age_days
+    lifetime_favs = latest['fav_count'].fillna(0) / age_days
+
+    play_velocity = ((latest['play_count'] - baseline['play_count']) / span_days).where(has_span, lifetime_plays)
+    fav_velocity = ((latest['fav_count'] - baseline['fav_count']) / span_days).where(has_span, lifetime_favs)
+
+    recent_rate = (play_velocity + FAV_WEIGHT * fav_velocity).clip(lower = 0)
+    lifetime_rate = lifetime_plays + FAV_WEIGHT * lifetime_favs
+    trending_score = np.log1p(recent_rate) - np.log1p(lifetime_rate)
+
+    # - decay-weighted popularity ----
+    increments = groups['weighted'].diff().fillna(history['weighted']).clip(lower = 0)
+    happened_at = history['scraped_at'].where(
+        groups.cumcount() > 0,
+        history['show_url'].map(uploaded) + (history['scraped_at'] - history['show_url'].map(uploaded)) / 2,
+    )
+    decay = 0.5 ** ((now - happened_at).dt.total_seconds() / 86400 / half_life_days)
+    popularity_score = (increments * decay).groupby(history['show_url']).sum()
+
+    return pd.DataFrame({
+        'play_velocity':    play_velocity.astype(np.float32),
+        'fav_velocity':     fav_velocity.astype(np.float32),
+        'trending_score':   trending_score.astype(np.float32),
+        'popularity_score': popularity_score.reindex(latest.index).astype(np.float32),
+        'snapshots':        groups.size(),
+    })
+
+
+def save_popularity_features(features, path = POPULARITY_FEATURES_PATH):
+    features.reset_index().to_parquet(path, index = False)
+    return path
+
+
+def load_popularity_features(path = POPULARITY_FEATURES_PATH):
+    """ Saved features indexed by show_url, or None when the pipeline hasn't run. """
+    if not os.path.exists(path):
+        return None
+    return pd.read_parquet(path).set_index('show_url')
+
+
+def add_popularity_features(data, features = None, path = POPULARITY_FEATURES_PATH):
+    """ Join the popularity features onto the catalog as columns (0 for shows without history). """
+    features = load_popularity_features(path) if features is None else features
+    if features is None:
+        return data
+
+    joined = features[FEATURE_COLUMNS].reindex(data['show_url'].to_numpy()).fillna(0)
+    return data.assign(**{col: joined[col].to_numpy() for col in FEATURE_COLUMNS})
+
+
+def get_popularity_boosts(features = None, column = 'popularity_score'):
+    """ show_url -> feature scaled to [0, 1] (log scale), for boosting retrieval scores. """
+    features = load_popularity_features() if features is None else features
+    if features is None or features.empty:
+        return {}
+
+    values = np.log1p(features[column].clip(lower = 0).to_numpy(dtype = np.float64))
+    scaled = values / values.max() if values.max() > 0 else values
+    return dict(zip(features.index, scaled))
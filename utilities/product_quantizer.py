@@ -0,0 +1,136 @@
+
+# Imports ----
+import numpy as np
+
+
+# Defaults ----
+N_SUBSPACES = 96
+N_CENTROIDS = 256
+N_ITER = 20
+SAMPLE_SIZE = 50_000
+
+# - rows encoded per step, so the (rows x centroids) distance matrix stays small
+ENCODE_BLOCK_ROWS = 16_384
+
+
+# K-Means ----
+def get_kmeans(vectors, n_clusters, n_iter = N_ITER, seed = 42):
+    """ Lloyd's k-means; returns the (n_clusters, dim) centroids.
+
+    Empty clusters keep their previous centroid.
+    """
+    rng = np.random.default_rng(seed)
+    centroids = vectors[rng.choice(len(vectors), n_clusters, replace = False)].copy()
+    for _ in range(n_iter):
+        labels = get_nearest(vectors, centroids)
+        counts = np.bincount(labels, minlength = n_clusters)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, labels, vectors)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+    return centroids
+
+
+def get_nearest(vectors, centroids):
+    """ Index of the nearest centroid (squared L2) for every vector. """
+    distances = (centroids ** 2).sum(axis = 1)[None, :] - 2 * vectors @ centroids.T
+    return distances.argmin(axis = 1)
+
+
+# Product Quantizer ----
+class ProductQuantizer:
+    """ Product quantisation of embeddings into one byte per subspace.
+
+    Each vector is split into `n_subspaces` sub-vectors, and each sub-vector is
+    replaced by the id of its nearest centroid from a per-subspace k-means
+    codebook. With the defaults, a 1536-d float32 vector (6 KB) becomes 96 bytes.
+    Inner products with a query are computed from the codes through per-query
+    lookup tables (asymmetric distance), without decoding the vectors.
+
+    Args:
+        n_subspaces (int, optional): Sub-vectors per vector; must divide the dimension. Defaults to 96.
+        n_centroids (int, optional): Centroids per subspace (at most 256). Defaults to 256.
+        n_iter (int, optional): K-means iterations. Defaults to 20.
+        sample_size (int, optional): Vectors sampled to train the codebooks. Defaults to 50,000.
+    """
+
+    def __init__(self, n_subspaces = N_SUBSPACES, n_centroids = N_CENTROIDS, n_iter = N_ITER, sample_size = SAMPLE_SIZE):
+        if n_centroids > 256:
+            raise ValueError("n_centroids must be at most 256 (codes are uint8)")
+
+        self.n_subspaces = n_subspaces
+        self.n_centroids = n_centroids
+        self.n_iter = n_iter
+        self.sample_size = sample_size
+        self.codebooks = None
+
+    @classmethod
+    def from_codebooks(cls, codebooks):
+        """ A trained quantizer from saved (n_subspaces, n_centroids, sub_dim) codebooks. """
+        pq = cls(n_subspaces = codebooks.shape[0], n_centroids = codebooks.shape[1])
+        pq.codebooks = np.asarray(codebooks, dtype = np.float32)
+        return pq
+
+    @property
+    def sub_dim(self):
+        return self.codebooks.shape[2]
+
+    @property
+    def dim(self):
+        return self.n_subspaces * self.sub_dim
+
+    def _split(self, vectors):
+        return np.asarray(vectors, dtype = np.float32).reshape(len(vectors), self.n_subspaces, -1)
+
+    def fit(self, vectors, seed = 42):
+        """ Train the codebooks on (a sample of) `vectors`.
+
+        Needs at least n_centroids training vectors, representative of what
+        will be encoded: codebooks trained on a handful of vectors can't tell
+        the rest of the corpus apart.
+        """
+        vectors = np.asarray(vectors, dtype = np.float32)
+        if vectors.shape[1] % self.n_subspaces:
+            raise ValueError(f"n_subspaces ({self.n_subspaces}) must divide the dimension ({vectors.shape[1]})")
+        if len(vectors) < self.n_centroids:
+            raise ValueError(f"Training needs at least n_centroids ({self.n_centroids}) vectors, got {len(vectors)}")
+
+        rng = np.random.default_rng(seed)
+        if len(vectors) > self.sample_size:
+            vectors = vectors[rng.choice(len(vectors), self.sample_size, replace = False)]
+
+        subvectors = self._split(vectors)
+        self.codebooks = np.stack([
+            get_kmeans(subvectors[:, j], self.n_centroids, n_iter = self.n_iter, seed = seed + j)
+            for j in range(self.n_subspaces)
+        ])
+        return self
+
+    def encode(self, vectors):
+        """ (n, dim) float vectors -> (n, n_subspaces) uint8 codes. """
+        codes = np.empty((len(vectors), self.n_subspaces), dtype = np.uint8)
+        for start in range(0, len(vectors), ENCODE_BLOCK_ROWS):
+            subvectors = self._split(vectors[start:start + ENCODE_BLOCK_ROWS])
+            for j in range(self.n_subspaces):
+                codes[start:start + len(subvectors), j] = get_nearest(subvectors[:, j], self.codebooks[j])
+        return codes
+
+    def decode(self, codes):
+        """ (n, n_subspaces) codes -> (n, dim) approximate vectors. """
+        codes = np.asarray(codes)
+        return self.codebooks[np.arange(self.n_subspaces), codes].reshape(len(codes), -1)
+
+    def get_lookup_tables(self, queries):
+        """ (n_queries, n_subspaces, n_centroids) inner products of query sub-vectors with every centroid. """
+        return np.einsum('qms,mks->qmk', self._split(queries), self.codebooks)
+
+    def score(self, lookup_tables, codes):
+        """ (n_queries, n) approximate inner products of the queries with the encoded rows. """
+        codes = np.asarray(codes)
+        scores = np.zeros((len(lookup_tables), len(codes)), dtype = np.float32)
+        for j in range(self.n_subspaces):
+            scores += lookup_tables[:, j, codes[:, j]]
+        return scores
+
+    def get_nbytes(self):
+        return 0 if self.codebooks is None else self.codebooks.nbytes
@@ -0,0 +1,261 @@
+
+# Imports ----
+import json
+import os
+import time
+from datetime import datetime
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from langchain_core.messages import AIMessage
+
+from utilities.context_packer import get_packed_context, count_tokens
+from utilities.rag_utilities import DATA_DIR, get_contextualize_q_prompt, get_qa_prompt
+from utilities.reranker import RERANK_STATS
+
+
+# Paths ----
+BENCHMARK_QUERIES_PATH = os.path.join(DATA_DIR, 'benchmark_queries.json')
+BENCHMARK_RESULTS_DIR = os.path.join(DATA_DIR, 'benchmarks')
+
+# - the app's chat history always starts with the greeting, so the question
+#   rewrite step runs on every turn
+DEFAULT_CHAT_HISTORY = [AIMessage(content = " Hi! 👋 What are you in the mood for today?")]
+
+STAGES = ['rewrite', 'embed', 'retrieve', 'rerank', 'generate']
+
+
+# Queries ----
+def load_benchmark_queries(path = BENCHMARK_QUERIES_PATH):
+    """ Load the fixed query set with labelled relevant show_urls.
+
+    Returns:
+        list[dict]: [{'query': str, 'relevant_show_urls': [str, ...]}, ...]
+    """
+    with open(path) as f:
+        return json.load(f)
+
+
+# Timed Embeddings ----
+class TimedEmbeddings(Embeddings):
+    """ Embedding function wrapper adding up the time spent in its calls.
+
+    Give it to the vectorstore behind the retriever being benchmarked (e.g.
+    get_rag_components(embedding_function = TimedEmbeddings(...))) so the
+    embed step inside retriever.invoke can be timed separately.
+    """
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self.elapsed_ms = 0.0
+
+    def pop_elapsed_ms(self):
+        """ Time spent since the last call, then reset. """
+        elapsed_ms, self.elapsed_ms = self.elapsed_ms, 0.0
+        return elapsed_ms
+
+    def _timed(self, fn, *args):
+        start = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            self.elapsed_ms += (time.perf_counter() - start) * 1000
+
+    def embed_documents(self, texts):
+        return self._timed(self.embeddings.embed_documents, texts)
+
+    def embed_query(self, text):
+        return self._timed(self.embeddings.embed_query, text)
+
+
+# Helpers ----
+def get_recall_at_k(documents, relevant_show_urls, k):
+    """ Share of the labelled relevant shows found in the top k documents. """
+    if not relevant_show_urls:
+        return None
+
+    retrieved = {doc.metadata.get('show_url') for doc in documents[:k]}
+    return len(retrieved & set(relevant_show_urls)) / len(relevant_show_urls)
+
+
+def get_summary_stats(values):
+    values = np.asarray([v for v in values if v is not None], dtype = float)
+    if values.size == 0:
+        return None
+    return {
+        'mean': round(float(values.mean()), 3),
+        'p50':  round(float(np.percentile(values, 50)), 3),
+        'p95':  round(float(np.percentile(values, 95)), 3),
+    }
+
+
+# Benchmark ----
+def run_rag_benchmark(
+    llm,
+    embedding_function,
+    vectorstore        = None,
+    retriever          = None,
+    queries            = None,
+    k                  = 4,
+    repeats            = 1,
+    chat_history       = DEFAULT_CHAT_HISTORY,
+    max_context_tokens = 1500,
+    model              = 'gpt-4o-mini',
+):
+    """ Replay the query set through each RAG stage, timing the stages separately.
+
+    The stages mirror get_conversational_rag_chain: rewrite the question
+    against the chat history, retrieve the shows, then pack the context and
+    generate the answer.
+
+    Pass the served retriever (get_rag_components(...)['retriever']) to
+    measure what users get: artist lookup, parent-document retrieval and the
+    cross-encoder re-rank included. Its embed step is timed when
+    `embedding_function` is the TimedEmbeddings its vectorstore embeds with
+    (else it counts as retrieval), and the re-rank from RERANK_STATS. Without
+    a retriever, the stages are a plain embed + top-k search of `vectorstore`.
+
+    Args:
+        llm (BaseChatModel): Chat model (a fake one for offline runs).
+        embedding_function (Embeddings): Embedding function (TimedEmbeddings with a retriever).
+        vectorstore (VectorStore, optional): Vectorstore to search when no retriever is given.
+        retriever (Runnable, optional): Retriever to benchmark (question -> documents).
+        queries (list[dict], optional): Query set. Defaults to load_benchmark_queries().
+        k (int, optional): Documents per query for the plain search, and for recall@k. Defaults to 4.
+        repeats (int, optional): Times the query set is replayed. Defaults to 1.
+        chat_history (list, optional): History for the rewrite stage. Defaults to the app greeting.
+        max_context_tokens (int, optional): Token budget for the packed context. Defaults to 1500.
+        model (str, optional): Model name used to count tokens. Defaults to 'gpt-4o-mini'.
+
+    Returns:
+        dict: 'runs' (one row per query run) and 'summary'.
+    """
+    if retriever is None and vectorstore is None:
+        raise ValueError("Pass a retriever or a vectorstore")
+
+    queries = queries or load_benchmark_queries()
+    contextualize_q_prompt = get_contextualize_q_prompt()
+    qa_prompt = get_qa_prompt()
+
+    runs = []
+
+    for _ in range(repeats):
+        for item in queries:
+            query = item['query']
+            timings = {}
+
+            # - rewrite ----
+            start = time.perf_counter()
+            if chat_history:
+                standalone_query = llm.invoke(
+                    contextualize_q_prompt.format_messages(chat_history = chat_history, input = query)
+                ).content
+            else:
+                standalone_query = query
+            timings['rewrite'] = (time.perf_counter() - start) * 1000
+
+            if retriever is not None:
+                # - served retriever: embed and re-rank are measured inside it ----
+                if isinstance(embedding_function, TimedEmbeddings):
+                    embedding_function.pop_elapsed_ms()
+                rerank_ms_before = RERANK_STATS['total_ms']
+
+                start = time.perf_counter()
+                documents = retriever.invoke(standalone_query)
+                retrieval_ms = (time.perf_counter() - start) * 1000
+
+                timings['embed'] = embedding_function.pop_elapsed_ms() if isinstance(embedding_function, TimedEmbeddings) else None
+                timings['rerank'] = RERANK_STATS['total_ms'] - rerank_ms_before
+                timings['retrieve'] = retrieval_ms - (timings['embed'] or 0.0) - timings['rerank']
+            else:
+                # - embed ----
+                start = time.perf_counter()
+                query_vector = embedding_function.embed_query(standalone_query)
+                timings['embed'] = (time.perf_counter() - start) * 1000
+
+                # - retrieve ----
+                start = time.perf_counter()
+                documents = vectorstore.similarity_search_by_vector(query_vector, k = k)
+                timings['retrieve'] = (time.perf_counter() - start) * 1000
+                timings['rerank'] = 0.0
+
+            # - generate ----
+            messages = qa_prompt.format_messages(
+                context      = get_packed_context(documents, max_tokens = max_context_tokens, model = model),
+                chat_history = chat_history,
+                input        = query,
+            )
+            prompt_tokens = sum(count_tokens(str(m.content), model) for m in messages)
+
+            start = time.perf_counter()
+            llm.invoke(messages)
+            timings['generate'] = (time.perf_counter() - start) * 1000
+
+            runs.append({
+                'query':         query,
+                **{f"{stage}_ms": round(timings[stage], 3) if timings[stage] is not None else None for stage in STAGES},
+                'total_ms':      round(sum(value for value in timings.values() if value is not None), 3),
+                'prompt_tokens': prompt_tokens,
+                'recall_at_k':   get_recall_at_k(documents, item.get('relevant_show_urls'), k),
+                'show_urls':     [doc.metadata.get('show_url') for doc in documents],
+            })
+
+    summary = {
+        'queries': len(runs),
+        'k':       k,
+        **{f"{stage}_ms": get_summary_stats([r[f"{stage}_ms"] for r in runs]) for stage in STAGES},
+        'total_ms':      get_summary_stats([r['total_ms'] for r in runs]),
+        'prompt_tokens': get_summary_stats([r['prompt_tokens'] for r in runs]),
+        'recall_at_k':   get_summary_stats([r['recall_at_k'] for r in runs]),
+    }
+
+    return {'runs': runs, 'summary': summary}
+
+
+# Results ----
+def save_benchmark_results(results, label = 'rag', results_dir = BENCHMARK_RESULTS_DIR):
+    """ Save benchmark results to a timestamped json file and return its path. """
+    os.makedirs(results_dir, exist_ok = True)
+
+    path = os.path.join(results_dir, f"{label}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json")
+    with open(path, 'w') as f:
+        json.dump({'label': label, 'created_at': datetime.now().isoformat(), **results}, f, indent = 4)
+
+    return path
+
+
+def load_previous_benchmark_results(label = 'rag', results_dir = BENCHMARK_RESULTS_DIR, exclude = None):
+    """ Load the most recent saved results for a label (skipping `exclude`), or None. """
+    if not os.path.isdir(results_dir):
+        return None
+
+    paths = sorted(
+        os.path.join(results_dir, name) for name in os.listdir(results_dir)
+        if name.startswith(f"{label}_") and name.endswith('.json')
+    )
+    paths = [path for path in paths if path != exclude]
+
+    if not paths:
+        return None
+
+    with open(paths[-1]) as f:
+        return json.load(f)
+
+
+def compare_benchmark_results(current, previous):
+    """ Mean of each summary metric for two runs, with the change between them. """
+    comparison = {}
+
+    for metric, stats in current['summary'].items():
+        if not isinstance(stats, dict):
+            continue
+        previous_stats = previous['summary'].get(metric) if previous else None
+        previous_mean = previous_stats['mean'] if previous_stats else None
+
+        comparison[metric] = {
+            'previous': previous_mean,
+            'current':  stats['mean'],
+            'change':   round(stats['mean'] - previous_mean, 3) if previous_mean is not None else None,
+        }
+
+    return comparison
@@ -0,0 +1,221 @@
+
+# Imports ----
+import asyncio
+import threading
+import time
+
+
+# Sentinel marking the end of a streamed response ----
+_STREAM_END = object()
+
+
+# Rag Request Server ----
+class RagRequestServer:
+    """ Async serving path for a RAG chain with a bounded request queue.
+
+    Requests wait in a bounded asyncio queue and `max_concurrency` workers pull
+    from it, so at most that many chains (retrieval + LLM call) are in flight at
+    once, all driven by `chain.ainvoke` / `chain.astream` on one event loop
+    instead of one blocked thread per user.
+
+    Use `submit` / `stream` from async code, or `start_in_background` plus
+    `submit_threadsafe` / `stream_threadsafe` from synchronous code such as a
+    streamlit script.
+
+    Args:
+        chain (Runnable): Chain to serve (e.g. get_conversational_rag_chain).
+        max_concurrency (int, optional): Max requests in flight. Defaults to 8.
+        max_queue_size (int, optional): Max requests waiting; further submits are rejected. Defaults to 100.
+    """
+
+    def __init__(self, chain, max_concurrency = 8, max_queue_size = 100):
+        self.chain = chain
+        self.max_concurrency = max_concurrency
+        self.max_queue_size = max_queue_size
+
+        self.loop = None
+        self.queue = None
+        self.workers = []
+        self.thread = None
+        self.stream_queues = set()
+
+        self.in_flight = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.total_wait_ms = 0.0
+        self.total_run_ms = 0.0
+
+    # Lifecycle ----
+    async def start(self):
+        """ Start the workers on the running event loop. """
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue(maxsize = self.max_queue_size)
+        self.workers = [
+            asyncio.create_task(self._worker()) for _ in range(self.max_concurrency)
+        ]
+        return self
+
+    async def stop(self):
+        """ Cancel the workers. Requests still queued are cancelled too, and open streams end with an error. """
+        for worker in self.workers:
+            worker.cancel()
+        await asyncio.gather(*self.workers, return_exceptions = True)
+        self.workers = []
+
+        while self.queue is not None and not self.queue.empty():
+            *_, future = self.queue.get_nowait()
+            if not future.done():
+                future.cancel()
+
+        for stream_queue in list(self.stream_queues):
+            stream_queue.put_nowait(RuntimeError("RAG request server stopped"))
+
+    def start_in_background(self):
+        """ Run the server on its own event loop in a daemon thread. """
+        ready = threading.Event()
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            loop.run_until_complete(self.start())
+            ready.set()
+            loop.run_forever()
+
+        self.thread = threading.Thread(target = run, name = 'rag-request-server', daemon = True)
+        self.thread.start()
+        ready.wait()
+
+        return self
+
+    # Workers ----
+    async def _worker(self):
+        while True:
+            inputs, config, stream_queue, enqueued_at, future = await self.queue.get()
+
+            if future.cancelled():
+                self.queue.task_done()
+                continue
+
+            self.in_flight += 1
+            self.total_wait_ms += (time.perf_counter() - enqueued_at) * 1000
+            start = time.perf_counter()
+
+            try:
+                if stream_queue is None:
+                    result = await self.chain.ainvoke(inputs, config = config)
+                else:
+                    async for chunk in self.chain.astream(inputs, config = config):
+                        # - the consumer went away (stream closed early): stop generating
+                        if future.cancelled():
+                            break
+                        await stream_queue.put(chunk)
+                    await stream_queue.put(_STREAM_END)
+                    result = None
+
+                if not future.done():
+                    future.set_result(result)
+                self.completed += 1
+
+            except Exception as e:
+                self.failed += 1
+                if stream_queue is not None:
+                    await stream_queue.put(e)
+                if not future.done():
+                    future.set_exception(e)
+
+            finally:
+                self.in_flight -= 1
+                self.total_run_ms += (time.perf_counter() - start) * 1000
+                self.queue.task_done()
+
+    def _enqueue(self, inputs, config, stream_queue):
+        future = self.loop.create_future()
+        try:
+            self.queue.put_nowait((inputs, config, stream_queue, time.perf_counter(), future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise
+        return future
+
+    # Async API ----
+    async def submit(self, inputs, config = None):
+        """ Queue a request and wait for the chain's result.
+
+        Raises:
+            asyncio.QueueFull: If max_queue_size requests are already waiting.
+        """
+        return await self._enqueue(inputs, config, None)
+
+    async def stream(self, inputs, config = None, output_key = None):
+        """ Queue a request and yield the chain's streamed chunks.
+
+        Args:
+            inputs (dict): Chain inputs.
+            config (dict, optional): Runnable config.
+            output_key (str, optional): Only yield chunk[output_key] from dict chunks
+                (e.g. 'answer' for a retrieval chain). Defaults to yielding every chunk.
+        """
+        stream_queue = asyncio.Queue()
+        future = self._enqueue(inputs, config, stream_queue)
+        self.stream_queues.add(stream_queue)
+
+        try:
+            while True:
+                chunk = await stream_queue.get()
+                if chunk is _STREAM_END:
+                    break
+                if isinstance(chunk, Exception):
+                    raise chunk
+                if output_key is None:
+                    yield chunk
+                elif isinstance(chunk, dict) and output_key in chunk:
+                    yield chunk[output_key]
+
+            await future
+        finally:
+            self.stream_queues.discard(stream_queue)
+            # - closed before the end: a queued request is skipped, a running one stops
+            if not future.done():
+                future.cancel()
+
+    # Sync API (server running in background) ----
+    def submit_threadsafe(self, inputs, config = None, timeout = None):
+        """ Blocking submit for callers outside the server's event loop. """
+        return asyncio.run_coroutine_threadsafe(self.submit(inputs, config), self.loop) \
+            .result(timeout = timeout)
+
+    def stream_threadsafe(self, inputs, config = None, output_key = None):
+        """ Blocking generator over `stream` for callers outside the server's event loop.
+
+        Closing it early (e.g. a streamlit rerun) closes the stream on the server's
+        loop, which cancels the request.
+
+        Raises:
+            asyncio.QueueFull: If max_queue_size requests are already waiting.
+        """
+        agen = self.stream(inputs, config, output_key)
+
+        try:
+            while True:
+                try:
+                    yield asyncio.run_coroutine_threadsafe(agen.__anext__(), self.loop).result()
+                except StopAsyncIteration:
+                    break
+        finally:
+            asyncio.run_coroutine_threadsafe(agen.aclose(), self.loop)
+
+    # Gauges ----
+    def get_stats(self):
+        """ Queue depth / in-flight gauges and request counters. """
+        finished = self.completed + self.failed
+        return {
+            'queue_depth':     self.queue.qsize() if self.queue is not None else 0,
+            'in_flight':       self.in_flight,
+            'max_concurrency': self.max_concurrency,
+            'completed':       self.completed,
+            'failed':          self.failed,
+            'rejected':        self.rejected,
+            'mean_wait_ms':    self.total_wait_ms / finished if finished else 0.0,
+            'mean_run_ms':     self.total_run_ms / finished if finished else 0.0,
+        }
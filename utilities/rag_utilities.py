@@ -3,48 +3,467 @@
 import pandas as pd
 import os
 
-from langchain.docstore.document import Document
 from langchain_community.vectorstores import Chroma
 from langchain_openai import ChatOpenAI, OpenAIEmbeddings
 from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain.chains import create_history_aware_retriever, create_retrieval_chain
+
+from utilities.context_packer import create_packed_documents_chain
+from utilities.chunk_indexer import get_parent_document_retriever
+from utilities.reranker import get_reranking_retriever
+from utilities.popularity_features import POPULARITY_FEATURES_PATH, get_popularity_boosts, load_popularity_features
+from utilities.artist_index import ArtistIndex, get_show_artists, get_artist_retriever, get_artist_aware_retriever
+from utilities.document_builder import iter_documents
+from utilities.numpy_vectorstore import NumpyVectorStore, is_numpy_store, META_FILE as NUMPY_STORE_META_FILE
+
+
+# Paths ----
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'dev')
+
+# Vectorstore Stats ----
+# - counts of chroma handles opened / closed by this process, so repeated
+#   rebuilds (e.g. on every streamlit rerun) are easy to spot
+VECTORSTORE_STATS = {'opened': 0, 'closed': 0}
+
+# Vectorstore Backend ----
+# - 'chroma' (default) or 'numpy' (memory-mapped NumpyVectorStore export). The
+#   export is a snapshot: only the pipeline / streaming indexers keep Chroma current
+VECTORSTORE_BACKEND = os.environ.get('VECTORSTORE_BACKEND')
+VECTORSTORE_BACKENDS = ('chroma', 'numpy')
+
+
+# Rag Data ----
+def get_combined_data(df_djs, df_sets):
+    """
+    Merge DJ info onto each DJ show (same merge as the RAG pipeline).
+    """
+    df_djs = df_djs.rename(columns = lambda x: x.replace(' ', '_').lower())
+
+    df_combined = pd.merge(
+        df_djs,
+        df_sets,
+        left_on  = 'dj_name',
+        right_on = 'name',
+        how      = 'inner'
+    ) \
+        .drop(['name', 'show_tags'], axis = 1) \
+        .drop([col for col in df_sets.columns if 'show_info' in col and not col.endswith('combined')], axis=1)
+
+    return df_combined
+
+
+def load_combined_data(data_dir = DATA_DIR):
+    """
+    Load the DJ info and DJ shows csv files and merge them.
+    """
+    df_djs = pd.read_csv(os.path.join(data_dir, 'dj_info_test.csv'))
+    df_sets = pd.read_csv(os.path.join(data_dir, 'dj_shows_test.csv'))
+
+    return get_combined_data(df_djs, df_sets)
+
+
+def get_artist_lookup(data_dir = DATA_DIR):
+    """
+    Retriever for the shows featuring the artists named in a question, built
+    from the csv files in `data_dir`. None when the shows file is missing.
+    """
+    if not os.path.exists(os.path.join(data_dir, 'dj_shows_test.csv')):
+        return None
+
+    data = load_combined_data(data_dir)
+    return get_artist_retriever(ArtistIndex(get_show_artists(data)[0]), get_rag_document(data))
 
 
 # Rag Documents ----
 def get_rag_document(data):
     """
     Create a Document object from a row of the DataFrame.
+
+    Every field of the row is kept as metadata; for large corpora use
+    document_builder.iter_documents, which streams, renders in parallel and
+    keeps only the metadata retrieval reads.
+    """
+    return list(iter_documents(data, fields = None, processes = 0))
+
+
+# Vectorstore ----
+def get_numpy_store_path(vectorstore_path):
+    """ Where the NumpyVectorStore export of a Chroma directory lives (`<path>_numpy`). """
+    if is_numpy_store(vectorstore_path):
+        return vectorstore_path
+    return f"{os.path.normpath(vectorstore_path)}_numpy"
+
+
+def is_numpy_store_stale(vectorstore_path):
+    """ Whether the Chroma store was written after its NumpyVectorStore export (or there is none). """
+    export_path = get_numpy_store_path(vectorstore_path)
+    if not is_numpy_store(export_path):
+        return True
+    chroma_file = os.path.join(vectorstore_path, 'chroma.sqlite3')
+    if export_path == vectorstore_path or not os.path.exists(chroma_file):
+        return False
+    return os.path.getmtime(chroma_file) > os.path.getmtime(os.path.join(export_path, NUMPY_STORE_META_FILE))
+
+
+def get_vectorstore_backend(vectorstore_path, backend = None):
+    """ The backend to open: `backend`, else VECTORSTORE_BACKEND, else Chroma.
+
+    The numpy export is only used when requested, and falls back to Chroma
+    (with a warning) when Chroma has been updated since the export.
+    """
+    backend = backend or VECTORSTORE_BACKEND or ('numpy' if is_numpy_store(vectorstore_path) else 'chroma')
+    if backend not in VECTORSTORE_BACKENDS:
+        raise ValueError(f"backend must be one of {VECTORSTORE_BACKENDS}, got {backend!r}")
+    if backend == 'numpy' and is_numpy_store_stale(vectorstore_path):
+        print(f"NumPy export of {vectorstore_path} is missing or older than Chroma; using Chroma (re-run export_numpy_store).")
+        return 'chroma'
+    return backend
+
+
+def get_vectorstore(
+    vectorstore_path   = os.path.join(DATA_DIR, 'chroma_db'),
+    embedding_function = None,
+    openai_api_key     = None,
+    backend            = None,
+):
+    """ Open the persisted vectorstore and record the open.
+
+    Args:
+        vectorstore_path (str, optional): Chroma persist directory. Defaults to data/dev/chroma_db.
+        embedding_function (Embeddings, optional): Embedding function. Defaults to ada-002 when None.
+        openai_api_key (str, optional): OpenAI API key, used when no embedding function is given.
+        backend (str, optional): 'chroma', or 'numpy' for the memory-mapped export at
+            get_numpy_store_path. Defaults to get_vectorstore_backend.
     """
-    sets_dict = data.to_dict(orient = 'records')
+    if embedding_function is None:
+        embedding_function = OpenAIEmbeddings(
+            model   = 'text-embedding-ada-002',
+            api_key = openai_api_key
+        )
+
+    if get_vectorstore_backend(vectorstore_path, backend) == 'numpy':
+        vectorstore = NumpyVectorStore.load(get_numpy_store_path(vectorstore_path), embedding_function)
+    else:
+        vectorstore = Chroma(
+            persist_directory  = vectorstore_path,
+            embedding_function = embedding_function,
+        )
+
+    VECTORSTORE_STATS['opened'] += 1
+
+    return vectorstore
+
+
+def export_numpy_store(vectorstore_path = os.path.join(DATA_DIR, 'chroma_db'), dtype = 'float16', rescore = False, hnsw = False):
+    """ Copy a Chroma vectorstore into a NumpyVectorStore at get_numpy_store_path.
+
+    Args:
+        vectorstore_path (str, optional): Chroma persist directory. Defaults to data/dev/chroma_db.
+        dtype (str, optional): Stored vector type: 'float32', 'float16', 'int8' or 'pq' (low recall,
+            see NumpyVectorStore). Defaults to 'float16'.
+        rescore (bool, optional): Keep float32 vectors to re-score the candidates. Defaults to False.
+        hnsw (bool, optional): Also save an HNSW graph. Defaults to False.
+
+    Returns:
+        str: The numpy store directory.
+    """
+    chroma = Chroma(persist_directory = vectorstore_path)
+    try:
+        store = NumpyVectorStore.from_chroma(chroma, embedding = None, dtype = dtype, rescore = rescore)
+    finally:
+        chroma._client.clear_system_cache()
+    return store.save(f"{os.path.normpath(vectorstore_path)}_numpy", hnsw = hnsw)
+
+
+def close_vectorstore(vectorstore):
+    """ Release the client behind a vectorstore (Chroma only) and record the close.
+
+    Args:
+        vectorstore (VectorStore): Vectorstore returned by get_vectorstore.
+    """
+    if hasattr(vectorstore, '_client'):
+        try:
+            vectorstore._client.clear_system_cache()
+        except Exception as e:
+            print(f"Error closing vectorstore: {e}")
+
+    VECTORSTORE_STATS['closed'] += 1
+
+
+def get_vectorstore_stats():
+    """ Return a copy of the open / close counters with the number still open. """
+    return {
+        **VECTORSTORE_STATS,
+        'open': VECTORSTORE_STATS['opened'] - VECTORSTORE_STATS['closed'],
+    }
+
+
+# Assistant Prompts ----
+# - contextualize question ----
+CONTEXTUALIZE_Q_SYSTEM_PROMPT = """Given a chat history and the latest user question \
+    which might reference context in the chat history, formulate a standalone question \
+    which can be understood without the chat history. Do NOT answer the question, \
+    just reformulate it if needed and otherwise return it as is."""
+
+# - answer question based on chat history ----
+QA_SYSTEM_PROMPT = """
 
-    documents = []
+        You are a music recommendation assistant helping users discover DJ sets based on their mood, energy, and genre preferences.
 
-    for item in sets_dict:
-        content = f"""
-        dj_name: {item.get('dj_name')},
-        dj_bio: {item.get('dj_info')},
-        df_followers: {item.get('dj_followers')},
-        df_following: {item.get('dj_following')},
-        title: {item.get('show_title')},
-        play_count: {item.get('play_count')},
-        favorited_count: {item.get('fav_count')},
-        date_uploaded: {item.get('date_uploaded')},
-        genre_tags: {item.get('show_tags_cleaned')},
-        energy_min: {item.get('energy_min')},
-        energy_max: {item.get('energy_max')},
-        bpm_min: {item.get('bpm_min')},
-        bpm_max: {item.get('bpm_max')},
-        artists_list: {item.get('artists_list')},
-        show_info_combined: {item.get('show_info_combined')},
-        show_url: {item.get('show_url')},
-        """
+        Zouk is a family of dance music genres originating in the Caribbean (notably Guadeloupe and Martinique) and popularized
+        globally through Brazilian and African interpretations.
 
-        doc = Document(page_content = content, metadata = item)
+        There are multiple substyles and fusion genres within Zouk music:
 
-        documents.append(doc)
+        - Traditional Zouk (Caribbean Zouk): Upbeat, percussion-driven, and rooted in Creole rhythms. Often features live
+        instruments and a carnival feel.
+        - Brazilian Zouk: A slower, smoother evolution adapted for partner dancing. Known for its sensual flow, deep bass, and melodic remixes.
+        - Zouk Lambada: A style blending Brazilian Zouk and Lambada rhythms. Often more dynamic and rhythmically complex.
+        - Ghetto Zouk: A minimal, electronic-influenced version with R&B, Kizomba, or Afrobeat elements. Often more sensual and groove-based.
+        - Zouk Remixes & DJ Edits: Many DJs remix R&B, Lo-fi, Afrobeat, or Pop tracks into Zouk rhythm structures to create fresh dance experiences
+        - Zouk sets can range from slow and intimate to high-energy and festival-style, and may feature crossover genres like Afrobeat,
+          Chillout, Deephouse, Groovy, R&B, EDM, and live blends. Vibe and energy arcs are often as important as genre when selecting a Zouk set.
+
+        Your goal is not just to recommend sets, but to help the user discover what they’re truly in the mood for, even if they aren’t sure yet.
+
+        Instructions:
+
+        - If the user’s query is vague or mood-based (e.g. “I want something chill”), start by asking a **clarifying question** before
+        making recommendations. For example:
+            - “Are you interested in chill Zouk specifically, or are you open to R&B or Lo-fi as well?”
+            - “Would you prefer something that builds energy or stays smooth throughout?”
+        - Be sure to give reasons why you are suggesting each set.
+        - Only make recommendations once you feel you have enough clarity on what they’re looking for.
+        - Use a friendly, conversational tone. Make the user feel like they’re chatting with a helpful DJ friend.
+        - Answer based only on the context provided below.
+        - If multiple sets match, suggest 1–3 and explain why.
+        - If no match is found, say so clearly and suggest trying different keywords.
+        - Use a friendly and concise tone.
+        - Provide the DJ name, title, and a link to the set.
+        - Provide information on the dj.
+        - Avoid using the word “I” to keep the tone professional yet warm.
+        - Include brief information about the DJ and the set
+        - When you see the word "Vibe", it's just another word for Genre.
+        - When you see the word "Tempo" is just another word for BPM.
+        - Feel free to summarize or reword descriptions for clarity, but do not invent details.
+        - Do not ask if the user questions like "are you in the mood for Zouk or something else?". All the sets are Zouk. Zouk is just
+          the name of the music and dance but the music incorporates many genres like R&B, Afrobeat, and more.
+
+        - If no matching sets are found:
+            - Say so clearly and suggest trying different keywords or moods.
+
+        Use this output format once you have enough context to make a recommendation:
+
+        🎧 Recommendations:
+        "<Set Title>" by <DJ Name>
+        Listen here: [<DJ Name> - <Set Title>](<show_url>)
+
+        Information on Set:
+        Where it was played / set vibe: <one line from the set description>
+        Genres/Vibe: <genre tags>
+        Artists Featured: <a few artists> and more.
+        Play Count: <play_count>. Favorite Count: <fav_count>.
+
+        More on <DJ Name>:
+        <one or two sentences from the DJ bio>
+
+        {context}
+    """
+
+
+def get_contextualize_q_prompt():
+    """ Prompt that rewrites the latest question into a standalone question. """
+    return ChatPromptTemplate.from_messages([
+        ("system", CONTEXTUALIZE_Q_SYSTEM_PROMPT),
+        MessagesPlaceholder("chat_history"),
+        ("human", "{input}"),
+    ])
+
+
+def get_qa_prompt():
+    """ Prompt that answers the question from the packed {context}. """
+    return ChatPromptTemplate.from_messages([
+        ("system", QA_SYSTEM_PROMPT),
+        MessagesPlaceholder("chat_history"),
+        ("human", "{input}")
+    ])
+
+
+# Conversational Rag Chain ----
+def get_conversational_rag_chain(
+    llm,
+    retriever,
+    max_context_tokens = 1500,
+    model              = 'gpt-4o-mini',
+):
+    """ History-aware retrieval + QA chain used by the AI assistant.
+
+    The chain takes {"input", "chat_history"} and returns a dict with the
+    retrieved "context" and the generated "answer". Chat history is left to the
+    caller (e.g. RunnableWithMessageHistory in the streamlit app).
+
+    Args:
+        llm (BaseChatModel): Chat model used to rewrite the question and to answer.
+        retriever (Runnable): Retriever returning documents for a question.
+        max_context_tokens (int, optional): Token budget for the packed context. Defaults to 1500.
+        model (str, optional): Model name used to count tokens. Defaults to 'gpt-4o-mini'.
+    """
+    # - contextualize question ----
+    history_aware_retriever = create_history_aware_retriever(llm, retriever, get_contextualize_q_prompt())
+
+    # -- answer question based on chat history ----
+    qa_prompt = get_qa_prompt()
+
+    # - dedupes dj bios, trims fields and orders sets by relevance within a token budget
+    question_answer_chain = create_packed_documents_chain(
+        llm,
+        qa_prompt,
+        max_tokens = max_context_tokens,
+        model      = model,
+    )
+
+    # - combine both RAG + chat message history
+    rag_chain = create_retrieval_chain(history_aware_retriever, question_answer_chain)
+
+    return rag_chain
+
+
+
+# Rag Components ----
+def get_rag_components(
+    vectorstore_path       = os.path.join(DATA_DIR, 'chroma_db'),
+    model                  = 'gpt-4o-mini',
+    temperature            = 0.7,
+    openai_api_key         = None,
+    max_context_tokens     = 1500,
+    rerank                 = True,
+    rerank_fetch_k         = 50,
+    rerank_top_n           = 4,
+    chunked                = None,
+    chunk_vectorstore_path = os.path.join(DATA_DIR, 'chroma_db_chunks'),
+    docstore_path          = os.path.join(DATA_DIR, 'docstore'),
+    popularity_weight      = 0.0,
+    artist_lookup          = True,
+    vectorstore_backend    = None,
+    data_dir               = None,
+    embedding_function     = None,
+):
+    """ Build the AI assistant's vectorstore, retriever, LLM and conversational chain.
+
+    Shared by the streamlit AI tab and the RAG query service; callers are
+    expected to build these once per process and reuse them.
+
+    Args:
+        vectorstore_path (str, optional): Chroma persist directory of whole-show documents.
+        model (str, optional): OpenAI chat model. Defaults to 'gpt-4o-mini'.
+        temperature (float, optional): LLM temperature. Defaults to 0.7.
+        openai_api_key (str, optional): OpenAI API key.
+        max_context_tokens (int, optional): Token budget for the packed context. Defaults to 1500.
+        rerank (bool, optional): Re-rank candidates with a cross-encoder. Defaults to True.
+        rerank_fetch_k (int, optional): Candidates fetched before re-ranking. Defaults to 50.
+        rerank_top_n (int, optional): Documents sent to the LLM. Defaults to 4.
+        chunked (bool, optional): Use the chunked parent-document index. Defaults to
+            using it when the docstore exists.
+        chunk_vectorstore_path (str, optional): Chroma persist directory of the child chunks.
+        docstore_path (str, optional): Parent docstore directory.
+        popularity_weight (float, optional): Boost re-ranked shows by their saved popularity_score
+            (see popularity_features). Defaults to 0 (no boost).
+        artist_lookup (bool, optional): Add the shows featuring artists named in the question
+            (artist -> sets index) to the candidates. Defaults to True.
+        vectorstore_backend (str, optional): 'chroma' or 'numpy' for the whole-show index
+            (see get_vectorstore). The chunked index stays on Chroma. Defaults to
+            VECTORSTORE_BACKEND, else Chroma.
+        data_dir (str, optional): Folder with the csv files (artist lookup) and popularity
+            features. Defaults to the folder holding `vectorstore_path`.
+        embedding_function (Embeddings, optional): Query embedding function (e.g. a
+            rag_benchmark.TimedEmbeddings). Defaults to ada-002.
+
+    Returns:
+        dict: 'chain', 'retriever', 'vectorstore', 'llm' and 'embedding_function'.
+    """
+    # - embedding ----
+    if embedding_function is None:
+        embedding_function = OpenAIEmbeddings(
+            model   = 'text-embedding-ada-002',
+            api_key = openai_api_key
+        )
+
+    # - use the chunked (child vector -> parent show) index once it has been built
+    if chunked is None:
+        chunked = os.path.isdir(docstore_path)
+
+    #  - vectorestore ----
+    vectorstore = get_vectorstore(
+        vectorstore_path   = chunk_vectorstore_path if chunked else vectorstore_path,
+        embedding_function = embedding_function,
+        backend            = 'chroma' if chunked else vectorstore_backend,
+    )
+
+    #  - retriever ----
+    if chunked:
+        base_retriever = get_parent_document_retriever(
+            vectorstore,
+            docstore_path = docstore_path,
+            top_n         = rerank_fetch_k if rerank else rerank_top_n,
+        )
+    else:
+        base_retriever = vectorstore.as_retriever(search_kwargs = {'k': rerank_fetch_k if rerank else rerank_top_n})
+
+    # - csv files and popularity features live next to the vectorstore
+    if data_dir is None:
+        data_dir = os.path.dirname(os.path.abspath(vectorstore_path))
+
+    # - shows featuring artists named in the question come from the index, not similarity
+    if artist_lookup and os.path.exists(os.path.join(data_dir, 'dj_shows_test.csv')):
+        data = load_combined_data(data_dir)
+        base_retriever = get_artist_aware_retriever(
+            base_retriever,
+            ArtistIndex(get_show_artists(data)[0]),
+            get_rag_document(data),
+        )
+
+    # - over-fetch candidates, then keep the best few by cross-encoder score
+    if rerank:
+        popularity = None
+        if popularity_weight:
+            features = load_popularity_features(os.path.join(data_dir, os.path.basename(POPULARITY_FEATURES_PATH)))
+            popularity = get_popularity_boosts(features) if features is not None else {}
+
+        retriever = get_reranking_retriever(
+            vectorstore,
+            fetch_k             = rerank_fetch_k,
+            top_n               = rerank_top_n,
+            candidate_retriever = base_retriever,
+            popularity          = popularity,
+            popularity_weight   = popularity_weight,
+        )
+    else:
+        retriever = base_retriever
+
+    # - llm ----
+    llm = ChatOpenAI(
+        model       = model,
+        temperature = temperature,
+        api_key     = openai_api_key,
+    )
+
+    # - rag chain ----
+    rag_chain = get_conversational_rag_chain(
+        llm,
+        retriever,
+        max_context_tokens = max_context_tokens,
+        model              = model,
+    )
 
-    return documents
+    return {
+        'chain':              rag_chain,
+        'retriever':          retriever,
+        'vectorstore':        vectorstore,
+        'llm':                llm,
+        'embedding_function': embedding_function,
+    }
 
 
 # Rag Model ----
@@ -63,8 +482,8 @@ def get_rag_model(
     )
 
     #  - vectorestore ----
-    vectorstore = Chroma(
-        persist_directory  = vectorstore_path,
+    vectorstore = get_vectorstore(
+        vectorstore_path   = vectorstore_path,
         embedding_function = embedding_function,
     )
 
@@ -0,0 +1,154 @@
+
+# Imports ----
+import time
+from functools import lru_cache
+
+from langchain_core.documents import Document
+from langchain_core.runnables import RunnableLambda
+
+
+# Defaults ----
+RERANK_MODEL = 'cross-encoder/ms-marco-MiniLM-L-6-v2'
+
+# Rerank Stats ----
+# - latency added by the last / all re-rank calls in this process
+RERANK_STATS = {'calls': 0, 'last_ms': 0.0, 'total_ms': 0.0, 'last_candidates': 0}
+
+
+# Cross Encoder ----
+@lru_cache(maxsize = None)
+def get_cross_encoder(model_name = RERANK_MODEL, device = 'cpu', max_length = 512):
+    """ Load (once per process) a local sentence-transformers cross-encoder.
+
+    Args:
+        model_name (str, optional): Hugging Face model id. Defaults to 'cross-encoder/ms-marco-MiniLM-L-6-v2'.
+        device (str, optional): Torch device. Defaults to 'cpu'.
+        max_length (int, optional): Max tokens per (query, document) pair. Defaults to 512.
+    """
+    from sentence_transformers import CrossEncoder
+
+    return CrossEncoder(model_name, device = device, max_length = max_length)
+
+
+# Rerank ----
+def rerank_documents(
+    query,
+    documents,
+    cross_encoder = None,
+    top_n         = 4,
+    batch_size    = 16,
+    popularity        = None,
+    popularity_weight = 0.0,
+):
+    """ Score (query, document) pairs with a cross-encoder and keep the best top_n.
+
+    Returns new documents with metadata['relevance_score'] set, which the
+    context packer uses to order sets in the prompt; the candidates (which
+    may be shared between concurrent requests) are left untouched.
+
+    Args:
+        query (str): User query.
+        documents (list[Document]): Candidate documents.
+        cross_encoder (CrossEncoder, optional): Model to score with. Defaults to get_cross_encoder().
+        top_n (int, optional): Number of documents to keep. Defaults to 4.
+        batch_size (int, optional): Pairs scored per forward pass. Defaults to 16.
+        popularity (dict, optional): show_url -> popularity in [0, 1] (get_popularity_boosts).
+        popularity_weight (float, optional): Added to the score per unit of popularity. Defaults to 0.
+    """
+    start = time.perf_counter()
+
+    if not documents:
+        return []
+
+    if cross_encoder is None:
+        cross_encoder = get_cross_encoder()
+
+    scores = cross_encoder.predict(
+        [(query, doc.page_content) for doc in documents],
+        batch_size        = batch_size,
+        show_progress_bar = False,
+    )
+
+    if popularity and popularity_weight:
+        scores = [
+            float(score) + popularity_weight * popularity.get(doc.metadata.get('show_url'), 0.0)
+            for doc, score in zip(documents, scores)
+        ]
+
+    ranked = sorted(zip(documents, scores), key = lambda x: float(x[1]), reverse = True)[:top_n]
+
+    results = [
+        Document(
+            page_content = doc.page_content,
+            metadata     = {**doc.metadata, 'relevance_score': float(score)},
+            id           = doc.id,
+        )
+        for doc, score in ranked
+    ]
+
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    RERANK_STATS['calls'] += 1
+    RERANK_STATS['last_ms'] = elapsed_ms
+    RERANK_STATS['total_ms'] += elapsed_ms
+    RERANK_STATS['last_candidates'] = len(documents)
+
+    return results
+
+
+def get_rerank_stats():
+    """ Return a copy of the re-rank latency stats with the mean latency. """
+    return {
+        **RERANK_STATS,
+        'mean_ms': RERANK_STATS['total_ms'] / RERANK_STATS['calls'] if RERANK_STATS['calls'] else 0.0,
+    }
+
+
+# Reranking Retriever ----
+def get_reranking_retriever(
+    vectorstore,
+    fetch_k       = 50,
+    top_n         = 4,
+    batch_size    = 16,
+    model_name    = RERANK_MODEL,
+    device        = 'cpu',
+    search_kwargs = None,
+    candidate_retriever = None,
+    popularity          = None,
+    popularity_weight   = 0.0,
+):
+    """ Retriever that over-fetches fetch_k candidates and re-ranks them down to top_n.
+
+    Returns a Runnable[str, list[Document]], so it can be passed anywhere a
+    retriever is expected (e.g. create_history_aware_retriever).
+
+    Args:
+        vectorstore (VectorStore): Vectorstore to fetch candidates from.
+        fetch_k (int, optional): Candidates fetched by similarity. Defaults to 50.
+        top_n (int, optional): Documents kept after re-ranking. Defaults to 4.
+        batch_size (int, optional): Cross-encoder batch size. Defaults to 16.
+        model_name (str, optional): Cross-encoder model id.
+        device (str, optional): Torch device. Defaults to 'cpu'.
+        search_kwargs (dict, optional): Extra kwargs for the candidate search (e.g. filter).
+        candidate_retriever (Runnable, optional): Retriever returning the candidates instead of
+            a plain similarity search (e.g. a parent document retriever). fetch_k is then up to it.
+        popularity (dict, optional): show_url -> popularity in [0, 1], see rerank_documents.
+        popularity_weight (float, optional): Popularity boost added to the re-rank score. Defaults to 0.
+    """
+    if candidate_retriever is None:
+        candidate_retriever = vectorstore.as_retriever(
+            search_kwargs = {**(search_kwargs or {}), 'k': fetch_k}
+        )
+
+    def retrieve_and_rerank(query):
+        candidates = candidate_retriever.invoke(query)
+        return rerank_documents(
+            query,
+            candidates,
+            cross_encoder = get_cross_encoder(model_name, device),
+            top_n         = top_n,
+            batch_size    = batch_size,
+            popularity        = popularity,
+            popularity_weight = popularity_weight,
+        )
+
+    return RunnableLambda(retrieve_and_rerank).with_config(run_name = 'reranking_retriever')
@@ -0,0 +1,73 @@
+
+# Imports ----
+import threading
+import time
+import uuid
+
+from langchain_core.chat_history import InMemoryChatMessageHistory
+
+
+# Session Store ----
+class SessionHistoryStore:
+    """ Server-side chat histories keyed by session id, expiring after a TTL.
+
+    Sessions idle for longer than `ttl_seconds` are dropped on the next access,
+    and at most `max_sessions` are kept (least recently used dropped first).
+
+    Args:
+        ttl_seconds (int, optional): Idle time before a session expires. Defaults to 1800.
+        max_sessions (int, optional): Max sessions kept. Defaults to 10000.
+        max_messages (int, optional): Max messages kept per session. Defaults to 20.
+    """
+
+    def __init__(self, ttl_seconds = 1800, max_sessions = 10000, max_messages = 20):
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max_sessions
+        self.max_messages = max_messages
+        self.sessions = {}
+        self.lock = threading.Lock()
+
+    def _purge(self, now):
+        expired = [
+            session_id for session_id, (_, last_seen) in self.sessions.items()
+            if now - last_seen > self.ttl_seconds
+        ]
+        for session_id in expired:
+            del self.sessions[session_id]
+
+        if len(self.sessions) > self.max_sessions:
+            oldest = sorted(self.sessions.items(), key = lambda x: x[1][1])
+            for session_id, _ in oldest[:len(self.sessions) - self.max_sessions]:
+                del self.sessions[session_id]
+
+    def get(self, session_id = None):
+        """ Get (or create) the history for a session.
+
+        Returns:
+            tuple: (session id, InMemoryChatMessageHistory).
+        """
+        now = time.monotonic()
+
+        with self.lock:
+            self._purge(now)
+
+            session_id = session_id or str(uuid.uuid4())
+            history, _ = self.sessions.get(session_id, (None, None))
+            if history is None:
+                history = InMemoryChatMessageHistory()
+            self.sessions[session_id] = (history, now)
+
+        return session_id, history
+
+    def add_turn(self, session_id, question, answer):
+        """ Append a question / answer pair, keeping the last max_messages messages. """
+        _, history = self.get(session_id)
+        history.add_user_message(question)
+        history.add_ai_message(answer)
+
+        with self.lock:
+            if len(history.messages) > self.max_messages:
+                history.messages = history.messages[-self.max_messages:]
+
+    def __len__(self):
+        return len(self.sessions)
@@ -0,0 +1,303 @@
+
+# Imports ----
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+from utilities.artist_index import get_artists, normalize_artist_name
+
+
+# Paths ----
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'dev')
+SIMILAR_SETS_PATH = os.path.join(DATA_DIR, 'similar_sets.joblib')
+
+# Defaults ----
+# - fixed ranges (as in the Explore sliders), so a new show scales the same way
+NUMERIC_RANGES = {
+    'energy_min': (0, 10),
+    'energy_max': (0, 10),
+    'bpm_min':    (60, 180),
+    'bpm_max':    (60, 180),
+}
+
+# - weight of each feature block after L2-normalising it
+BLOCK_WEIGHTS = {'embedding': 1.0, 'tfidf': 1.0, 'numeric': 0.5}
+
+
+# Features ----
+def identity_analyzer(tokens):
+    # - module-level (not a lambda) so a fitted vectorizer can be saved
+    return tokens
+
+
+def get_show_tokens(row):
+    """ Tag, DJ and artist tokens of a show for TF-IDF. """
+    tags = row.get('show_tags_cleaned')
+    tags = tags if isinstance(tags, list) else []
+    artists = row.get('artists') if isinstance(row.get('artists'), list) else get_artists(row.get('artists_list'))
+    return (
+        [f"tag:{tag.lower()}" for tag in tags]
+        + [f"dj:{row.get('name')}"]
+        + [f"artist:{normalize_artist_name(artist)}" for artist in artists]
+    )
+
+
+def get_numeric_features(data):
+    """ BPM / energy ranges scaled to [0, 1] (missing -> middle of the range). """
+    columns = []
+    for column, (low, high) in NUMERIC_RANGES.items():
+        values = pd.to_numeric(data[column], errors = 'coerce') if column in data.columns else pd.Series(np.nan, index = data.index)
+        columns.append(((values.to_numpy(dtype = np.float32) - low) / (high - low)).clip(0, 1))
+
+    features = np.column_stack(columns)
+    return np.where(np.isnan(features), 0.5, features).astype(np.float32)
+
+
+def get_stored_embeddings(vectorstore, show_urls):
+    """ Embeddings already in the Chroma vectorstore, aligned to `show_urls`.
+
+    Shows with several documents get their mean vector; shows missing from
+    the store get zeros.
+    """
+    stored = vectorstore.get(include = ['embeddings', 'metadatas'])
+    vectors = pd.DataFrame(np.asarray(stored['embeddings'], dtype = np.float32))
+    vectors['show_url'] = [metadata.get('show_url') for metadata in stored['metadatas']]
+
+    vectors = vectors.groupby('show_url').mean()
+    return vectors.reindex(list(show_urls)).fillna(0).to_numpy(dtype = np.float32)
+
+
+def load_stored_embeddings(show_urls, vectorstore_path = os.path.join(DATA_DIR, 'chroma_db')):
+    """ get_stored_embeddings from the persisted Chroma vectorstore (read only, no embedding function needed). """
+    from langchain_community.vectorstores import Chroma
+
+    vectorstore = Chroma(persist_directory = vectorstore_path)
+    try:
+        return get_stored_embeddings(vectorstore, show_urls)
+    finally:
+        vectorstore._client.clear_system_cache()
+
+
+def l2_normalize(vectors):
+    norms = np.linalg.norm(vectors, axis = 1, keepdims = True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+def get_show_vectors(data, embeddings = None, vectorizer = None, weights = BLOCK_WEIGHTS):
+    """ One vector per show: stored embedding, TF-IDF of tags / DJ / artists and BPM / energy ranges.
+
+    Each block is L2-normalised and weighted, and the result normalised again
+    so a dot product is the cosine similarity.
+
+    Args:
+        data (pd.DataFrame): Shows (load_data layout: show_tags_cleaned as lists).
+        embeddings (np.ndarray, optional): Stored embeddings aligned to `data`. Skipped when None.
+        vectorizer (TfidfVectorizer, optional): Fitted vectorizer (for new shows). Fitted on `data` when None.
+        weights (dict, optional): Weight per block. Defaults to BLOCK_WEIGHTS.
+
+    Returns:
+        tuple: (float32 vectors, fitted vectorizer).
+    """
+    tokens = [get_show_tokens(row) for row in data.to_dict(orient = 'records')]
+
+    if vectorizer is None:
+        vectorizer = TfidfVectorizer(analyzer = identity_analyzer, max_features = 512, dtype = np.float32)
+        tfidf = vectorizer.fit_transform(tokens)
+    else:
+        tfidf = vectorizer.transform(tokens)
+
+    blocks = [
+        weights['tfidf'] * l2_normalize(tfidf.toarray()),
+        weights['numeric'] * l2_normalize(get_numeric_features(data)),
+    ]
+    if embeddings is not None:
+        blocks.insert(0, weights['embedding'] * l2_normalize(np.asarray(embeddings, dtype = np.float32)))
+
+    return l2_normalize(np.hstack(blocks)).astype(np.float32), vectorizer
+
+
+# Neighbours ----
+def get_brute_force_neighbors(queries, vectors, k, exclude = None):
+    """ Exact top-k cosine neighbours of `queries` among (normalised) `vectors`.
+
+    Args:
+        exclude (np.ndarray, optional): Row of `vectors` to skip for each query (itself).
+
+    Returns:
+        tuple: (indices, similarities), both (n_queries, k), most similar first.
+    """
+    similarities = queries @ vectors.T
+    if exclude is not None:
+        similarities[np.arange(len(queries)), exclude] = -np.inf
+
+    k = min(k, vectors.shape[0] - (exclude is not None))
+    if k <= 0:
+        return np.empty((len(queries), 0), dtype = np.int64), np.empty((len(queries), 0), dtype = np.float32)
+
+    top = np.argpartition(-similarities, k - 1, axis = 1)[:, :k]
+    top_similarities = np.take_along_axis(similarities, top, axis = 1)
+    order = np.argsort(-top_similarities, axis = 1)
+
+    return np.take_along_axis(top, order, axis = 1), np.take_along_axis(top_similarities, order, axis = 1)
+
+
+def get_knn_graph(vectors, n_neighbors = 10, brute_force_max = 20_000, batch_size = 2048, random_state = 42):
+    """ k-nearest-neighbour graph (excluding each show itself).
+
+    Uses pynndescent (approximate) for large catalogs and exact batched dot
+    products up to `brute_force_max` shows.
+
+    Returns:
+        tuple: (indices, similarities), both (n_shows, n_neighbors).
+    """
+    n_rows = len(vectors)
+
+    if n_rows <= brute_force_max:
+        results = [
+            get_brute_force_neighbors(vectors[start:start + batch_size], vectors, n_neighbors, exclude = np.arange(start, min(start + batch_size, n_rows)))
+            for start in range(0, n_rows, batch_size)
+        ]
+        return np.vstack([r[0] for r in results]), np.vstack([r[1] for r in results])
+
+    from pynndescent import NNDescent
+
+    index = NNDescent(vectors, metric = 'cosine', n_neighbors = n_neighbors + 1, random_state = random_state)
+    indices, distances = index.neighbor_graph
+
+    # - drop each show itself (normally the first neighbour)
+    not_self = indices != np.arange(n_rows)[:, None]
+    keep = np.argsort(~not_self, axis = 1, kind = 'stable')[:, :n_neighbors]
+    indices = np.take_along_axis(indices, keep, axis = 1)
+    similarities = 1 - np.take_along_axis(distances, keep, axis = 1)
+
+    return indices, similarities.astype(np.float32)
+
+
+# Similar Sets Index ----
+class SimilarSetsIndex:
+    """ Precomputed k-nearest-neighbour graph over show vectors.
+
+    The graph is built once (offline or at app start), so "sets like this
+    one" is a dictionary lookup plus a row of the graph at request time. New
+    shows are added incrementally with `add`: their neighbours are found
+    exactly against the stored vectors, and they are inserted into the
+    neighbour lists of existing shows they are closer to than the current
+    last neighbour.
+
+    Args:
+        vectors (np.ndarray): Normalised show vectors (get_show_vectors).
+        show_urls (list[str]): Show url of each vector.
+        n_neighbors (int, optional): Neighbours kept per show. Defaults to 10.
+        indices (np.ndarray, optional): Precomputed graph (with `similarities`); built when None.
+        similarities (np.ndarray, optional): Cosine similarity of each graph edge.
+        vectorizer (TfidfVectorizer, optional): Vectorizer the vectors were built with (for `add_shows`).
+        embedding_dim (int, optional): Size of the stored embeddings in the vectors; 0 when built without. Defaults to 0.
+    """
+
+    # - indexes saved before embedding_dim was recorded
+    embedding_dim = 0
+
+    def __init__(self, vectors, show_urls, n_neighbors = 10, indices = None, similarities = None, vectorizer = None, embedding_dim = 0):
+        self.vectors = np.asarray(vectors, dtype = np.float32)
+        self.show_urls = list(show_urls)
+        self.row_ids = {url: i for i, url in enumerate(self.show_urls)}
+        self.vectorizer = vectorizer
+        self.embedding_dim = embedding_dim
+
+        if indices is None:
+            indices, similarities = get_knn_graph(self.vectors, n_neighbors)
+        else:
+            n_neighbors = indices.shape[1]
+
+        self.n_neighbors = n_neighbors
+        self.indices, self.similarities = self._pad(indices, similarities)
+
+    @classmethod
+    def from_frame(cls, data, embeddings = None, n_neighbors = 10):
+        """ Build from the catalog (load_data layout) and optional stored embeddings. """
+        vectors, vectorizer = get_show_vectors(data, embeddings)
+        embedding_dim = np.shape(embeddings)[1] if embeddings is not None else 0
+        return cls(vectors, data['show_url'], n_neighbors = n_neighbors, vectorizer = vectorizer, embedding_dim = embedding_dim)
+
+    def __len__(self):
+        return len(self.show_urls)
+
+    # Lookups ----
+    def get_similar(self, show_url, n = 5):
+        """ Up to `n` most similar shows as [(show_url, similarity), ...] ([] for unknown shows). """
+        row = self.row_ids.get(show_url)
+        if row is None:
+            return []
+        return [
+            (self.show_urls[i], float(s))
+            for i, s in zip(self.indices[row, :n], self.similarities[row, :n])
+            if i >= 0
+        ]
+
+    # Updates ----
+    def add(self, vectors, show_urls):
+        """ Add new shows (vectors built with the same vectorizer / embeddings) to the graph. """
+        vectors = np.asarray(vectors, dtype = np.float32)
+        if vectors.shape[1] != self.vectors.shape[1]:
+            raise ValueError(f"New vectors have {vectors.shape[1]} dimensions, the index has {self.vectors.shape[1]}.")
+        n_old = len(self.show_urls)
+
+        self.vectors = np.vstack([self.vectors, vectors])
+        self.show_urls.extend(show_urls)
+        self.row_ids.update({url: n_old + i for i, url in enumerate(show_urls)})
+
+        # - neighbours of the new shows, exact
+        new_rows = np.arange(n_old, len(self.show_urls))
+        new_indices, new_similarities = get_brute_force_neighbors(vectors, self.vectors, self.n_neighbors, exclude = new_rows)
+        new_indices, new_similarities = self._pad(new_indices, new_similarities)
+
+        self.indices = np.vstack([self.indices, new_indices])
+        self.similarities = np.vstack([self.similarities, new_similarities])
+
+        # - reverse edges: a new show replaces the last neighbour of shows it is closer to
+        for new_row, neighbors, sims in zip(new_rows, new_indices, new_similarities):
+            for row, similarity in zip(neighbors, sims):
+                if row < 0 or similarity <= self.similarities[row, -1]:
+                    continue
+                position = np.searchsorted(-self.similarities[row], -similarity)
+                self.indices[row] = np.insert(self.indices[row], position, new_row)[:self.n_neighbors]
+                self.similarities[row] = np.insert(self.similarities[row], position, similarity)[:self.n_neighbors]
+
+    def add_shows(self, data, embeddings = None):
+        """ Vectorise new shows with the stored vectorizer and add them.
+
+        Args:
+            data (pd.DataFrame): New shows (load_data layout).
+            embeddings (np.ndarray, optional): Their stored embeddings (get_stored_embeddings);
+                required when the index was built with embeddings.
+        """
+        if self.embedding_dim and embeddings is None:
+            raise ValueError(
+                f"This index was built with {self.embedding_dim}-dimensional stored embeddings: "
+                "pass the new shows' embeddings (get_stored_embeddings / load_stored_embeddings)."
+            )
+        vectors, _ = get_show_vectors(data, embeddings, vectorizer = self.vectorizer)
+        self.add(vectors, list(data['show_url']))
+
+    def _pad(self, indices, similarities):
+        # - fewer shows than neighbours: pad with -1 / -inf
+        missing = self.n_neighbors - indices.shape[1]
+        if missing <= 0:
+            return indices, similarities
+        return (
+            np.pad(indices, ((0, 0), (0, missing)), constant_values = -1),
+            np.pad(similarities, ((0, 0), (0, missing)), constant_values = -np.inf),
+        )
+
+    # Persistence ----
+    def save(self, path = SIMILAR_SETS_PATH):
+        """ Save the graph, vectors and vectorizer (so shows can still be added after loading). """
+        joblib.dump(self, path)
+        return path
+
+    @staticmethod
+    def load(path = SIMILAR_SETS_PATH):
+        return joblib.load(path)
@@ -0,0 +1,64 @@
+
+# Imports ----
+import re
+import subprocess
+import sys
+import time
+
+
+# Load Times ----
+# - wall time of the first run of each lazily loaded tab in this process, in ms
+LOAD_TIMES = {}
+
+IMPORTTIME_LINE = re.compile(r"^import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s+)(\S+)")
+
+
+# In-Process ----
+def record_load_time(name, start):
+    """ Record the time since `start` (a perf_counter value) under `name`, the first time only. """
+    LOAD_TIMES.setdefault(name, round((time.perf_counter() - start) * 1000, 1))
+
+
+# Import Time Report ----
+def get_import_times(modules, python = sys.executable, cwd = None):
+    """ Import time of each module loaded by `import <modules>` in a fresh interpreter.
+
+    Runs `python -X importtime` so nothing is already cached in sys.modules.
+
+    Args:
+        modules (list[str]): Modules imported together, e.g. ['streamlit', 'src.app.app_tab_1'].
+        python (str, optional): Interpreter to use. Defaults to the current one.
+        cwd (str, optional): Working directory (the repo root for src / utilities imports).
+
+    Returns:
+        list[dict]: One row per imported module: 'module', 'depth', 'self_ms' and
+            'cumulative_ms', sorted by cumulative time (slowest first).
+    """
+    result = subprocess.run(
+        [python, '-X', 'importtime', '-c', f"import {', '.join(modules)}"],
+        capture_output = True,
+        text           = True,
+        cwd            = cwd,
+    )
+
+    rows = []
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, module = match.groups()
+            rows.append({
+                'module':        module,
+                'depth':         (len(indent) - 1) // 2,
+                'self_ms':       int(self_us) / 1000,
+                'cumulative_ms': int(cumulative_us) / 1000,
+            })
+
+    if result.returncode != 0 and not rows:
+        raise RuntimeError(f"Importing {modules} failed:\n{result.stderr[-2000:]}")
+
+    return sorted(rows, key = lambda row: -row['cumulative_ms'])
+
+
+def get_total_import_ms(import_times):
+    """ Total import time: the cumulative time of the top-level imports. """
+    return round(sum(row['cumulative_ms'] for row in import_times if row['depth'] == 0), 1)
@@ -0,0 +1,157 @@
+
+# Imports ----
+import os
+import queue
+import threading
+import time
+
+import pandas as pd
+
+from utilities.document_builder import iter_documents, RETRIEVAL_METADATA_FIELDS
+
+
+# Defaults ----
+BATCH_SIZE = 4
+MAX_WAIT_SECONDS = 2.0
+
+_DONE = object()
+
+
+# Micro-Batching ----
+def iter_micro_batches(items, batch_size = BATCH_SIZE, max_wait = MAX_WAIT_SECONDS, max_queued = 64):
+    """ Group a slow iterator into micro-batches, flushing on size or time.
+
+    The source is consumed on a background thread, so a batch is flushed
+    `max_wait` seconds after its first item arrived even while the source is
+    still busy producing the next one (e.g. a show page loading). At most
+    `max_queued` items wait between the two sides.
+
+    Args:
+        items (Iterable): Source items.
+        batch_size (int, optional): Max items per batch. Defaults to 4.
+        max_wait (float, optional): Max seconds an item waits for its batch to fill. Defaults to 2.0.
+        max_queued (int, optional): Items buffered ahead of the consumer. Defaults to 64.
+
+    Yields:
+        list[tuple]: [(arrived_at, item), ...], arrived_at from time.perf_counter.
+    """
+    buffer = queue.Queue(maxsize = max_queued)
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in items:
+                entry = (time.perf_counter(), item)
+                while not stop.is_set():
+                    try:
+                        buffer.put(entry, timeout = 0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+        except Exception as e:
+            buffer.put((_DONE, e))
+            return
+        buffer.put((_DONE, None))
+
+    producer = threading.Thread(target = produce, name = 'micro_batch_producer', daemon = True)
+    producer.start()
+
+    batch = []
+    try:
+        while True:
+            timeout = None if not batch else max(0.0, batch[0][0] + max_wait - time.perf_counter())
+            try:
+                arrived_at, item = buffer.get(timeout = timeout)
+            except queue.Empty:
+                yield batch
+                batch = []
+                continue
+
+            if arrived_at is _DONE:
+                if batch:
+                    yield batch
+                if item is not None:
+                    raise item
+                return
+
+            batch.append((arrived_at, item))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    finally:
+        stop.set()
+
+
+# Stages ----
+def format_show_batch(records):
+    """ Raw scraped show records -> formatted shows (same columns as the batch scraper). """
+    from utilities.mixcloud_scraper import get_dataframe, get_formatted_dataframe
+
+    return get_formatted_dataframe(get_dataframe(records))
+
+
+def append_csv(data, path):
+    """ Append rows to a csv file (header only when the file is new). """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok = True)
+    data.to_csv(path, mode = 'a', header = not os.path.exists(path), index = False)
+
+
+# Streaming Index ----
+def stream_to_index(
+    records,
+    dj_info,
+    vectorstore,
+    format_records = True,
+    batch_size     = BATCH_SIZE,
+    max_wait       = MAX_WAIT_SECONDS,
+    shows_path     = None,
+    fields         = RETRIEVAL_METADATA_FIELDS,
+):
+    """ Format, document and index shows in micro-batches while they are being scraped.
+
+    Each micro-batch is formatted, merged with the DJ info, turned into
+    documents and added to the vectorstore (embedding included) before the
+    next one, while the scraper keeps producing on its own thread. A show is
+    searchable once its batch is indexed: at most `max_wait` seconds plus
+    the time to format and embed one batch after it was scraped.
+
+    Args:
+        records (Iterable[dict]): Show records, e.g. from scrape_mixcloud_stream.
+        dj_info (pd.DataFrame): DJ info of the shows (scrape_mixcloud_stream).
+        vectorstore (VectorStore): Target vectorstore (documents are added with
+            chunk_indexer.get_parent_id ids, so re-scraped shows replace their document).
+        format_records (bool, optional): Records are raw scraped shows to format.
+            Set to False for already formatted rows. Defaults to True.
+        batch_size (int, optional): Shows per micro-batch. Defaults to 4.
+        max_wait (float, optional): Max seconds a show waits for its batch. Defaults to 2.0.
+        shows_path (str, optional): Csv file the formatted shows are appended to. Defaults to none.
+        fields (list[str], optional): Document metadata kept. Defaults to RETRIEVAL_METADATA_FIELDS.
+
+    Yields:
+        dict: Per batch: shows, show_urls, seconds to index the batch and the
+            scrape -> searchable latency of its oldest show.
+    """
+    from utilities.rag_utilities import get_combined_data
+    from utilities.chunk_indexer import get_parent_id
+
+    for batch in iter_micro_batches(records, batch_size = batch_size, max_wait = max_wait):
+        start = time.perf_counter()
+        rows = [item for _, item in batch]
+
+        df_sets = format_show_batch(rows) if format_records else pd.DataFrame(rows)
+        if shows_path is not None:
+            append_csv(df_sets, shows_path)
+
+        documents = list(iter_documents(get_combined_data(dj_info, df_sets), fields = fields, processes = 0))
+        if documents:
+            vectorstore.add_documents(documents, ids = [get_parent_id(doc.metadata) for doc in documents])
+
+        indexed_at = time.perf_counter()
+        yield {
+            'shows':           len(rows),
+            'show_urls':       [doc.metadata.get('show_url') for doc in documents],
+            'index_seconds':   round(indexed_at - start, 3),
+            'latency_seconds': round(indexed_at - batch[0][0], 3),
+        }
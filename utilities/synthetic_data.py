@@ -0,0 +1,81 @@
+
+# Imports ----
+import datetime
+
+import numpy as np
+import pandas as pd
+
+
+# Vocab ----
+SYNTHETIC_DJS = [f"DJ {name}" for name in [
+    'Sprenk', 'Eflosa', 'WarHoll', 'Dhroovy', 'Kakah', 'Vini', 'Malcom', 'Lov3', 'Ana', 'Kim',
+]]
+
+SYNTHETIC_TAGS = [
+    'zouk', 'brazilian zouk', 'zouk lambada', 'ghetto zouk', 'zouk mix', 'world', 'live dj blends',
+    'r&b', 'alternative r&b', 'afrobeat', 'kizomba', 'moombahton', 'chillout', 'acoustic', 'electro',
+    'instrumental', 'pop', 'dj edits / bootlegs', 'collaboration', 'bachata', 'salsa',
+]
+
+
+# Synthetic Catalog ----
+def get_synthetic_sets(n_rows = 100_000, seed = 42, start_date = datetime.date(2018, 1, 1)):
+    """ Generate a show catalog shaped like load_data() output, for benchmarks.
+
+    Args:
+        n_rows (int, optional): Number of sets. Defaults to 100,000.
+        seed (int, optional): Random seed. Defaults to 42.
+        start_date (datetime.date, optional): Earliest upload date. Defaults to 2018-01-01.
+    """
+    rng = np.random.default_rng(seed)
+
+    n_tags = rng.integers(0, 6, n_rows)
+    tags = [
+        list(rng.choice(SYNTHETIC_TAGS, size = k, replace = False)) for k in n_tags
+    ]
+
+    energy_min = rng.integers(0, 6, n_rows)
+    bpm_min = rng.integers(60, 90, n_rows)
+    days = rng.integers(0, (datetime.date.today() - start_date).days, n_rows)
+    dates = pd.to_datetime(start_date) + pd.to_timedelta(days, unit = 'D')
+
+    # - some dates missing, like sets whose "Uploaded ..." text couldn't be parsed
+    dates = dates.where(rng.random(n_rows) > 0.01)
+
+    return pd.DataFrame({
+        'name':              rng.choice(SYNTHETIC_DJS, n_rows),
+        'title':             [f"Set {i}" for i in range(n_rows)],
+        'play_count':        rng.integers(0, 5000, n_rows).astype(float),
+        'fav_count':         rng.integers(0, 200, n_rows).astype(float),
+        'date_uploaded':     pd.Series(dates).dt.date,
+        'show_tags_cleaned': tags,
+        'energy_min':        energy_min.astype(float),
+        'energy_max':        (energy_min + rng.integers(0, 5, n_rows)).astype(float),
+        'bpm_min':           bpm_min.astype(float),
+        'bpm_max':           (bpm_min + rng.integers(0, 20, n_rows)).astype(float),
+        'show_url':          [f"https://www.mixcloud.com/synthetic/set-{i}/" for i in range(n_rows)],
+    })
+
+
+# Synthetic Embeddings ----
+def get_synthetic_embeddings(n_rows = 100_000, dim = 1536, n_clusters = 500, seed = 42):
+    """ Clustered float32 vectors shaped like ada-002 embeddings, for vectorstore benchmarks.
+
+    Clustered rather than uniform, so nearest neighbours are meaningful and
+    approximate / quantised recall is realistic.
+
+    Returns:
+        tuple: (vectors, cluster labels).
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim)).astype(np.float32)
+    labels = rng.integers(0, n_clusters, n_rows)
+    vectors = centers[labels] + 0.5 * rng.standard_normal((n_rows, dim)).astype(np.float32)
+    return vectors, labels
+
+
+def get_synthetic_queries(vectors, n_queries = 200, noise = 0.1, seed = 7):
+    """ Queries near randomly chosen stored vectors. """
+    rng = np.random.default_rng(seed)
+    rows = rng.choice(len(vectors), n_queries, replace = False)
+    return vectors[rows] + noise * rng.standard_normal((n_queries, vectors.shape[1])).astype(np.float32)
@@ -0,0 +1,106 @@
+
+# Imports ----
+import numpy as np
+import pandas as pd
+
+
+# Tag Index ----
+class TagIndex:
+    """ Inverted index from genre tags to packed row-id bitmaps.
+
+    Built once from the per-row tag lists (show_tags_cleaned). Every tag in the
+    vocabulary also gets a precomputed genre bitmap covering all tags that
+    contain it (e.g. "zouk" -> "zouk", "brazilian zouk", "zouk lambada"), so a
+    genre selection is just an OR of a few bitmaps.
+
+    Args:
+        tag_lists (list[list[str]]): Tags per row; non-list entries count as no tags.
+    """
+
+    def __init__(self, tag_lists):
+        tag_lists = [tags if isinstance(tags, list) else [] for tags in tag_lists]
+        n_rows = len(tag_lists)
+
+        lengths = np.fromiter((len(tags) for tags in tag_lists), dtype = np.int64, count = n_rows)
+        row_ids = np.repeat(np.arange(n_rows, dtype = np.int64), lengths)
+        flat_tags = pd.Series([tag for tags in tag_lists for tag in tags], dtype = object).astype(str)
+        tag_codes, vocab = pd.factorize(flat_tags)
+
+        self._build(n_rows, row_ids, tag_codes, list(vocab))
+
+    @classmethod
+    def from_csr(cls, offsets, codes, vocab):
+        """ Build from CSR tag arrays (row i's tags are vocab[codes[offsets[i]:offsets[i + 1]]]). """
+        index = cls.__new__(cls)
+        n_rows = len(offsets) - 1
+        row_ids = np.repeat(np.arange(n_rows, dtype = np.int64), np.diff(offsets))
+        index._build(n_rows, row_ids, np.asarray(codes, dtype = np.int64), list(vocab))
+        return index
+
+    def _build(self, n_rows, row_ids, tag_codes, vocab):
+        self.n_rows = n_rows
+        self.vocab = vocab
+        self.vocab_lower = [tag.lower() for tag in self.vocab]
+        self.tag_ids = {tag: i for i, tag in enumerate(self.vocab)}
+
+        # - rows per tag (grouped by sorting on tag code) ----
+        order = np.argsort(tag_codes, kind = 'stable')
+        boundaries = np.cumsum(np.bincount(tag_codes, minlength = len(self.vocab)))[:-1]
+        rows_per_tag = np.split(row_ids[order], boundaries) if len(self.vocab) else []
+
+        self.tag_bitmaps = [self._to_bitmap(rows) for rows in rows_per_tag]
+        self.tag_counts = {tag: int(np.unique(rows).size) for tag, rows in zip(self.vocab, rows_per_tag)}
+
+        # - substring-aware genre bitmaps for every tag in the vocabulary ----
+        self.genre_bitmaps = {tag: self._get_genre_bitmap(tag) for tag in self.vocab}
+
+    # Bitmaps ----
+    def _to_bitmap(self, rows):
+        mask = np.zeros(self.n_rows, dtype = bool)
+        mask[rows] = True
+        return np.packbits(mask)
+
+    def _empty_bitmap(self):
+        return np.zeros((self.n_rows + 7) // 8, dtype = np.uint8)
+
+    def _union(self, bitmaps):
+        bitmaps = list(bitmaps)
+        if not bitmaps:
+            return self._empty_bitmap()
+        return np.bitwise_or.reduce(bitmaps)
+
+    def to_mask(self, bitmap):
+        """ Packed bitmap -> boolean row mask. """
+        return np.unpackbits(bitmap, count = self.n_rows).astype(bool)
+
+    # Lookups ----
+    def get_matching_tags(self, genre):
+        """ Tags in the vocabulary containing `genre` (case-insensitive). """
+        genre = genre.lower()
+        return [tag for tag, tag_lower in zip(self.vocab, self.vocab_lower) if genre in tag_lower]
+
+    def _get_genre_bitmap(self, genre):
+        return self._union(self.tag_bitmaps[self.tag_ids[tag]] for tag in self.get_matching_tags(genre))
+
+    def get_genre_bitmap(self, genre):
+        """ Bitmap of rows with any tag containing `genre`. """
+        if genre in self.genre_bitmaps:
+            return self.genre_bitmaps[genre]
+        return self._get_genre_bitmap(genre)
+
+    def get_genre_mask(self, genres):
+        """ Rows with any tag containing any of `genres`. """
+        return self.to_mask(self._union(self.get_genre_bitmap(genre) for genre in genres))
+
+    def get_tags_mask(self, tags):
+        """ Rows having any of the exact `tags`. """
+        return self.to_mask(self._union(self.tag_bitmaps[self.tag_ids[tag]] for tag in tags if tag in self.tag_ids))
+
+    # Multiselect ----
+    def get_genre_options(self, excluded = ()):
+        """ Sorted tag vocabulary, minus `excluded`. """
+        return sorted(tag for tag in self.vocab if tag not in excluded)
+
+    def format_genre_option(self, tag):
+        """ Multiselect label with the number of sets carrying the tag. """
+        return f"{tag} ({self.tag_counts.get(tag, 0):,})"